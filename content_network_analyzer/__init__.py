@@ -2,7 +2,7 @@
 Provides datatypes, and methods for analyzing, and visualizing data collected from content networks.
 """
 
-from .core import NamedCluster  # noqa:F401
+from .core import MaterializedCluster, NamedCluster, SnapshotStore  # noqa:F401
 from .models import SoundCloudTrack, TumblrPost, YouTubeTrack, WattPadBook, WattPadPage  # noqa:F401
 from .models import GitHubRepository, GitHubLanguage  # noqa:F401
 from .views import MatPlotLibView  # noqa:F401
@@ -0,0 +1,104 @@
+"""
+Benchmarks the HTML parsers on the HTML dumps of every content network.
+
+Usage: python -m content_network_analyzer.benchmark [--repeat N] [PLATFORM=DUMP ...]
+
+Without arguments, the HTML dumps in models/resources are benchmarked.
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from inspect import signature
+from io import StringIO
+from logging import getLogger
+from pathlib import Path
+from timeit import default_timer
+
+from .core import PARSERS
+from .models import SoundCloudTrack, TumblrPost, YouTubeTrack, WattPadBook, WattPadPage
+
+
+LOGGER = getLogger(__name__)
+PLATFORMS = {
+    "youtube": YouTubeTrack.Snapshot,
+    "soundcloud": SoundCloudTrack.Snapshot,
+    "tumblr": TumblrPost.Snapshot,
+    "wattpad-book": WattPadBook.Snapshot,
+    "wattpad-page": WattPadPage.Snapshot,
+}
+RESOURCES = Path(__file__).parents[0] / Path("models") / Path("resources")
+DUMPS = {
+    "youtube": [RESOURCES / Path("youtube-track.html")],
+    "soundcloud": [RESOURCES / Path("soundcloud-track.html")],
+    "tumblr": [RESOURCES / Path("tumblr-post.html")],
+    "wattpad-book": [RESOURCES / Path("wattpad-book.html")],
+    "wattpad-page": [RESOURCES / Path("wattpad-page.html")],
+}
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+def benchmark(snapshot_class, paths, repeat=10, **kwargs):
+    """Measures the time it takes to construct snapshots from HTML dumps.
+
+    Parameters
+    ----------
+    snapshot_class : type
+        The class of the snapshots.
+    paths : list of Path
+        The HTML dumps.
+    repeat : int, optional
+        The number of times every HTML dump is parsed.
+    kwargs : dict
+        The keyword arguments of the from_html method, such as the name of the parser.
+
+    Returns
+    -------
+    (float, list of dict)
+        The mean number of seconds it takes to parse an HTML dump, and the states of the
+        snapshots.
+    """
+    contents = [path.read_text(encoding="utf8") for path in paths]
+    states = []
+    start = default_timer()
+    for _ in range(repeat):
+        states = []
+        for content in contents:
+            snapshot = snapshot_class.from_html(None, SNAPSHOT_DATE, StringIO(content), **kwargs)
+            states.append(snapshot.__getstate__())
+    return ((default_timer() - start) / (repeat * len(contents)), states)
+
+
+def main():
+    parser = ArgumentParser(description="Benchmarks the HTML parsers.")
+    parser.add_argument("--repeat", type=int, default=10, help="Parse every dump N times.")
+    parser.add_argument(
+        "dumps", nargs="*", metavar="PLATFORM=DUMP",
+        help="An HTML dump of a platform from %s." % ", ".join(sorted(PLATFORMS)))
+    args = parser.parse_args()
+
+    dumps = DUMPS
+    if args.dumps:
+        dumps = {}
+        for argument in args.dumps:
+            platform, path = argument.split("=", 1)
+            assert platform in PLATFORMS, "Unknown platform %r" % platform
+            dumps.setdefault(platform, []).append(Path(path))
+
+    print("%-14s%-14s%14s%10s" % ("platform", "parser", "ms / dump", "speedup"))
+    for platform, paths in sorted(dumps.items()):
+        snapshot_class = PLATFORMS[platform]
+        variants = [(name, {"parser": name}) for name in PARSERS]
+        if "streaming" in signature(snapshot_class.from_html).parameters:
+            variants = [(name, dict(kwargs, streaming=False)) for name, kwargs in variants]
+            variants.append(("streaming", {"streaming": True}))
+        baseline, expected = None, None
+        for name, kwargs in variants:
+            seconds, states = benchmark(snapshot_class, paths, args.repeat, **kwargs)
+            baseline = baseline or seconds
+            expected = expected or states
+            assert states == expected, "%s disagrees with %s" % (name, PARSERS[0])
+            print("%-14s%-14s%14.3f%9.1fx" % (platform, name, seconds * 1000, baseline / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,18 @@
 Provides the basic datatypes, and abstractions.
 """
 
-from .cluster import Cluster, NamedCluster  # noqa:F401
+from .cluster import Cluster, EvaluationStatistics, MaterializedCluster, NamedCluster  # noqa:F401
+from .cluster import optimize  # noqa:F401
+from .cache import ParseCache, cached, get_cache  # noqa:F401
+from .columnar import ColumnarSample, CompressedSample  # noqa:F401
+from .extraction import Extractor, Field  # noqa:F401
 from .namedentity import NamedEntity  # noqa:F401
-from .sample import RandomVariable, Individual, SampledIndividual  # noqa:F401
-from .util import fraction, parse_int  # noqa:F401
+from .parallel import aggregate_parallel, ingest_parallel  # noqa:F401
+from .parsing import PARSERS, HTMLElement, get_parser, parse_html, set_default_parser  # noqa:F401
+from .retention import Compactor, RetentionPolicy  # noqa:F401
+from .sample import RandomVariable, Individual, BaseSample, Sample, SampledIndividual  # noqa:F401
+from .sample import asof  # noqa:F401
+from .store import DEFAULT_STORE, SnapshotStore, get_store  # noqa:F401
+from .util import fraction, from_timestamp, intern_tags, intern_text, parse_int  # noqa:F401
+from .util import to_timestamp  # noqa:F401
 from .view import View  # noqa:F401
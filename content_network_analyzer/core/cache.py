@@ -0,0 +1,352 @@
+"""
+Defines an on-disk cache of the fields extracted from dumps.
+"""
+
+from functools import wraps
+from hashlib import sha256
+from inspect import signature
+from io import BytesIO, StringIO
+from logging import getLogger
+import os
+from pathlib import Path
+import pickle
+from tempfile import NamedTemporaryFile
+from threading import local
+
+
+LOGGER = getLogger(__name__)
+
+
+class ParseCache(object):
+    """This class represents an on-disk cache of the fields extracted from dumps.
+
+    The entries are keyed by the content hash of a dump together with the name, and the version
+    of the method that parsed it, and the arguments of the method, so that byte-identical dumps
+    are parsed only once. The cache is used by the methods decorated with cached within a with
+    statement in the thread that entered it. Entries are written atomically, so that the cache
+    can be shared by several processes. When the total size of the entries exceeds the maximal
+    size, the least recently used entries are evicted until the total size drops to three
+    quarters of the maximal size.
+
+    The total size of the entries is measured once by the cache, and then kept up to date as
+    entries are written. Only the cache itself evicts entries. A pickled copy of the cache, such
+    as the one used by the processes of .parallel.ingest_parallel, never measures the cache, or
+    evicts entries, but it counts the bytes it writes, and the cache accounts for them.
+
+    Parameters
+    ----------
+    directory : str or Path
+        The directory that contains the entries. The directory is created if it does not exist.
+    max_size : int, optional
+        The maximal total size of the entries in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        The number of dumps whose fields were found in the cache by this process.
+    misses : int
+        The number of dumps that were parsed, and stored in the cache by this process.
+    written : int
+        The number of bytes written by a pickled copy of the cache that the cache has not
+        accounted for yet. See account.
+
+    Examples
+    --------
+    >>> with ParseCache("cache", max_size=2**30) as cache:
+    ...     with open("dQw4w9WgXcQ.html", "rt") as f:
+    ...         snapshot = YouTubeTrack.Snapshot.from_html(track, date, f)
+    """
+    def __init__(self, directory, max_size=2**30):
+        assert isinstance(max_size, int) and max_size > 0
+
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self._size = None
+        self._copy = False
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        """Returns the path to an entry.
+
+        Parameters
+        ----------
+        key : str
+            The hexadecimal key of the entry.
+
+        Returns
+        -------
+        Path
+            The path to the entry.
+        """
+        return self.directory / Path(key[:2]) / Path("%s.pickle" % key)
+
+    def _entries(self):
+        """Produces the entries in the cache.
+
+        Yields
+        ------
+        (float, int, Path)
+            The times of the last use of the entries, their sizes, and their paths.
+        """
+        for path in self.directory.glob("*/*.pickle"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield (stat.st_mtime, stat.st_size, path)
+
+    def get(self, key):
+        """Returns the value of an entry, and marks the entry as recently used.
+
+        Parameters
+        ----------
+        key : str
+            The hexadecimal key of the entry.
+
+        Returns
+        -------
+        object or None
+            The value of the entry, or None if the cache does not contain the entry, or if the
+            entry cannot be loaded, such as when the class of its value has been moved, or
+            renamed. An entry that cannot be loaded is removed from the cache.
+        """
+        path = self._path(key)
+        try:
+            f = path.open("rb")
+        except OSError:
+            return None
+        try:
+            with f:
+                value = pickle.load(f)
+            os.utime(str(path))
+        except Exception as error:
+            LOGGER.warning("Removing unreadable entry %s: %s", path, error)
+            self._remove(path)
+            return None
+        return value
+
+    def _remove(self, path):
+        """Removes an entry.
+
+        Parameters
+        ----------
+        path : Path
+            The path to the entry.
+        """
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        if not self._copy and self._size is not None:
+            self._size -= size
+
+    def put(self, key, value):
+        """Stores the value of an entry, and evicts the least recently used entries if the total
+        size of the entries exceeds the maximal size.
+
+        Parameters
+        ----------
+        key : str
+            The hexadecimal key of the entry.
+        value : object
+            The value of the entry.
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        f = NamedTemporaryFile("wb", dir=str(path.parent), suffix=".tmp", delete=False)
+        try:
+            with f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, str(path))
+        except BaseException:
+            os.unlink(f.name)
+            raise
+        size = path.stat().st_size
+        if self._copy:
+            self.written += size
+        else:
+            self.account(size)
+
+    def account(self, size):
+        """Accounts for entries written by a pickled copy of the cache, and evicts the least
+        recently used entries if the total size of the entries exceeds the maximal size.
+
+        The first call measures the total size of the entries instead, which already includes
+        the bytes written so far.
+
+        Parameters
+        ----------
+        size : int
+            The number of bytes written.
+        """
+        assert not self._copy
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += size
+        if self._size > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        """Removes the least recently used entries until their total size drops to three
+        quarters of the maximal size.
+        """
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if self._size <= self.max_size * 3 // 4:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            evicted += 1
+        LOGGER.debug("Evicted %d entries from %s", evicted, self.directory)
+
+    def clear(self):
+        """Removes all entries from the cache.
+        """
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self._size = 0
+
+    def __len__(self):
+        return sum(1 for _ in self._entries())
+
+    def __enter__(self):
+        _active_caches().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        active_caches = _active_caches()
+        assert active_caches[-1] is self
+        active_caches.pop()
+
+    def __getstate__(self):
+        return {"directory": self.directory, "max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.directory = state["directory"]
+        self.max_size = state["max_size"]
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self._size = None
+        self._copy = True
+
+    def __repr__(self):
+        return "%s(%r, max_size=%d)" % (self.__class__.__name__, str(self.directory), self.max_size)
+
+
+_THREAD_STATE = local()
+
+
+def _active_caches():
+    """Returns the caches entered in a with statement in the current thread.
+
+    Returns
+    -------
+    list of ParseCache
+        The caches in the order in which they were entered.
+    """
+    if not hasattr(_THREAD_STATE, "caches"):
+        _THREAD_STATE.caches = []
+    return _THREAD_STATE.caches
+
+
+def get_cache():
+    """Returns the active cache.
+
+    Returns
+    -------
+    ParseCache or None
+        The cache entered last in a with statement in the current thread, or None if there is
+        none.
+    """
+    active_caches = _active_caches()
+    return active_caches[-1] if active_caches else None
+
+
+def cached(version):
+    """Decorates a static method that constructs a snapshot from a dump, so that the fields of
+    the snapshot are stored in the active cache, and parsing is skipped on a hit.
+
+    Note
+    ----
+    The decorated method takes the random variable, the date, and time at which the dump was
+    taken, and the dump as its first three parameters. The fields of the snapshot are the
+    parameters of the Snapshot constructor except the random variable, and the date, and time,
+    and they are stored in the attributes of the same names. Since the fields are reused for
+    dumps taken at other dates, and times, the Snapshot constructor must rebuild any field that
+    depends on the date, and time.
+
+    Parameters
+    ----------
+    version : int
+        The version of the method, which must be increased whenever the method extracts
+        different fields from the same dump, so that stale entries are never used.
+
+    Returns
+    -------
+    callable
+        The decorator.
+
+    Examples
+    --------
+    >>> @staticmethod
+    ... @cached(1)
+    ... def from_html(track, date, f, parser=None):
+    ...     ...
+    """
+    def decorator(function):
+        parameters = signature(function)
+        variable_name, date_name, f_name = list(parameters.parameters)[:3]
+        name = "%s.%s:%d" % (function.__module__, function.__qualname__, version)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return function(*args, **kwargs)
+
+            arguments = parameters.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            variable = arguments.arguments[variable_name]
+            date = arguments.arguments[date_name]
+            content = arguments.arguments[f_name].read()
+            options = list(arguments.arguments.items())[3:]
+            data = content.encode("utf8") if isinstance(content, str) else content
+            digest = sha256()
+            digest.update(("%s%r\0" % (name, options)).encode("utf8"))
+            digest.update(data)
+            key = digest.hexdigest()
+
+            entry = cache.get(key)
+            if entry is not None:
+                cache.hits += 1
+                snapshot_class, fields = entry
+                return snapshot_class(variable, date=date, **fields)
+
+            cache.misses += 1
+            arguments.arguments[variable_name] = None
+            arguments.arguments[f_name] = \
+                StringIO(content) if isinstance(content, str) else BytesIO(content)
+            snapshot = function(*arguments.args, **arguments.kwargs)
+            snapshot_class = type(snapshot)
+            names = list(signature(snapshot_class.__init__).parameters)[2:]
+            fields = dict((field, getattr(snapshot, field)) for field in names if field != "date")
+            cache.put(key, (snapshot_class, fields))
+            if variable is None:
+                return snapshot
+            return snapshot_class(variable, date=date, **fields)
+        return wrapper
+    return decorator
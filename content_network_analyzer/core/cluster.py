@@ -3,15 +3,339 @@ Defines cluster datatypes.
 """
 
 from abc import abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
 from heapq import merge
 from logging import getLogger
+from threading import Lock, RLock
+from time import perf_counter
+
+import numpy as np
 
 from .namedentity import NamedEntity
+from .util import to_timestamp
 
 
+BATCH_SIZE = 2**16
 LOGGER = getLogger(__name__)
 
 
+def _tag(sample, index):
+    """Tags the individuals in a random sample with their sample time, and an index.
+
+    Parameters
+    ----------
+    sample : iterable of .sample.SampledIndividual
+        A random sample sorted in the ascending order of sample time.
+    index : int
+        The index of the random sample.
+
+    Yields
+    ------
+    (datetime, int, .sample.SampledIndividual)
+        The sample time of an individual, the index of the random sample, and the individual.
+    """
+    for individual in sample:
+        yield (individual.getDatetime(), index, individual)
+
+
+def make_batch(individuals, attrs):
+    """Converts individuals into NumPy arrays of sample times, and attribute values.
+
+    Individuals that lack any of the attributes are skipped.
+
+    Parameters
+    ----------
+    individuals : iterable of .sample.SampledIndividual
+        Individuals.
+    attrs : sequence of str
+        The names of the attributes.
+
+    Returns
+    -------
+    (np.ndarray, tuple of np.ndarray)
+        The sample times of the individuals in microseconds since the epoch, and the values of
+        the attributes of the individuals.
+    """
+    dates, rows = [], []
+    for individual in individuals:
+        try:
+            rows.append([individual.getAttribute(attr) for attr in attrs])
+        except KeyError:
+            continue
+        dates.append(individual.getDatetime())
+    timestamps = np.fromiter(map(to_timestamp, dates), dtype=np.int64, count=len(dates))
+    columns = tuple(np.array([row[index] for row in rows]) for index in range(len(attrs)))
+    return (timestamps, columns)
+
+
+def read_columns(cluster, attrs, batch_size, mindate=None, maxdate=None):
+    """Reads the attributes of the aggregate random sample of a cluster in a window.
+
+    Parameters
+    ----------
+    cluster : Cluster
+        A cluster.
+    attrs : sequence of str
+        The names of the attributes.
+    batch_size : int
+        The maximum number of individuals read in a batch.
+    mindate : datetime or None, optional
+        The minimal sample time of the individuals. None if unbounded.
+    maxdate : datetime or None, optional
+        The maximal sample time of the individuals. None if unbounded.
+
+    Returns
+    -------
+    (np.ndarray, tuple of np.ndarray) or None
+        The sample times of the individuals in the window preceded by the latest individual
+        sampled before the window, and the values of the attributes, or None if there are no
+        such individuals.
+    """
+    batches = list(cluster.iter_batches(attrs, batch_size, mindate, maxdate))
+    seed = cluster._before(mindate)
+    if seed is not None:
+        batches.insert(0, make_batch([seed], attrs))
+    if not batches:
+        return None
+    timestamps = np.concatenate([timestamps for timestamps, _ in batches])
+    columns = tuple(
+        np.concatenate([columns[index] for _, columns in batches]) for index in range(len(attrs)))
+    return (timestamps, columns)
+
+
+def _derive_columns(individual_class, attrs, values, size):
+    """Computes attributes from the aggregated counters of individuals.
+
+    Parameters
+    ----------
+    individual_class : type
+        The class of the individuals.
+    attrs : sequence of str
+        The names of the attributes, which are either counters, or ratios of counters.
+    values : dict of (str, np.ndarray)
+        The values of the aggregated counters.
+    size : int
+        The number of aggregated individuals.
+
+    Returns
+    -------
+    list of np.ndarray
+        The values of the attributes in the same order as attrs.
+    """
+    columns = []
+    for attr in attrs:
+        if attr in values:
+            columns.append(values[attr])
+        else:
+            numerators, denominators = individual_class.ratios[attr]
+            numerator = sum(values[counter] for counter in numerators)
+            denominator = sum(values[counter] for counter in denominators)
+            columns.append(np.divide(
+                numerator, denominator, out=np.zeros(size), where=denominator != 0))
+    return columns
+
+
+def _resample(steps, freq, mindate=None, size=None):
+    """Forward-fills step functions onto a fixed time grid, and sums them.
+
+    Parameters
+    ----------
+    steps : sequence of (np.ndarray, tuple of np.ndarray)
+        The step functions as sorted sample times, and values. A single step function may have
+        non-numeric values.
+    freq : timedelta
+        The distance between two neighbouring grid points.
+    mindate : datetime or None, optional
+        The minimal grid point. None if unbounded.
+    size : int or None, optional
+        The number of values in a step function. None if there is at least one step function.
+
+    Returns
+    -------
+    (np.ndarray, tuple of np.ndarray)
+        The grid points in microseconds since the epoch, and the sums of the values.
+    """
+    if not steps:
+        return (np.array([], dtype=np.int64), tuple(np.array([]) for _ in range(size)))
+    step = freq // timedelta(microseconds=1)
+    assert step > 0
+    start = min(timestamps[0] for timestamps, _ in steps)
+    if mindate is not None:
+        start = max(start, to_timestamp(mindate))
+    end = max(timestamps[-1] for timestamps, _ in steps)
+    grid = np.arange(-(-start // step) * step, end + 1, step, dtype=np.int64)
+
+    sums = None
+    for timestamps, columns in steps:
+        indices = np.searchsorted(timestamps, grid, side="right") - 1
+        if len(steps) == 1:
+            return (grid, tuple(column[indices] for column in columns))
+        valid = indices >= 0
+        values = [np.where(valid, column[indices], 0) for column in columns]
+        sums = values if sums is None else [
+            column_sum + column for column_sum, column in zip(sums, values)]
+    return (grid, tuple(sums))
+
+
+def merge_samples(samples, seeds=None, statistics=None):
+    """Aggregates random samples into a single aggregate random sample.
+
+    The random samples are merged using a single k-way merge. The latest individual from every
+    random sample is kept in an aggregate tree, so that a change of a single individual only
+    updates O(log k) partial aggregates rather than O(k).
+
+    Parameters
+    ----------
+    samples : sequence of iterable of .sample.SampledIndividual
+        Random samples sorted in the ascending order of sample time.
+    seeds : sequence of .sample.SampledIndividual or None, optional
+        The latest individuals sampled before the random samples, or None for random samples with
+        no such individuals. The individuals are part of the aggregates, but they are not yielded.
+    statistics : EvaluationStatistics or None, optional
+        The evaluation statistics that will record the number of aggregations. None if no
+        statistics are recorded.
+
+    Yields
+    ------
+    .sample.SampledIndividual
+        The individuals in the aggregate random sample sorted in the ascending order of sample time.
+        Individuals with the same sample time are squashed together.
+    """
+    tree = AggregateTree(len(samples), statistics)
+    if seeds is not None:
+        assert len(seeds) == len(samples)
+        for index, seed in enumerate(seeds):
+            if seed is not None:
+                tree.update(index, seed)
+    previous_date = None
+    for date, index, individual in merge(*(
+            _tag(sample, index) for index, sample in enumerate(samples))):
+        if previous_date is not None and date > previous_date:
+            yield tree.total()
+        previous_date = date
+        tree.update(index, individual)
+    if previous_date is not None:
+        yield tree.total()
+
+
+class AggregateTree(object):
+    """This class represents a balanced binary tree of partial aggregates of individuals.
+
+    The leaves of the tree correspond to individuals, and the inner nodes correspond to the
+    aggregates of their children. Since the individual is a monoid, the tree needs no inverse
+    operation to account for a change of a single leaf.
+
+    Parameters
+    ----------
+    size : int
+        The number of leaves in the tree.
+    statistics : EvaluationStatistics or None, optional
+        The evaluation statistics that will record the number of aggregations. None if no
+        statistics are recorded.
+    """
+    def __init__(self, size, statistics=None):
+        assert isinstance(size, int)
+        assert isinstance(statistics, EvaluationStatistics) or statistics is None
+        capacity = 1
+        while capacity < size:
+            capacity *= 2
+        self._capacity = capacity
+        self._nodes = [None] * (2 * capacity)
+        self._dirty = set()
+        self._statistics = statistics
+
+    def update(self, index, individual):
+        """Replaces a leaf of the tree.
+
+        The partial aggregates are updated lazily by the next call of the total method.
+
+        Parameters
+        ----------
+        index : int
+            The index of the leaf.
+        individual : .sample.Individual or None
+            The new individual in the leaf. None if the leaf is empty.
+        """
+        position = self._capacity + index
+        self._nodes[position] = individual
+        if position > 1:
+            self._dirty.add(position // 2)
+
+    def total(self):
+        """Returns the aggregate of all individuals in the tree.
+
+        Returns
+        -------
+        .sample.Individual or None
+            The aggregate of all individuals in the tree. None if the tree is empty.
+        """
+        nodes = self._nodes
+        positions = self._dirty
+        while positions:
+            for position in positions:
+                left, right = nodes[2 * position], nodes[2 * position + 1]
+                if left is None:
+                    nodes[position] = right
+                elif right is None:
+                    nodes[position] = left
+                else:
+                    nodes[position] = left + right
+                    if self._statistics is not None:
+                        self._statistics.additions += 1
+            positions = set(position // 2 for position in positions if position > 1)
+        self._dirty = set()
+        return nodes[1]
+
+
+class EvaluationStatistics(object):
+    """This class represents the statistics of an instrumented evaluation of a cluster.
+
+    Attributes
+    ----------
+    individuals : int
+        The number of individuals yielded by the cluster.
+    additions : int
+        The number of individuals aggregated by the cluster.
+    time : float
+        The wall time in seconds spent evaluating the cluster, including its members.
+    """
+    def __init__(self):
+        self.individuals = 0
+        self.additions = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return "%d individuals, %d additions, %.3fs" % (self.individuals, self.additions, self.time)
+
+
+def _timed(iterator, statistics):
+    """Records the number of individuals yielded by an iterator, and the wall time spent in it.
+
+    Parameters
+    ----------
+    iterator : iterator of .sample.SampledIndividual
+        An iterator.
+    statistics : EvaluationStatistics
+        The evaluation statistics that will record the individuals, and the wall time.
+
+    Yields
+    ------
+    .sample.SampledIndividual
+        The individuals yielded by the iterator.
+    """
+    while True:
+        start = perf_counter()
+        try:
+            individual = next(iterator)
+        except StopIteration:
+            statistics.time += perf_counter() - start
+            return
+        statistics.time += perf_counter() - start
+        statistics.individuals += 1
+        yield individual
+
+
 class Cluster(object):
     """This class represents a set of random variables and their associated random samples.
     """
@@ -30,13 +354,229 @@ class Cluster(object):
         """
         pass
 
+    def _before(self, date):
+        """Returns the latest individual in the aggregate random sample sampled before a datetime.
+
+        Parameters
+        ----------
+        date : datetime or None
+            A datetime. None if there is no individual sampled before the datetime.
+
+        Returns
+        -------
+        .sample.SampledIndividual or None
+            The latest individual sampled before the datetime, or None if there is no such
+            individual.
+        """
+        latest_individual = None
+        if date is None:
+            return latest_individual
+        for individual in self:
+            if individual.getDatetime() >= date:
+                break
+            latest_individual = individual
+        return latest_individual
+
+    def between(self, mindate=None, maxdate=None):
+        """Returns an iterator over sorted individuals in the aggregate random sample in a window.
+
+        The window is pushed down to the random variables in the cluster, so that only the
+        individuals sampled in the window, and the latest individuals sampled before the window
+        are read from the random samples of the random variables.
+
+        Parameters
+        ----------
+        mindate : datetime or None, optional
+            The minimal sample time of the yielded individuals. None if unbounded.
+        maxdate : datetime or None, optional
+            The maximal sample time of the yielded individuals. None if unbounded.
+
+        Returns
+        -------
+        iterator of .sample.SampledIndividual
+            The individuals in the aggregate random sample sampled at, or after mindate, and at,
+            or before maxdate.
+        """
+        for individual in self:
+            date = individual.getDatetime()
+            if maxdate is not None and date > maxdate:
+                break
+            if mindate is None or date >= mindate:
+                yield individual
+
+    def iter_batches(self, attrs, batch_size=BATCH_SIZE, mindate=None, maxdate=None):
+        """Returns an iterator over batches of the aggregate random sample in NumPy arrays.
+
+        Parameters
+        ----------
+        attrs : iterable of str
+            The names of the attributes of the individuals in the aggregate random sample.
+            Individuals that lack any of the attributes are skipped.
+        batch_size : int, optional
+            The maximum number of individuals in a batch.
+        mindate : datetime or None, optional
+            The minimal sample time of the individuals. None if unbounded.
+        maxdate : datetime or None, optional
+            The maximal sample time of the individuals. None if unbounded.
+
+        Returns
+        -------
+        iterator of (np.ndarray, tuple of np.ndarray)
+            The sample times of the individuals in microseconds since the epoch, and the values
+            of the attributes of the individuals in the same order as attrs.
+        """
+        attrs = list(attrs)
+        batch = []
+        for individual in self.between(mindate, maxdate):
+            batch.append(individual)
+            if len(batch) == batch_size:
+                yield make_batch(batch, attrs)
+                batch = []
+        if batch:
+            yield make_batch(batch, attrs)
+
+    def resample(self, freq, attrs, how="last", mindate=None, maxdate=None,
+                 batch_size=BATCH_SIZE):
+        """Resamples the aggregate random sample onto a fixed time grid.
+
+        The aggregate random sample is treated as a step function that is forward-filled onto
+        grid points aligned to multiples of the frequency since the epoch. The grid spans from the
+        earliest to the latest individual in the window, so that the size of the result depends on
+        the grid rather than on the number of individuals.
+
+        Parameters
+        ----------
+        freq : timedelta
+            The distance between two neighbouring grid points.
+        attrs : iterable of str
+            The names of the attributes of the individuals in the aggregate random sample.
+        how : str, optional
+            The resampling method. Only "last" is supported, which takes the latest individual at,
+            or before every grid point.
+        mindate : datetime or None, optional
+            The minimal grid point. None if unbounded.
+        maxdate : datetime or None, optional
+            The maximal grid point. None if unbounded.
+        batch_size : int, optional
+            The maximum number of individuals read in a batch.
+
+        Returns
+        -------
+        (np.ndarray, tuple of np.ndarray)
+            The grid points in microseconds since the epoch, and the values of the attributes at
+            the grid points in the same order as attrs.
+        """
+        assert isinstance(freq, timedelta)
+        if how != "last":
+            raise ValueError("Unsupported resampling method \"%s\"" % how)
+        attrs = list(attrs)
+        columns = read_columns(self, attrs, batch_size, mindate, maxdate)
+        return _resample([columns] if columns is not None else [], freq, mindate, len(attrs))
+
+    def instrument(self, statistics, mindate=None, maxdate=None):
+        """Returns an iterator over the aggregate random sample that records evaluation statistics.
+
+        Parameters
+        ----------
+        statistics : dict of (int, EvaluationStatistics)
+            The evaluation statistics of the nodes in the evaluation tree of the cluster, keyed by
+            the identities of the nodes. Missing statistics will be added.
+        mindate : datetime or None, optional
+            The minimal sample time of the yielded individuals. None if unbounded.
+        maxdate : datetime or None, optional
+            The maximal sample time of the yielded individuals. None if unbounded.
+
+        Returns
+        -------
+        iterator of .sample.SampledIndividual
+            The individuals in the aggregate random sample sampled at, or after mindate, and at,
+            or before maxdate.
+        """
+        node_statistics = statistics.setdefault(id(self), EvaluationStatistics())
+        return _timed(iter(self.between(mindate, maxdate)), node_statistics)
+
+    def _describe(self):
+        """Returns a description of the cluster as a node in an evaluation tree.
+
+        Returns
+        -------
+        str
+            The description of the cluster.
+        """
+        return repr(self)
+
+    def _children(self):
+        """Returns the children of the cluster in an evaluation tree.
+
+        Returns
+        -------
+        list of Cluster
+            The children of the cluster.
+        """
+        return []
+
+    def explain(self, analyze=False, file=None):
+        """Prints the evaluation tree of the cluster.
+
+        Parameters
+        ----------
+        analyze : bool, optional
+            Whether the cluster will be iterated in the instrumented mode, and the evaluation
+            statistics of every node in the evaluation tree will be printed.
+        file : file-like writable object or None, optional
+            The file to which the evaluation tree will be printed. None if sys.stdout.
+        """
+        statistics = {}
+        if analyze:
+            for _ in self.instrument(statistics):
+                pass
+        nodes = [(0, self)]
+        while nodes:
+            depth, node = nodes.pop()
+            line = "%s%s" % ("  " * depth, node._describe())
+            if id(node) in statistics:
+                line = "%s (%s)" % (line, statistics[id(node)])
+            print(line, file=file)
+            nodes.extend((depth + 1, child) for child in reversed(node._children()))
+
+    def _key(self):
+        """Returns a key that identifies the cluster in a union of clusters.
+
+        Returns
+        -------
+        hashable
+            A key that is equal for clusters that aggregate the same random samples.
+        """
+        return id(self)
+
+    def optimize(self):
+        """Returns an optimized cluster with the same aggregate random sample.
+
+        Returns
+        -------
+        Cluster
+            The optimized cluster.
+        """
+        return optimize([self])[0]
+
+    @abstractmethod
+    def getVariables(self):
+        """Returns an iterator that iterates over the random variables in the cluster.
+
+        Returns
+        -------
+        iterator of .sample.RandomVariable
+            The random variables in the cluster.
+        """
+        pass
+
     def __add__(self, other):
         """Returns the union of two clusters.
 
         Note
         ----
         Any future changes to the original clusters will be reflected in the merged cluster. To
-        materialize the union, pass it to the materialized_cluster constructor.
+        materialize the union, pass it to the MaterializedCluster constructor.
 
         Parameters
         ----------
@@ -66,7 +606,9 @@ class LazyUnion(Cluster):
     """This class represents a cluster before the aggregate random sample has been aggregated.
 
     The aggregate random sample has not yet been aggregated from the random samples of the random
-    variables in the cluster.
+    variables in the cluster. Nested lazy unions, and named clusters are flattened, and duplicate
+    clusters are removed, so that the aggregate random sample is aggregated using a single k-way
+    merge over all unique merged clusters.
 
     Note
     ----
@@ -75,44 +617,309 @@ class LazyUnion(Cluster):
 
     Parameters
     ----------
-    first : Cluster
-        The first cluster to be merged
-    second : Cluster
-        The second cluster to be merged
+    clusters : iterable of Cluster
+        The clusters to be merged.
+
+    Attributes
+    ----------
+    clusters : list of Cluster
+        The merged clusters. None of the merged clusters is a lazy union.
     """
-    def __init__(self, first, second):
-        assert isinstance(first, Cluster)
-        assert isinstance(second, Cluster)
-        self.first = first
-        self.second = second
-        LOGGER.debug("Lazy-merging clusters %s + %s -> %s", first, second, self)
+    def __init__(self, *clusters):
+        cluster_list = []
+        for cluster in clusters:
+            assert isinstance(cluster, Cluster)
+            if isinstance(cluster, LazyUnion):
+                cluster_list.extend(cluster.clusters)
+            else:
+                cluster_list.append(cluster)
+        self.clusters = cluster_list
+        self._members = None
+        LOGGER.debug("Lazy-merging %d clusters -> %s", len(cluster_list), self)
+
+    def getMembers(self):
+        """Returns the unique merged clusters after flattening nested named clusters.
+
+        Random variables are identified by their random samples, and other clusters by their
+        identity.
+
+        Returns
+        -------
+        list of Cluster
+            The unique merged clusters. None of the clusters is a lazy union, or a named cluster.
+        """
+        if self._members is None:
+            members = {}
+            clusters = list(reversed(self.clusters))
+            while clusters:
+                cluster = clusters.pop()
+                if isinstance(cluster, LazyUnion):
+                    clusters.extend(reversed(cluster.clusters))
+                elif isinstance(cluster, NamedCluster):
+                    clusters.append(cluster._cluster)
+                else:
+                    members.setdefault(cluster._key(), cluster)
+            self._members = list(members.values())
+        return self._members
 
     def __iter__(self):
-        individuals = [None, None]
-        first = ((individual, 0, 1) for individual in self.first)
-        second = ((individual, 1, 0) for individual in self.second)
-        previous_yield = None
-        future_yield = None
-        for first_individual, first_individual_index, second_individual_index \
-                in merge(first, second):
-            second_individual = individuals[second_individual_index]
-            if second_individual is not None:
-                current_yield = first_individual + second_individual
+        return merge_samples(self.getMembers())
+
+    def _before(self, date):
+        members = self.getMembers()
+        tree = AggregateTree(len(members))
+        for index, cluster in enumerate(members):
+            tree.update(index, cluster._before(date))
+        return tree.total()
+
+    def between(self, mindate=None, maxdate=None):
+        members = self.getMembers()
+        seeds = [cluster._before(mindate) for cluster in members]
+        samples = [cluster.between(mindate, maxdate) for cluster in members]
+        return merge_samples(samples, seeds)
+
+    def _getCounters(self, attrs):
+        """Returns the counters needed to aggregate attributes without aggregating individuals.
+
+        Parameters
+        ----------
+        attrs : sequence of str
+            The names of the attributes.
+
+        Returns
+        -------
+        (type, list of str) or (None, None)
+            The class of the individuals in the merged clusters, and the names of the counters,
+            or (None, None) if some attributes are neither counters, nor ratios of counters.
+        """
+        individual_classes = set()
+        for cluster in self.getMembers():
+            individual = next(iter(cluster), None)
+            if individual is not None:
+                individual_classes.add(type(individual))
+        if len(individual_classes) != 1:
+            return (None, None)
+        individual_class, = individual_classes
+        counters = []
+        for attr in attrs:
+            if attr in individual_class.counters:
+                attr_counters = (attr, )
+            elif attr in individual_class.ratios:
+                numerators, denominators = individual_class.ratios[attr]
+                attr_counters = numerators + denominators
+            else:
+                return (None, None)
+            counters.extend(counter for counter in attr_counters if counter not in counters)
+        return (individual_class, counters)
+
+    def iter_batches(self, attrs, batch_size=BATCH_SIZE, mindate=None, maxdate=None):
+        attrs = list(attrs)
+        individual_class, counters = self._getCounters(attrs)
+        if counters is None:
+            LOGGER.debug("Aggregating %s in %s individual by individual", attrs, self)
+            for batch in super(LazyUnion, self).iter_batches(attrs, batch_size, mindate, maxdate):
+                yield batch
+            return
+
+        timestamps, deltas = [], [[] for _ in counters]
+        for cluster in self.getMembers():
+            member_columns = read_columns(cluster, counters, batch_size, mindate, maxdate)
+            if member_columns is None:
+                continue
+            member_timestamps, member_values = member_columns
+            timestamps.append(member_timestamps)
+            for values, counter_deltas in zip(member_values, deltas):
+                counter_deltas.append(np.diff(values, prepend=0))
+        if not timestamps:
+            return
+
+        timestamps = np.concatenate(timestamps)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        last = np.append(timestamps[1:] != timestamps[:-1], True)
+        if mindate is not None:
+            last &= timestamps >= to_timestamp(mindate)
+        timestamps = timestamps[last]
+        values = dict(
+            (counter, np.cumsum(np.concatenate(counter_deltas)[order])[last])
+            for counter, counter_deltas in zip(counters, deltas))
+        columns = _derive_columns(individual_class, attrs, values, len(timestamps))
+        for start in range(0, len(timestamps), batch_size):
+            yield (
+                timestamps[start:start + batch_size],
+                tuple(column[start:start + batch_size] for column in columns))
+
+    def resample(self, freq, attrs, how="last", mindate=None, maxdate=None,
+                 batch_size=BATCH_SIZE):
+        attrs = list(attrs)
+        individual_class, counters = self._getCounters(attrs)
+        if counters is None or how != "last":
+            return super(LazyUnion, self).resample(
+                freq, attrs, how, mindate, maxdate, batch_size)
+
+        steps = [
+            read_columns(cluster, counters, batch_size, mindate, maxdate)
+            for cluster in self.getMembers()]
+        timestamps, columns = _resample(
+            [step for step in steps if step is not None], freq, mindate, len(counters))
+        values = dict(zip(counters, columns))
+        columns = _derive_columns(individual_class, attrs, values, len(timestamps))
+        return (timestamps, tuple(columns))
+
+    def instrument(self, statistics, mindate=None, maxdate=None):
+        node_statistics = statistics.setdefault(id(self), EvaluationStatistics())
+        members = self.getMembers()
+        seeds = [cluster._before(mindate) for cluster in members]
+        samples = [cluster.instrument(statistics, mindate, maxdate) for cluster in members]
+        return _timed(merge_samples(samples, seeds, node_statistics), node_statistics)
+
+    def _depth(self):
+        """Returns the depth of the nested unions in the lazy union.
+
+        Returns
+        -------
+        int
+            The depth of the nested unions in the lazy union.
+        """
+        depth = 0
+        clusters = [(1, cluster) for cluster in self.clusters]
+        while clusters:
+            cluster_depth, cluster = clusters.pop()
+            if isinstance(cluster, NamedCluster):
+                clusters.append((cluster_depth, cluster._cluster))
+            elif isinstance(cluster, LazyUnion):
+                clusters.extend((cluster_depth + 1, member) for member in cluster.clusters)
             else:
-                current_yield = first_individual
-            individuals[first_individual_index] = first_individual
-
-            if previous_yield is None:  # Squash together equivalent individuals.
-                previous_yield = current_yield
-            if current_yield > previous_yield:
-                previous_yield = current_yield
-                yield future_yield
-            future_yield = current_yield
-        if future_yield:
-            yield future_yield
+                depth = max(depth, cluster_depth)
+        return depth
+
+    def _describe(self):
+        return "%s(depth %d, %d members, %d merged clusters)" % (
+            self.__class__.__name__, self._depth(), len(self.getMembers()), len(self.clusters))
+
+    def _children(self):
+        return self.getMembers()
+
+    def getVariables(self):
+        for cluster in self.getMembers():
+            for variable in cluster.getVariables():
+                yield variable
 
     def __repr__(self):
-        return "%s(%s, %s)" % (self.__class__.__name__, self.first, self.second)
+        return "%s(%s)" % (
+            self.__class__.__name__, ", ".join(repr(cluster) for cluster in self.clusters))
+
+
+class MaterializedCluster(Cluster):
+    """This class represents a cluster after the aggregate random sample has been aggregated.
+
+    The aggregate random sample is stored, and it is only aggregated again when the random sample
+    of a random variable in the cluster has changed since the last aggregation. The materialized
+    cluster subscribes to the random variables in the cluster, so that only the suffix of the
+    aggregate random sample affected by the changes is aggregated again.
+
+    The materialized cluster is thread-safe. The aggregation is serialized by a lock, and the
+    stored aggregate random sample is replaced rather than changed, so that iterators over it
+    remain consistent. The invalidations are guarded by a separate lock, which is never held
+    while another lock is being acquired, so that random samples can be changed while the
+    cluster is being aggregated.
+
+    Parameters
+    ----------
+    cluster : Cluster
+        The cluster to be materialized.
+
+    Attributes
+    ----------
+    cluster : Cluster
+        The materialized cluster.
+    """
+    def __init__(self, cluster):
+        assert isinstance(cluster, Cluster)
+        self.cluster = cluster
+        self._variables = list(cluster.getVariables())
+        self._versions = None
+        self._sample = []
+        self._dates = []
+        self._invalidated_date = None
+        self._invalidated = True
+        self._lock = RLock()
+        self._invalidation_lock = Lock()
+        for variable in self._variables:
+            variable.subscribe(self)
+
+    def invalidate(self, date=None):
+        """Marks a suffix of the aggregate random sample as invalid.
+
+        Parameters
+        ----------
+        date : datetime or None, optional
+            The earliest sample time affected by a change in the random sample of a random
+            variable in the cluster, or None if the entire aggregate random sample is invalid.
+        """
+        with self._invalidation_lock:
+            if date is None:
+                self._invalidated = True
+            elif self._invalidated_date is None or date < self._invalidated_date:
+                self._invalidated_date = date
+
+    def _refresh(self):
+        """Aggregates the invalid suffix of the aggregate random sample if any sample has changed.
+
+        Returns
+        -------
+        (list of .sample.SampledIndividual, list of datetime)
+            The aggregate random sample, and the sample times of the individuals.
+        """
+        with self._lock:
+            versions = [variable.getVersion() for variable in self._variables]
+            if versions == self._versions:
+                return (self._sample, self._dates)
+            with self._invalidation_lock:
+                invalidated, date = self._invalidated, self._invalidated_date
+                self._invalidated, self._invalidated_date = False, None
+            if invalidated or date is None:
+                LOGGER.debug("Materializing cluster %s", self.cluster)
+                sample = list(self.cluster)
+                dates = [individual.getDatetime() for individual in sample]
+            else:
+                LOGGER.debug("Materializing cluster %s since %s", self.cluster, date)
+                index = bisect_left(self._dates, date)
+                sample = self._sample[:index]
+                dates = self._dates[:index]
+                for individual in self.cluster.between(date):
+                    sample.append(individual)
+                    dates.append(individual.getDatetime())
+            self._sample, self._dates = sample, dates
+            self._versions = versions
+            return (sample, dates)
+
+    def __iter__(self):
+        sample, _ = self._refresh()
+        return iter(sample)
+
+    def _before(self, date):
+        sample, dates = self._refresh()
+        index = bisect_left(dates, date) if date is not None else 0
+        return sample[index - 1] if index else None
+
+    def between(self, mindate=None, maxdate=None):
+        sample, dates = self._refresh()
+        start = bisect_left(dates, mindate) if mindate is not None else 0
+        end = bisect_right(dates, maxdate) if maxdate is not None else len(dates)
+        return iter(sample[start:end])
+
+    def _describe(self):
+        return "%s(%d stored individuals)" % (self.__class__.__name__, len(self._sample))
+
+    def _children(self):
+        return [self.cluster]
+
+    def getVariables(self):
+        return iter(self._variables)
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, self.cluster)
 
 
 class NamedCluster(Cluster, NamedEntity):
@@ -134,8 +941,104 @@ class NamedCluster(Cluster, NamedEntity):
     def __iter__(self):
         return self._cluster.__iter__()
 
+    def _before(self, date):
+        return self._cluster._before(date)
+
+    def between(self, mindate=None, maxdate=None):
+        return self._cluster.between(mindate, maxdate)
+
+    def iter_batches(self, attrs, batch_size=BATCH_SIZE, mindate=None, maxdate=None):
+        return self._cluster.iter_batches(attrs, batch_size, mindate, maxdate)
+
+    def resample(self, freq, attrs, how="last", mindate=None, maxdate=None,
+                 batch_size=BATCH_SIZE):
+        return self._cluster.resample(freq, attrs, how, mindate, maxdate, batch_size)
+
+    def instrument(self, statistics, mindate=None, maxdate=None):
+        node_statistics = statistics.setdefault(id(self), EvaluationStatistics())
+        return _timed(self._cluster.instrument(statistics, mindate, maxdate), node_statistics)
+
+    def _children(self):
+        return [self._cluster]
+
+    def getVariables(self):
+        return self._cluster.getVariables()
+
     def getName(self):
         return self._name
 
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, self._name)
+
+
+def optimize(clusters):
+    """Optimizes clusters that will be iterated together.
+
+    Nested unions are flattened, and duplicate random variables are removed. Unions of the same
+    random variables are hash-consed, so that they are represented by a single object. Unions that
+    occur in several of the clusters are materialized, so that they are only aggregated once, and
+    shared by all the clusters that contain them.
+
+    Parameters
+    ----------
+    clusters : iterable of Cluster
+        The clusters to be optimized.
+
+    Returns
+    -------
+    list of Cluster
+        The optimized clusters in the same order. Named clusters retain their names.
+    """
+    cluster_list = list(clusters)
+    for cluster in cluster_list:
+        assert isinstance(cluster, Cluster)
+
+    def subexpressions(cluster):
+        """Returns the key sets, and the members of the unions in a cluster."""
+        unions = [cluster]
+        while unions:
+            union = unions.pop()
+            if isinstance(union, NamedCluster):
+                unions.append(union._cluster)
+            elif isinstance(union, LazyUnion):
+                members = union.getMembers()
+                yield frozenset(member._key() for member in members), members
+                unions.extend(union.clusters)
+
+    occurrences = {}
+    unions = {}
+    for cluster in cluster_list:
+        for keys in set(keys for keys, _ in subexpressions(cluster)):
+            occurrences[keys] = occurrences.get(keys, 0) + 1
+    for cluster in cluster_list:
+        for keys, members in subexpressions(cluster):
+            if occurrences[keys] > 1 and keys not in unions:
+                LOGGER.debug("Sharing a union of %d clusters", len(members))
+                unions[keys] = MaterializedCluster(LazyUnion(*members))
+    shared_keys = sorted(unions.keys(), key=len, reverse=True)
+
+    def optimize_cluster(cluster):
+        """Returns an optimized cluster."""
+        if isinstance(cluster, NamedCluster):
+            named_cluster = cluster
+            while isinstance(cluster, NamedCluster):
+                cluster = cluster._cluster
+            return NamedCluster(named_cluster.getName(), optimize_cluster(cluster))
+        if not isinstance(cluster, LazyUnion):
+            return cluster
+        members = dict((member._key(), member) for member in cluster.getMembers())
+        keys = frozenset(members.keys())
+        if keys in unions:
+            return unions[keys]
+        optimized_members = []
+        for shared_key in shared_keys:
+            if shared_key <= keys and all(key in members for key in shared_key):
+                optimized_members.append(unions[shared_key])
+                for key in shared_key:
+                    del members[key]
+        optimized_members.extend(members.values())
+        if len(optimized_members) == 1:
+            return optimized_members[0]
+        return LazyUnion(*optimized_members)
+
+    return [optimize_cluster(cluster) for cluster in cluster_list]
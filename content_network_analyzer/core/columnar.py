@@ -0,0 +1,828 @@
+"""
+Defines a columnar random sample datatype.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from logging import getLogger
+
+import numpy as np
+
+from .cluster import _derive_columns
+from .packing import _decode_deltas, _decode_runs, _encode_deltas, _encode_runs, slot_fields
+from .sample import BaseSample, SampledIndividual, synchronized
+from .util import from_timestamp, to_timestamp
+
+
+BLOCK_SIZE = 1024
+LOGGER = getLogger(__name__)
+
+
+class ColumnarSample(BaseSample):
+    """This class represents a random sample of a random variable stored in NumPy arrays.
+
+    The sample times are stored in an array of microseconds since the epoch, every counter is
+    stored in an array of integers, and the remaining attributes are stored in lists. The
+    individuals are only constructed when they are accessed. Individuals with the same sample
+    time as an individual in the random sample are not added.
+
+    Note
+    ----
+    The individuals must be instances of a single subclass of SampledIndividual that declares
+    __slots__, and that stores its sample time in the date attribute. The time zones of the
+    sample times must agree.
+
+    Parameters
+    ----------
+    iterable : iterable of SampledIndividual, optional
+        The initial individuals in the random sample.
+    individual_class : type or None, optional
+        The class of the individuals. None if the class of the first added individual.
+    """
+    def __init__(self, iterable=None, individual_class=None):
+        super(ColumnarSample, self).__init__()
+        self._individual_class = None
+        self._size = 0
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._counters = {}
+        self._objects = {}
+        self._tzinfo = None
+        if individual_class is not None:
+            self._setIndividualClass(individual_class)
+        if iterable is not None:
+            self.update(iterable)
+
+    def _setIndividualClass(self, individual_class):
+        """Sets up the columns for a class of individuals.
+
+        Parameters
+        ----------
+        individual_class : type
+            The class of the individuals.
+        """
+        assert issubclass(individual_class, SampledIndividual)
+        assert "__dict__" not in dir(individual_class), \
+            "%s does not declare __slots__" % individual_class.__name__
+        fields = slot_fields(individual_class)
+        assert "date" in fields
+        self._individual_class = individual_class
+        self._counters = {
+            counter: np.empty(0, dtype=np.int64) for counter in individual_class.counters}
+        self._objects = {
+            field: [] for field in fields if field != "date" and field not in self._counters}
+
+    def _reserve(self, size):
+        """Grows the arrays, so that they can hold a number of individuals.
+
+        Parameters
+        ----------
+        size : int
+            The number of individuals.
+        """
+        capacity = len(self._timestamps)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        self._timestamps = np.resize(self._timestamps, capacity)
+        for counter, values in self._counters.items():
+            self._counters[counter] = np.resize(values, capacity)
+
+    def _insert(self, individual):
+        """Inserts an individual without notifying the subscribers.
+
+        Parameters
+        ----------
+        individual : SampledIndividual
+            The individual.
+
+        Returns
+        -------
+        bool
+            Whether the individual was inserted.
+        """
+        if self._individual_class is None:
+            self._setIndividualClass(type(individual))
+        assert isinstance(individual, self._individual_class)
+        date = individual.getDatetime()
+        assert isinstance(date, datetime)
+        if not self._size:
+            self._tzinfo = date.tzinfo
+        assert (date.tzinfo is None) == (self._tzinfo is None)
+        timestamp = to_timestamp(date)
+
+        size = self._size
+        if size and timestamp <= self._timestamps[size - 1]:
+            index = int(np.searchsorted(self._timestamps[:size], timestamp))
+            if self._timestamps[index] == timestamp:
+                return False
+        else:
+            index = size
+        self._reserve(size + 1)
+        self._timestamps[index + 1:size + 1] = self._timestamps[index:size]
+        self._timestamps[index] = timestamp
+        for counter, values in self._counters.items():
+            values[index + 1:size + 1] = values[index:size]
+            values[index] = getattr(individual, counter)
+        for field, values in self._objects.items():
+            values.insert(index, getattr(individual, field))
+        self._size += 1
+        return True
+
+    def _merge(self, values):
+        """Inserts individuals with a single sorted merge without notifying the subscribers.
+
+        Parameters
+        ----------
+        values : list of SampledIndividual
+            The individuals sorted in the ascending order of sample time.
+
+        Returns
+        -------
+        datetime or None
+            The sample time of the earliest inserted individual, or None if no individual was
+            inserted.
+        """
+        if not values:
+            return None
+        if self._individual_class is None:
+            self._setIndividualClass(type(values[0]))
+        if not self._size:
+            self._tzinfo = values[0].getDatetime().tzinfo
+        for value in values:
+            assert isinstance(value, self._individual_class)
+            assert (value.getDatetime().tzinfo is None) == (self._tzinfo is None)
+        timestamps = np.array(
+            [to_timestamp(value.getDatetime()) for value in values], dtype=np.int64)
+
+        size = self._size
+        existing = self._timestamps[:size]
+        keep = np.ones(len(values), dtype=bool)
+        keep[1:] = timestamps[1:] != timestamps[:-1]
+        if size:
+            positions = np.minimum(np.searchsorted(existing, timestamps), size - 1)
+            keep &= existing[positions] != timestamps
+        if not keep.any():
+            return None
+        values = [value for value, kept in zip(values, keep) if kept]
+        timestamps = timestamps[keep]
+        counters = {
+            counter: np.array([getattr(value, counter) for value in values], dtype=np.int64)
+            for counter in self._counters}
+
+        if not size or timestamps[0] > existing[-1]:
+            self._reserve(size + len(values))
+            self._timestamps[size:size + len(values)] = timestamps
+            for counter, column in counters.items():
+                self._counters[counter][size:size + len(values)] = column
+            for field, column in self._objects.items():
+                column.extend(getattr(value, field) for value in values)
+        else:
+            positions = np.searchsorted(existing, timestamps, "right")
+            self._timestamps = np.insert(existing, positions, timestamps)
+            for counter, column in counters.items():
+                self._counters[counter] = np.insert(
+                    self._counters[counter][:size], positions, column)
+            for field, column in self._objects.items():
+                merged, start = [], 0
+                for position, value in zip(positions.tolist(), values):
+                    merged.extend(column[start:position])
+                    merged.append(getattr(value, field))
+                    start = position
+                merged.extend(column[start:size])
+                self._objects[field] = merged
+        self._size = size + len(values)
+        return values[0].getDatetime()
+
+    def _build(self, index):
+        """Constructs the individual at an index without associating it with a random variable.
+
+        Parameters
+        ----------
+        index : int
+            A non-negative index.
+
+        Returns
+        -------
+        SampledIndividual
+            The individual.
+        """
+        individual = self._individual_class.__new__(self._individual_class)
+        individual.date = from_timestamp(self._timestamps[index], self._tzinfo)
+        for counter, values in self._counters.items():
+            setattr(individual, counter, int(values[index]))
+        for field, values in self._objects.items():
+            setattr(individual, field, values[index])
+        return individual
+
+    def _delete(self, indices):
+        """Deletes individuals without notifying the subscribers.
+
+        Parameters
+        ----------
+        indices : sequence of int
+            Non-negative indices of the individuals.
+        """
+        size = self._size
+        keep = np.ones(size, dtype=bool)
+        keep[indices] = False
+        remaining = int(keep.sum())
+        self._timestamps[:remaining] = self._timestamps[:size][keep]
+        for values in self._counters.values():
+            values[:remaining] = values[:size][keep]
+        for field, values in self._objects.items():
+            self._objects[field] = [value for value, kept in zip(values, keep) if kept]
+        self._size = remaining
+
+    def _copy(self, start=0, end=None):
+        """Copies a slice of individuals into a new columnar random sample.
+
+        Parameters
+        ----------
+        start : int, optional
+            The index of the first individual in the slice.
+        end : int or None, optional
+            The index after the last individual in the slice. None if the slice extends to the
+            end of the random sample.
+
+        Returns
+        -------
+        ColumnarSample
+            The new columnar random sample.
+        """
+        start, end, _ = slice(start, end).indices(self._size)
+        end = max(start, end)
+        sample = ColumnarSample(individual_class=self._individual_class)
+        sample._size = end - start
+        sample._tzinfo = self._tzinfo
+        sample._timestamps = self._timestamps[start:end].copy()
+        sample._counters = {
+            counter: values[start:end].copy() for counter, values in self._counters.items()}
+        sample._objects = {field: values[start:end] for field, values in self._objects.items()}
+        return sample
+
+    def _iterate(self, reverse=False):
+        """Produces the individuals.
+
+        Parameters
+        ----------
+        reverse : bool, optional
+            Whether the individuals are produced in the descending order of sample time.
+
+        Yields
+        ------
+        SampledIndividual
+            The individuals.
+        """
+        indices = range(self._size)
+        for index in (reversed(indices) if reverse else indices):
+            yield self._build(index)
+
+    def __len__(self):
+        return self._size
+
+    @synchronized
+    def __iter__(self):
+        return self._copy()._iterate()
+
+    @synchronized
+    def __reversed__(self):
+        return self._copy()._iterate(reverse=True)
+
+    @synchronized
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(position) for position in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("sample index out of range")
+        return self._build(index)
+
+    @synchronized
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self._size))
+        else:
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("sample index out of range")
+            indices = range(index, index + 1)
+        if indices:
+            date = from_timestamp(self._timestamps[min(indices)], self._tzinfo)
+            self._delete(indices)
+            self._modified(date)
+
+    @synchronized
+    def __contains__(self, individual):
+        if not self._size or not isinstance(individual, self._individual_class):
+            return False
+        index = self.bisect_key_left(individual.getDatetime())
+        return index < self._size and self._build(index) == individual
+
+    def __reduce__(self):
+        return (type(self), (list(self), self._individual_class))
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self))
+
+    @synchronized
+    def bisect_key_left(self, date):
+        return int(np.searchsorted(self._timestamps[:self._size], to_timestamp(date), "left"))
+
+    @synchronized
+    def bisect_key_right(self, date):
+        return int(np.searchsorted(self._timestamps[:self._size], to_timestamp(date), "right"))
+
+    @synchronized
+    def irange_key(self, min_key=None, max_key=None):
+        start = self.bisect_key_left(min_key) if min_key is not None else 0
+        end = self.bisect_key_right(max_key) if max_key is not None else self._size
+        return self._copy(start, end)._iterate()
+
+    @synchronized
+    def add(self, value):
+        if self._insert(value):
+            self._modified(value.getDatetime())
+
+    @synchronized
+    def discard(self, value):
+        if value in self:
+            del self[self.bisect_key_left(value.getDatetime())]
+
+    @synchronized
+    def remove(self, value):
+        if value not in self:
+            raise KeyError(value)
+        self.discard(value)
+
+    @synchronized
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    @synchronized
+    def clear(self):
+        self._delete(range(self._size))
+        self._modified(None)
+
+    @synchronized
+    def getColumns(self, attrs, start=0, end=None):
+        attrs = list(attrs)
+        start, end, _ = slice(start, end).indices(self._size)
+        size = max(end - start, 0)
+        if self._individual_class is None or not all(
+                attr in self._counters or attr in self._objects
+                or attr in self._individual_class.ratios for attr in attrs):
+            return (np.empty(0, dtype=np.int64), tuple(np.empty(0) for attr in attrs))
+        timestamps = self._timestamps[start:end].copy()
+        values = {counter: values[start:end].copy() for counter, values in self._counters.items()}
+        columns = []
+        for attr in attrs:
+            if attr in self._objects:
+                columns.append(np.array(self._objects[attr][start:end]))
+            else:
+                columns.extend(_derive_columns(self._individual_class, [attr], values, size))
+        return (timestamps, tuple(columns))
+
+
+class _Block(object):
+    """This class represents a compressed block of a columnar random sample.
+
+    Parameters
+    ----------
+    sample : ColumnarSample
+        A non-empty columnar random sample.
+    size : int or None, optional
+        The number of leading individuals of the columnar random sample stored in the block.
+        None if all individuals.
+
+    Attributes
+    ----------
+    size : int
+        The number of individuals in the block.
+    last : int
+        The sample time of the last individual in the block in microseconds since the epoch.
+    """
+    __slots__ = ("size", "last", "_timestamps", "_counters", "_objects")
+
+    def __init__(self, sample, size=None):
+        size = sample._size if size is None else size
+        assert 0 < size <= sample._size
+        self.size = size
+        self.last = int(sample._timestamps[size - 1])
+        self._timestamps = _encode_deltas(sample._timestamps[:size], 2)
+        self._counters = {
+            counter: _encode_deltas(values[:size], 1)
+            for counter, values in sample._counters.items()}
+        self._objects = {
+            field: _encode_runs(values[:size]) for field, values in sample._objects.items()}
+
+    def decode(self, individual_class, tzinfo):
+        """Decodes the block into a columnar random sample.
+
+        Parameters
+        ----------
+        individual_class : type
+            The class of the individuals.
+        tzinfo : tzinfo or None
+            The time zone of the sample times.
+
+        Returns
+        -------
+        ColumnarSample
+            The columnar random sample.
+        """
+        sample = ColumnarSample(individual_class=individual_class)
+        sample._size = self.size
+        sample._tzinfo = tzinfo
+        sample._timestamps = _decode_deltas(self._timestamps)
+        sample._counters = {
+            counter: _decode_deltas(encoded) for counter, encoded in self._counters.items()}
+        sample._objects = {
+            field: _decode_runs(encoded) for field, encoded in self._objects.items()}
+        return sample
+
+
+class CompressedSample(BaseSample):
+    """This class represents a random sample of a random variable stored in compressed blocks.
+
+    The individuals are appended to an uncompressed ColumnarSample. Whenever it holds more than
+    block_size individuals, the leading block_size individuals are compressed into a block. In
+    a block, the sample times are encoded as differences of differences, the counters are
+    encoded as differences, both in the narrowest integer type that can represent them, and
+    the remaining attributes are encoded as runs of identical objects. Blocks are decoded one
+    at a time during iteration, and the latest individuals are never compressed.
+
+    Note
+    ----
+    The individuals are subject to the same restrictions as in ColumnarSample.
+
+    Parameters
+    ----------
+    iterable : iterable of SampledIndividual, optional
+        The initial individuals in the random sample.
+    individual_class : type or None, optional
+        The class of the individuals. None if the class of the first added individual.
+    block_size : int, optional
+        The number of individuals in a block.
+    """
+    def __init__(self, iterable=None, individual_class=None, block_size=BLOCK_SIZE):
+        assert isinstance(block_size, int) and block_size > 0
+        super(CompressedSample, self).__init__()
+        self._block_size = block_size
+        self._blocks = []
+        self._lasts = []
+        self._offsets = [0]
+        self._tail = ColumnarSample(individual_class=individual_class)
+        self._tzinfo = None
+        self._decoded = None
+        if iterable is not None:
+            self.update(iterable)
+
+    def _reindex(self):
+        """Recomputes the positions of the blocks after a change, and drops the decoded block.
+        """
+        self._lasts = [block.last for block in self._blocks]
+        self._offsets = [0]
+        for block in self._blocks:
+            self._offsets.append(self._offsets[-1] + block.size)
+        self._decoded = None
+
+    def _decode(self, index):
+        """Decodes a block, or returns the uncompressed individuals.
+
+        Parameters
+        ----------
+        index : int or None
+            The index of the block, or None for the uncompressed individuals.
+
+        Returns
+        -------
+        ColumnarSample
+            The individuals in the block.
+        """
+        if index is None:
+            return self._tail
+        if self._decoded is None or self._decoded[0] != index:
+            individual_class = self._tail._individual_class
+            self._decoded = (index, self._blocks[index].decode(individual_class, self._tzinfo))
+        return self._decoded[1]
+
+    def _store(self, index, sample):
+        """Compresses the individuals in a block after a change.
+
+        Parameters
+        ----------
+        index : int or None
+            The index of the block, or None for the uncompressed individuals.
+        sample : ColumnarSample
+            The changed individuals in the block.
+        """
+        if index is None:
+            return
+        if sample._size:
+            self._blocks[index] = _Block(sample)
+        else:
+            del self._blocks[index]
+        self._reindex()
+
+    def _locate(self, index):
+        """Locates the individual at an index.
+
+        Parameters
+        ----------
+        index : int
+            A non-negative index.
+
+        Returns
+        -------
+        (int or None, int)
+            The index of the block, or None for the uncompressed individuals, and the index of
+            the individual in the block.
+        """
+        if index >= self._offsets[-1]:
+            return (None, index - self._offsets[-1])
+        block = bisect_right(self._offsets, index) - 1
+        return (block, index - self._offsets[block])
+
+    def _parts(self, start=0, end=None):
+        """Produces the blocks that overlap a slice of individuals.
+
+        Parameters
+        ----------
+        start : int, optional
+            The index of the first individual in the slice.
+        end : int or None, optional
+            The index after the last individual in the slice. None if the slice extends to the
+            end of the random sample.
+
+        Yields
+        ------
+        (ColumnarSample, int, int)
+            The individuals in a block, and the indices of the first individual, and after the
+            last individual of the slice in the block.
+        """
+        end = len(self) if end is None else end
+        for index in range(len(self._blocks)):
+            offset, size = self._offsets[index], self._blocks[index].size
+            if offset < end and start < offset + size:
+                yield (self._decode(index), max(start - offset, 0), min(end - offset, size))
+        offset = self._offsets[-1]
+        if end > offset:
+            yield (self._tail, max(start - offset, 0), end - offset)
+
+    def _insert(self, value):
+        """Inserts an individual without notifying the subscribers.
+
+        Parameters
+        ----------
+        value : SampledIndividual
+            An individual.
+
+        Returns
+        -------
+        bool
+            Whether the individual was inserted.
+        """
+        timestamp = to_timestamp(value.getDatetime())
+        if not self._blocks or timestamp > self._lasts[-1]:
+            if not self._tail._insert(value):
+                return False
+            if len(self._tail) > self._block_size:
+                self._tzinfo = self._tail._tzinfo
+                self._blocks.append(_Block(self._tail, self._block_size))
+                self._tail._delete(range(self._block_size))
+                self._reindex()
+            return True
+        index = bisect_left(self._lasts, timestamp)
+        sample = self._decode(index)
+        if not sample._insert(value):
+            return False
+        self._store(index, sample)
+        return True
+
+    def _merge(self, values):
+        """Inserts individuals with a single sorted merge without notifying the subscribers.
+
+        The individuals sampled after the last block are merged into the uncompressed
+        individuals, which are then compressed into as many blocks as they fill, and the
+        remaining individuals are merged into their blocks, decoding every block at most once.
+
+        Parameters
+        ----------
+        values : list of SampledIndividual
+            The individuals sorted in the ascending order of sample time.
+
+        Returns
+        -------
+        datetime or None
+            The sample time of the earliest inserted individual, or None if no individual was
+            inserted.
+        """
+        timestamps = [to_timestamp(value.getDatetime()) for value in values]
+        split = bisect_right(timestamps, self._lasts[-1]) if self._blocks else 0
+        dates = []
+
+        groups = {}
+        for timestamp, value in zip(timestamps[:split], values[:split]):
+            groups.setdefault(bisect_left(self._lasts, timestamp), []).append(value)
+        for index, group in sorted(groups.items()):
+            sample = self._decode(index)
+            date = sample._merge(group)
+            if date is not None:
+                dates.append(date)
+                self._store(index, sample)
+
+        date = self._tail._merge(values[split:])
+        if date is not None:
+            dates.append(date)
+            blocks = (len(self._tail) - 1) // self._block_size
+            if blocks:
+                self._tzinfo = self._tail._tzinfo
+                for block in range(blocks):
+                    start = block * self._block_size
+                    self._blocks.append(
+                        _Block(self._tail._copy(start, start + self._block_size)))
+                self._tail._delete(range(blocks * self._block_size))
+                self._reindex()
+        return min(dates) if dates else None
+
+    def _delete(self, indices):
+        """Deletes individuals without notifying the subscribers.
+
+        Parameters
+        ----------
+        indices : sequence of int
+            Non-negative indices of the individuals.
+        """
+        positions = {}
+        for position in indices:
+            block, position = self._locate(position)
+            positions.setdefault(block, []).append(position)
+        for block in sorted(
+                positions, key=lambda block: -1 if block is None else block, reverse=True):
+            sample = self._decode(block)
+            sample._delete(positions[block])
+            self._store(block, sample)
+
+    def _iterate(self, start=0, end=None):
+        """Produces the individuals in a slice as they are now.
+
+        The blocks are immutable, and the uncompressed individuals are copied, so that the
+        individuals can be decoded without holding the lock.
+
+        Parameters
+        ----------
+        start : int, optional
+            The index of the first individual in the slice.
+        end : int or None, optional
+            The index after the last individual in the slice. None if the slice extends to the
+            end of the random sample.
+
+        Returns
+        -------
+        iterator of SampledIndividual
+            The individuals.
+        """
+        end = len(self) if end is None else end
+        individual_class, tzinfo = self._tail._individual_class, self._tzinfo
+        parts = []
+        for index, block in enumerate(self._blocks):
+            offset = self._offsets[index]
+            if offset < end and start < offset + block.size:
+                parts.append((block, max(start - offset, 0), min(end - offset, block.size)))
+        offset = self._offsets[-1]
+        if end > offset:
+            tail = self._tail._copy(max(start - offset, 0), end - offset)
+            parts.append((tail, 0, len(tail)))
+
+        def iterate():
+            for part, first, last in parts:
+                if isinstance(part, _Block):
+                    part = part.decode(individual_class, tzinfo)
+                for index in range(first, last):
+                    yield part._build(index)
+        return iterate()
+
+    def __len__(self):
+        return self._offsets[-1] + len(self._tail)
+
+    @synchronized
+    def __iter__(self):
+        return self._iterate()
+
+    @synchronized
+    def __reversed__(self):
+        return reversed(list(self._iterate()))
+
+    @synchronized
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, end, step = index.indices(len(self))
+            if step != 1:
+                return [self[position] for position in range(start, end, step)]
+            return [
+                sample._build(position) for sample, first, last in self._parts(start, end)
+                for position in range(first, last)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sample index out of range")
+        block, position = self._locate(index)
+        return self._decode(block)._build(position)
+
+    @synchronized
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+        else:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("sample index out of range")
+            indices = range(index, index + 1)
+        if not indices:
+            return
+        date = self[min(indices)].getDatetime()
+        self._delete(indices)
+        self._modified(date)
+
+    @synchronized
+    def __contains__(self, individual):
+        if not len(self) or not isinstance(individual, SampledIndividual):
+            return False
+        index = self.bisect_key_left(individual.getDatetime())
+        return index < len(self) and self[index] == individual
+
+    def __reduce__(self):
+        return (
+            type(self), (list(self), self._tail._individual_class, self._block_size))
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self))
+
+    @synchronized
+    def bisect_key_left(self, date):
+        block = bisect_left(self._lasts, to_timestamp(date))
+        if block == len(self._blocks):
+            return self._offsets[-1] + self._tail.bisect_key_left(date)
+        return self._offsets[block] + self._decode(block).bisect_key_left(date)
+
+    @synchronized
+    def bisect_key_right(self, date):
+        block = bisect_right(self._lasts, to_timestamp(date))
+        if block == len(self._blocks):
+            return self._offsets[-1] + self._tail.bisect_key_right(date)
+        return self._offsets[block] + self._decode(block).bisect_key_right(date)
+
+    @synchronized
+    def irange_key(self, min_key=None, max_key=None):
+        start = self.bisect_key_left(min_key) if min_key is not None else 0
+        end = self.bisect_key_right(max_key) if max_key is not None else len(self)
+        return self._iterate(start, end)
+
+    @synchronized
+    def add(self, value):
+        if self._insert(value):
+            self._modified(value.getDatetime())
+
+    @synchronized
+    def discard(self, value):
+        if value in self:
+            del self[self.bisect_key_left(value.getDatetime())]
+
+    @synchronized
+    def remove(self, value):
+        if value not in self:
+            raise KeyError(value)
+        self.discard(value)
+
+    @synchronized
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    @synchronized
+    def clear(self):
+        self._blocks = []
+        self._tail._delete(range(len(self._tail)))
+        self._reindex()
+        self._modified(None)
+
+    @synchronized
+    def getColumns(self, attrs, start=0, end=None):
+        attrs = list(attrs)
+        start, end, _ = slice(start, end).indices(len(self))
+        batches = [
+            sample.getColumns(attrs, first, last)
+            for sample, first, last in self._parts(start, end)]
+        if not batches:
+            return self._tail.getColumns(attrs, 0, 0)
+        timestamps = np.concatenate([timestamps for timestamps, _ in batches])
+        columns = tuple(
+            np.concatenate([columns[index] for _, columns in batches])
+            for index in range(len(attrs)))
+        return (timestamps, columns)
@@ -0,0 +1,427 @@
+"""
+Defines the declarative extraction of fields from HTML documents.
+"""
+
+from html.parser import HTMLParser
+from logging import getLogger
+import re
+
+from .parsing import get_parser, parse_html
+
+
+CHUNK_SIZE = 4096
+LOGGER = getLogger(__name__)
+REQUIRED = object()
+VOID_ELEMENTS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+    "track", "wbr"])
+_SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[\w-]+)?(?P<classes>(?:\.[\w-]+)*)(?P<attrs>(?:\[[\w:-]+(?:="[^"]*")?\])*)$')
+_ATTRIBUTE_SELECTOR = re.compile(r'\[([\w:-]+)(?:="([^"]*)")?\]')
+
+
+class _SimpleSelector(object):
+    """This class represents a CSS selector of a single element.
+
+    Parameters
+    ----------
+    selector : str
+        A type selector optionally followed by class selectors, and attribute selectors, such as
+        span.reads, or meta[property="og:title"].
+    """
+    def __init__(self, selector):
+        match = _SIMPLE_SELECTOR.match(selector)
+        assert match and selector, "Unsupported selector %r" % selector
+        self.selector = selector
+        self._tag = match.group("tag")
+        self._classes = set(match.group("classes").split(".")[1:])
+        self._attrs = _ATTRIBUTE_SELECTOR.findall(match.group("attrs"))
+
+    def matches(self, tag, attrs):
+        """Returns whether the selector matches an element.
+
+        Parameters
+        ----------
+        tag : str
+            The name of the element.
+        attrs : dict of (str, str or None)
+            The attributes of the element.
+
+        Returns
+        -------
+        bool
+            Whether the selector matches the element.
+        """
+        if self._tag is not None and self._tag != tag:
+            return False
+        if self._classes and not self._classes <= set((attrs.get("class") or "").split()):
+            return False
+        for attr, value in self._attrs:
+            if attr not in attrs or (value and attrs[attr] != value):
+                return False
+        return True
+
+
+class Field(object):
+    """This class represents the specification of a field extracted from an HTML document.
+
+    Parameters
+    ----------
+    selector : str
+        Simple selectors separated by whitespace. Every simple selector but the last selects
+        the first matching element within the element selected by the previous simple selector,
+        and the last simple selector selects the matching elements within. See _SimpleSelector.
+    attr : str or None, optional
+        The name of the attribute whose value is extracted. None if the text of the elements is
+        extracted.
+    text : re.Pattern or None, optional
+        A regular expression that the extracted values must contain. None if unrestricted.
+    many : bool, optional
+        Whether the values of all matching elements are extracted, rather than the value of the
+        first matching element.
+    converter : callable or None, optional
+        A function applied to every extracted value. None if the values are not converted.
+    default : object, optional
+        The value of the field if no element matches. REQUIRED if the field is required.
+    stop : str or None, optional
+        A simple selector of the element at whose start the single pass stops looking for the
+        field, such as body for the meta tags in the head of an HTML document. None if the
+        single pass looks for the field until the end of the HTML document. If the single pass
+        stops before it finds the field, the HTML parser looks for the field in the entire HTML
+        document.
+    """
+    def __init__(self, selector, attr=None, text=None, many=False, converter=None,
+                 default=REQUIRED, stop=None):
+        self.selector = selector
+        self.scopes = [_SimpleSelector(part) for part in selector.split()]
+        self.target = self.scopes.pop()
+        self.attr = attr
+        self.text = text
+        self.many = many
+        self.converter = converter
+        self.default = default
+        self.stop = _SimpleSelector(stop) if stop is not None else None
+
+    def accepts(self, value):
+        """Returns whether an extracted value satisfies the regular expression of the field.
+
+        Parameters
+        ----------
+        value : str or None
+            An extracted value. None if the element lacks the attribute.
+
+        Returns
+        -------
+        bool
+            Whether the value satisfies the regular expression.
+        """
+        return value is not None and (self.text is None or bool(self.text.search(value)))
+
+    def select(self, document):
+        """Extracts the values of the field from a parsed HTML document.
+
+        Parameters
+        ----------
+        document : .parsing.HTMLElement
+            The parsed HTML document.
+
+        Returns
+        -------
+        list of str
+            The extracted values.
+        """
+        scope = document
+        for selector in self.scopes:
+            scope = scope.select_one(selector.selector)
+            if scope is None:
+                return []
+        values = []
+        for element in scope.select(self.target.selector):
+            value = element.text if self.attr is None else element.get(self.attr)
+            if self.accepts(value):
+                values.append(value)
+                if not self.many:
+                    break
+        return values
+
+
+class Extractor(object):
+    """This class represents a compiled set of fields extracted from HTML documents.
+
+    With the html.parser parser, or on request, the fields are extracted in a single pass over
+    the HTML document, which is read incrementally, and only until every field has been
+    extracted. Since the single pass is built on the parser of the Python standard library, it
+    is skipped by default with the faster lxml parsers. When a required field is missing after
+    the pass, or when the HTML document is opened in binary mode, the HTML document is parsed by
+    the HTML parser, and the fields are selected from the parsed document, so that the extracted
+    values never depend on the single pass.
+
+    Parameters
+    ----------
+    fields : dict of (str, Field)
+        The fields keyed by their names.
+
+    Examples
+    --------
+    >>> extractor = Extractor({
+    ...     "title": Field('meta[property="og:title"]', attr="content"),
+    ...     "views": Field("div.watch-view-count", converter=parse_int)})
+    """
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        for field in self.fields.values():
+            assert isinstance(field, Field)
+
+    def extract(self, f, parser=None, streaming=None, chunk_size=CHUNK_SIZE):
+        """Extracts the fields from an HTML document.
+
+        Parameters
+        ----------
+        f : file-like readable object
+            The HTML document.
+        parser : str or None, optional
+            The name of the HTML parser, which parses the HTML document unless the fields are
+            extracted in a single pass. None if the default parser. See
+            .parsing.set_default_parser.
+        streaming : bool or None, optional
+            Whether the fields are first extracted in a single pass. None if the fields are
+            extracted in a single pass only with the html.parser parser.
+        chunk_size : int, optional
+            The number of characters read at a time during the single pass.
+
+        Returns
+        -------
+        dict of (str, object)
+            The converted values of the fields keyed by their names.
+        """
+        values = None
+        if streaming is None:
+            streaming = get_parser(parser) == "html.parser"
+        if streaming:
+            values, f = self._stream(f, chunk_size)
+        if values is None:
+            document = parse_html(f, parser)
+            values = dict((name, field.select(document)) for name, field in self.fields.items())
+
+        result = {}
+        for name, field in self.fields.items():
+            field_values = values[name]
+            if field.converter is not None:
+                field_values = [field.converter(value) for value in field_values]
+            if field.many:
+                result[name] = field_values
+            elif field_values:
+                result[name] = field_values[0]
+            else:
+                assert field.default is not REQUIRED, "%s not found" % field.selector
+                result[name] = field.default
+        return result
+
+    def _stream(self, f, chunk_size):
+        """Extracts the fields in a single pass over an HTML document.
+
+        Parameters
+        ----------
+        f : file-like readable object
+            The HTML document.
+        chunk_size : int
+            The number of characters read at a time.
+
+        Returns
+        -------
+        (dict of (str, list of str) or None, file-like readable object)
+            The extracted values of the fields keyed by their names, or None if a required
+            field is missing, or if the single pass stopped looking for a field before it found
+            the field, and a file-like readable object with the entire HTML document.
+        """
+        pass_ = _SinglePass(self.fields)
+        chunks = []
+        while not pass_.done:
+            chunk = f.read(chunk_size)
+            if not chunk or not isinstance(chunk, str):
+                if chunk:
+                    chunks.append(chunk)
+                    pass_ = None
+                break
+            chunks.append(chunk)
+            pass_.feed(chunk)
+        if pass_ is not None and not pass_.done:
+            pass_.close()
+        f = _Replay(chunks, f)
+        if pass_ is None:
+            return (None, f)
+        LOGGER.debug("Extracted %d fields from %d chunks", len(self.fields), len(chunks))
+        for name, field in self.fields.items():
+            if not pass_.values[name] and (field.default is REQUIRED or name in pass_.stopped):
+                LOGGER.debug("%s not found in a single pass", field.selector)
+                return (None, f)
+        return (pass_.values, f)
+
+
+class _SinglePass(HTMLParser):
+    """This class represents a single pass that extracts fields from a stream of HTML.
+
+    The open elements are tracked on a stack, void elements are never opened, and an end tag
+    closes all elements up to the latest open element with the same name.
+
+    Parameters
+    ----------
+    fields : dict of (str, Field)
+        The fields keyed by their names.
+
+    Attributes
+    ----------
+    values : dict of (str, list of str)
+        The extracted values of the fields keyed by their names.
+    done : bool
+        Whether all fields have been extracted.
+    stopped : set of str
+        The names of the fields that the single pass stopped looking for.
+    """
+    def __init__(self, fields):
+        super(_SinglePass, self).__init__()
+        self.fields = fields
+        self.values = dict((name, []) for name in fields)
+        self._stack = []
+        self._scopes = dict((name, []) for name in fields)
+        self._complete = set()
+        self.stopped = set()
+        self._captures = []
+        self.done = not fields
+
+    def _start(self, tag, attrs):
+        """Processes the start of an element.
+
+        Parameters
+        ----------
+        tag : str
+            The name of the element.
+        attrs : list of (str, str or None)
+            The attributes of the element.
+
+        Returns
+        -------
+        int
+            The depth of the element.
+        """
+        attrs = dict(attrs)
+        depth = len(self._stack) + 1
+        for name, field in self.fields.items():
+            if name in self._complete:
+                continue
+            if field.stop is not None and field.stop.matches(tag, attrs):
+                self.stopped.add(name)
+                self._completed(name)
+                continue
+            scopes = self._scopes[name]
+            if len(scopes) < len(field.scopes):
+                if field.scopes[len(scopes)].matches(tag, attrs):
+                    scopes.append(depth)
+            elif field.target.matches(tag, attrs):
+                if field.attr is None:
+                    self._captures.append((name, depth, []))
+                else:
+                    self._extracted(name, attrs.get(field.attr))
+        return depth
+
+    def _end(self, depth):
+        """Processes the end of the element at a depth.
+
+        Parameters
+        ----------
+        depth : int
+            The depth of the element.
+        """
+        while self._captures and self._captures[-1][1] == depth:
+            name, _, chunks = self._captures.pop()
+            self._extracted(name, "".join(chunks))
+        for name, scopes in self._scopes.items():
+            if scopes and scopes[-1] == depth:
+                self._completed(name)
+
+    def _extracted(self, name, value):
+        """Stores an extracted value of a field.
+
+        Parameters
+        ----------
+        name : str
+            The name of the field.
+        value : str or None
+            The extracted value. None if the element lacks the attribute.
+        """
+        field = self.fields[name]
+        if name in self._complete or not field.accepts(value):
+            return
+        self.values[name].append(value)
+        if not field.many:
+            self._completed(name)
+
+    def _completed(self, name):
+        """Marks a field as completely extracted.
+
+        Parameters
+        ----------
+        name : str
+            The name of the field.
+        """
+        self._complete.add(name)
+        self.done = len(self._complete) == len(self.fields)
+
+    def handle_starttag(self, tag, attrs):
+        depth = self._start(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._end(depth)
+        else:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._end(self._start(tag, attrs))
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        while True:
+            depth = len(self._stack)
+            if self._stack.pop() == tag:
+                self._end(depth)
+                break
+            self._end(depth)
+
+    def handle_data(self, data):
+        for _, _, chunks in self._captures:
+            chunks.append(data)
+
+    def close(self):
+        super(_SinglePass, self).close()
+        while self._stack:
+            depth = len(self._stack)
+            self._stack.pop()
+            self._end(depth)
+        self.done = True
+
+
+class _Replay(object):
+    """This class represents a file-like readable object that replays read chunks.
+
+    Parameters
+    ----------
+    chunks : list of str or bytes
+        The chunks that have been read from a file-like readable object.
+    f : file-like readable object
+        The file-like readable object.
+    """
+    def __init__(self, chunks, f):
+        self._chunks = chunks
+        self._f = f
+
+    def read(self, size=-1):
+        if not self._chunks:
+            return self._f.read(size)
+        content = self._chunks[0][:0].join(self._chunks)
+        self._chunks = []
+        if size is None or size < 0:
+            return content + self._f.read()
+        if len(content) > size:
+            self._chunks = [content[size:]]
+            return content[:size]
+        return content
@@ -0,0 +1,258 @@
+"""
+Defines the packing of individuals into compact arrays.
+"""
+
+from itertools import chain, repeat
+from logging import getLogger
+
+import numpy as np
+
+from .util import from_timestamp, intern_tags, intern_text, to_timestamp
+
+
+LOGGER = getLogger(__name__)
+
+
+def slot_fields(individual_class):
+    """Returns the names of the public slots of a class of individuals.
+
+    Parameters
+    ----------
+    individual_class : type
+        The class of the individuals.
+
+    Returns
+    -------
+    list of str
+        The names of the public slots in the order of declaration from the base classes.
+    """
+    return [
+        field for cls in reversed(individual_class.__mro__)
+        for field in cls.__dict__.get("__slots__", ()) if not field.startswith("_")]
+
+
+def _narrow(values):
+    """Converts integers into the narrowest integer type that can represent them.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Integers.
+
+    Returns
+    -------
+    np.ndarray
+        The integers.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if not len(values) or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(dtype)
+    return values
+
+
+def _encode_deltas(values, order):
+    """Encodes integers as differences of a given order.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Integers.
+    order : int
+        The order of the differences. The first order encodes monotonic counters, and the
+        second order encodes regularly spaced sample times.
+
+    Returns
+    -------
+    (tuple of int, np.ndarray)
+        The leading values of the differences of lower orders, and the differences of the given
+        order in the narrowest integer type.
+    """
+    heads = []
+    for _ in range(order):
+        if len(values):
+            heads.append(int(values[0]))
+        values = np.diff(values)
+    return (tuple(heads), _narrow(values))
+
+
+def _decode_deltas(encoded):
+    """Decodes integers encoded as differences of a given order.
+
+    Parameters
+    ----------
+    encoded : (tuple of int, np.ndarray)
+        The integers encoded by _encode_deltas.
+
+    Returns
+    -------
+    np.ndarray
+        The integers.
+    """
+    heads, values = encoded
+    values = values.astype(np.int64)
+    for head in reversed(heads):
+        values = np.concatenate(([head], head + np.cumsum(values)))
+    return values
+
+
+def _encode_runs(values):
+    """Encodes objects as runs of identical objects.
+
+    Parameters
+    ----------
+    values : list of object
+        Objects.
+
+    Returns
+    -------
+    (tuple of object, np.ndarray)
+        The objects in the runs, and the lengths of the runs.
+    """
+    objects, lengths = [], []
+    for value in values:
+        if objects and objects[-1] is value:
+            lengths[-1] += 1
+        else:
+            objects.append(value)
+            lengths.append(1)
+    return (tuple(objects), _narrow(np.array(lengths, dtype=np.int64)))
+
+
+def _decode_runs(encoded):
+    """Decodes objects encoded as runs of identical objects.
+
+    Parameters
+    ----------
+    encoded : (tuple of object, np.ndarray)
+        The objects encoded by _encode_runs.
+
+    Returns
+    -------
+    list of object
+        The objects.
+    """
+    objects, lengths = encoded
+    return list(chain.from_iterable(
+        repeat(value, int(length)) for value, length in zip(objects, lengths)))
+
+
+def _intern(value):
+    """Interns an attribute value, so that equal texts, and sets of tags are shared.
+
+    Parameters
+    ----------
+    value : object
+        An attribute value.
+
+    Returns
+    -------
+    object
+        The interned attribute value, or the attribute value if it cannot be interned.
+    """
+    if isinstance(value, str):
+        return intern_text(value)
+    if isinstance(value, frozenset) and all(isinstance(tag, str) for tag in value):
+        return intern_tags(value)
+    return value
+
+
+def pack(individuals, exclude=()):
+    """Packs individuals of a single class into compact arrays.
+
+    If the class declares __slots__, and stores its sample time in the date attribute, the
+    sample times are encoded as differences of differences, the counters are encoded as
+    differences, and the remaining attributes are encoded as runs of identical objects, as in
+    the blocks of .columnar.CompressedSample. Otherwise, the states of the individuals are
+    packed.
+
+    Parameters
+    ----------
+    individuals : iterable of .sample.SampledIndividual
+        The individuals sorted in the ascending order of sample time.
+    exclude : iterable of str, optional
+        The names of the attributes that are not packed.
+
+    Returns
+    -------
+    (type, tzinfo or None, dict or list of dict) or None
+        The class of the individuals, the time zone of the sample times, and the encoded
+        attributes, or the states of the individuals. None if there are no individuals.
+    """
+    individuals = list(individuals)
+    if not individuals:
+        return None
+    individual_class = type(individuals[0])
+    exclude = set(exclude)
+    for individual in individuals:
+        assert type(individual) is individual_class
+
+    fields = slot_fields(individual_class)
+    tzinfo = individuals[0].getDatetime().tzinfo
+    if "__dict__" in dir(individual_class) or "date" not in fields or any(
+            (individual.getDatetime().tzinfo is None) != (tzinfo is None)
+            for individual in individuals):
+        states = [
+            dict(
+                (attr, value) for attr, value in individual.__getstate__().items()
+                if attr not in exclude)
+            for individual in individuals]
+        return (individual_class, None, states)
+
+    columns = {"date": _encode_deltas(np.array(
+        [to_timestamp(individual.date) for individual in individuals], dtype=np.int64), 2)}
+    for field in fields:
+        if field in exclude or field == "date":
+            continue
+        values = [getattr(individual, field) for individual in individuals]
+        if field in individual_class.counters:
+            columns[field] = _encode_deltas(np.array(values, dtype=np.int64), 1)
+        else:
+            columns[field] = _encode_runs(values)
+    return (individual_class, tzinfo, columns)
+
+
+def unpack(packed, **values):
+    """Unpacks individuals packed by the pack function.
+
+    Parameters
+    ----------
+    packed : (type, tzinfo or None, dict or list of dict) or None
+        The packed individuals.
+    values : dict of (str, object)
+        The values of the attributes that were not packed.
+
+    Returns
+    -------
+    list of .sample.SampledIndividual
+        The individuals.
+    """
+    if packed is None:
+        return []
+    individual_class, tzinfo, columns = packed
+    individuals = []
+    if isinstance(columns, list):
+        for state in columns:
+            individual = individual_class.__new__(individual_class)
+            individual.__setstate__(dict(state, **values))
+            individuals.append(individual)
+        return individuals
+
+    fields, decoded = [], []
+    for field, encoded in columns.items():
+        fields.append(field)
+        if field == "date":
+            decoded.append([
+                from_timestamp(timestamp, tzinfo) for timestamp in _decode_deltas(encoded)])
+        elif field in individual_class.counters:
+            decoded.append(_decode_deltas(encoded).tolist())
+        else:
+            objects, lengths = encoded
+            objects = tuple(_intern(value) for value in objects)
+            decoded.append(_decode_runs((objects, lengths)))
+    for row in zip(*decoded):
+        individual = individual_class.__new__(individual_class)
+        for field, value in chain(zip(fields, row), values.items()):
+            setattr(individual, field, value)
+        individuals.append(individual)
+    return individuals
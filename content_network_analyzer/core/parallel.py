@@ -0,0 +1,376 @@
+"""
+Defines the parallel aggregation of clusters, and the parallel ingestion of dumps.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from glob import iglob
+from itertools import count
+from logging import getLogger
+from multiprocessing import get_all_start_methods, get_context
+from operator import itemgetter
+from os import cpu_count
+from pathlib import Path
+
+from .cache import get_cache
+from .cluster import AggregateTree, Cluster, LazyUnion, NamedCluster, merge_samples
+from .packing import pack, unpack
+from .sample import RandomVariable
+
+
+LOGGER = getLogger(__name__)
+_MEMBERS = {}
+_TOKENS = count()
+
+
+def _pack_window(cluster, mindate, maxdate):
+    """Packs the individuals of a cluster in a window into compact arrays.
+
+    Parameters
+    ----------
+    cluster : Cluster
+        A cluster, which is not a lazy union, or a named cluster.
+    mindate : datetime or None
+        The minimal sample time of the individuals. None if unbounded.
+    maxdate : datetime or None
+        The maximal sample time of the individuals. None if unbounded.
+
+    Returns
+    -------
+    (tuple or None, dict of (str, object))
+        The individuals packed by .packing.pack, and the values of the attributes that were not
+        packed. The random variable of a random variable is pickled by reference rather than
+        once per individual.
+    """
+    values = {}
+    if isinstance(cluster, RandomVariable):
+        values[cluster._variableField()] = cluster
+    return (pack(cluster.between(mindate, maxdate), exclude=values), values)
+
+
+def _aggregate(windows, seeds):
+    """Aggregates packed random samples into a packed partial aggregate random sample.
+
+    Parameters
+    ----------
+    windows : list of (tuple or None, dict of (str, object))
+        Random samples sorted in the ascending order of sample time packed by _pack_window.
+    seeds : list of .sample.SampledIndividual or None
+        The latest individuals sampled before the random samples.
+
+    Returns
+    -------
+    (.sample.SampledIndividual or None, tuple or None)
+        The aggregate of the seeds, and the partial aggregate random sample packed by
+        .packing.pack.
+    """
+    samples = [unpack(packed, **values) for packed, values in windows]
+    return (_total(seeds), pack(merge_samples(samples, seeds)))
+
+
+def _aggregate_members(token, indices, mindate, maxdate):
+    """Aggregates members of a cluster inherited from the calling process.
+
+    Parameters
+    ----------
+    token : int
+        The key of the members in _MEMBERS, which the process inherited when it was forked.
+    indices : list of int
+        The indices of the aggregated members.
+    mindate : datetime or None
+        The minimal sample time of the individuals. None if unbounded.
+    maxdate : datetime or None
+        The maximal sample time of the individuals. None if unbounded.
+
+    Returns
+    -------
+    (.sample.SampledIndividual or None, tuple or None)
+        The aggregate of the latest individuals sampled before mindate, and the partial
+        aggregate random sample packed by .packing.pack.
+    """
+    members = [_MEMBERS[token][index] for index in indices]
+    seeds = [member._before(mindate) for member in members]
+    samples = [member.between(mindate, maxdate) for member in members]
+    return (_total(seeds), pack(merge_samples(samples, seeds)))
+
+
+def _total(seeds):
+    """Aggregates individuals.
+
+    Parameters
+    ----------
+    seeds : list of .sample.SampledIndividual or None
+        Individuals, or None for missing individuals.
+
+    Returns
+    -------
+    .sample.SampledIndividual or None
+        The aggregate of the individuals. None if all individuals are missing.
+    """
+    tree = AggregateTree(len(seeds))
+    for index, seed in enumerate(seeds):
+        tree.update(index, seed)
+    return tree.total()
+
+
+def aggregate_parallel(cluster, processes=None, mindate=None, maxdate=None):
+    """Aggregates the aggregate random sample of a cluster using a pool of processes.
+
+    The unique members of the cluster are partitioned across the processes, and every process
+    aggregates a partial aggregate random sample from its members, which it packs into compact
+    arrays by .packing.pack, so that no individual is pickled on its own. Where processes are
+    forked, they inherit the members, and read their windows themselves. Elsewhere, the windows
+    of the members are packed by the calling process, and shipped to the processes. Since the
+    individual is a monoid, the partial aggregate random samples are then combined pairwise by
+    the processes in a balanced tree of O(log p) rounds, so that the calling process only unpacks
+    the final aggregate random sample.
+
+    Parameters
+    ----------
+    cluster : Cluster
+        A cluster.
+    processes : int or None, optional
+        The number of processes. None if the number of processors.
+    mindate : datetime or None, optional
+        The minimal sample time of the individuals. None if unbounded.
+    maxdate : datetime or None, optional
+        The maximal sample time of the individuals. None if unbounded.
+
+    Returns
+    -------
+    list of .sample.SampledIndividual
+        The individuals in the aggregate random sample sampled at, or after mindate, and at, or
+        before maxdate.
+    """
+    assert isinstance(cluster, Cluster)
+    processes = processes or cpu_count() or 1
+    assert isinstance(processes, int) and processes > 0
+
+    while isinstance(cluster, NamedCluster):
+        cluster = cluster._cluster
+    members = cluster.getMembers() if isinstance(cluster, LazyUnion) else [cluster]
+    if processes == 1 or len(members) < 2:
+        return list(cluster.between(mindate, maxdate))
+
+    partitions = min(processes, len(members))
+    LOGGER.debug("Aggregating %d clusters in %d partitions", len(members), partitions)
+    forked = "fork" in get_all_start_methods()
+    token = next(_TOKENS)
+    if forked:
+        _MEMBERS[token] = members
+    try:
+        context = get_context("fork") if forked else None
+        with ProcessPoolExecutor(processes, mp_context=context) as executor:
+            futures = []
+            for partition in range(partitions):
+                indices = list(range(partition, len(members), partitions))
+                if forked:
+                    futures.append(executor.submit(
+                        _aggregate_members, token, indices, mindate, maxdate))
+                else:
+                    windows = [_pack_window(members[index], mindate, maxdate) for index in indices]
+                    seeds = [members[index]._before(mindate) for index in indices]
+                    futures.append(executor.submit(_aggregate, windows, seeds))
+            partials = [future.result() for future in futures]
+            while len(partials) > 1:
+                futures = [
+                    executor.submit(
+                        _aggregate, [(packed, {}) for _, packed in pair],
+                        [seed for seed, _ in pair])
+                    for pair in zip(partials[0::2], partials[1::2])]
+                unpaired = partials[-1:] if len(partials) % 2 else []
+                partials = [future.result() for future in futures] + unpaired
+    finally:
+        _MEMBERS.pop(token, None)
+    _, packed = partials[0]
+    return unpack(packed)
+
+
+def _find_dumps(dumps):
+    """Finds dumps in a directory, or by a glob pattern.
+
+    Parameters
+    ----------
+    dumps : str, Path, or iterable of (str or Path)
+        A directory that is searched recursively, a glob pattern, or the paths to the dumps.
+
+    Returns
+    -------
+    list of str
+        The paths to the dumps.
+    """
+    if isinstance(dumps, (str, Path)):
+        if Path(dumps).is_dir():
+            paths = Path(dumps).rglob("*")
+        else:
+            paths = map(Path, iglob(str(dumps), recursive=True))
+        return sorted(str(path) for path in paths if path.is_file())
+    return [str(path) for path in dumps]
+
+
+def _parse_dumps(variable_class, method, tasks, kwargs, cache):
+    """Parses dumps into records of snapshots.
+
+    Parameters
+    ----------
+    variable_class : type
+        The class of the random variables.
+    method : str
+        The name of the static method of the Snapshot class that constructs a snapshot from a
+        dump, such as from_html.
+    tasks : list of (str, str, datetime)
+        The paths to the dumps, the IDs of the random variables, and the dates, and times at
+        which the dumps were taken.
+    kwargs : dict
+        The keyword arguments of the method.
+    cache : .cache.ParseCache or None
+        The cache of the fields extracted from the dumps. None if no cache.
+
+    Returns
+    -------
+    (list of tuple, list of (str, str), int)
+        The records of the snapshots, see .sample.RandomVariable.add_many, the paths to the
+        dumps that could not be parsed together with the errors, and the number of bytes written
+        to the cache by a pickled copy of the cache. See .cache.ParseCache.account.
+    """
+    parse = getattr(variable_class.Snapshot, method)
+    names = variable_class._recordFields()[1:]
+    records, failures = [], []
+    for path, id, date in tasks:
+        try:
+            with cache if cache is not None else nullcontext(), \
+                    open(path, "rt", encoding="utf8") as f:
+                snapshot = parse(None, date, f, **kwargs)
+        except Exception as error:
+            failures.append((path, "%s: %s" % (type(error).__name__, error)))
+            continue
+        records.append((id,) + tuple(getattr(snapshot, name) for name in names))
+    written = cache.written if cache is not None else 0
+    return (records, failures, written)
+
+
+def _parse_chunks(variable_class, method, chunks, kwargs, cache, processes):
+    """Parses chunks of dumps into records of snapshots using a pool of processes.
+
+    At most four chunks per process are parsed, or waiting to be parsed at any time, so that
+    the records are not accumulated faster than they are consumed.
+
+    Parameters
+    ----------
+    variable_class : type
+        The class of the random variables.
+    method : str
+        The name of the static method of the Snapshot class that constructs a snapshot from a
+        dump.
+    chunks : list of list of (str, str, datetime)
+        The chunks of dumps. See _parse_dumps.
+    kwargs : dict
+        The keyword arguments of the method.
+    cache : .cache.ParseCache or None
+        The cache of the fields extracted from the dumps. None if no cache.
+    processes : int
+        The number of processes.
+
+    Yields
+    ------
+    (list of tuple, list of (str, str), int)
+        The records of the snapshots, the failures, and the number of bytes written to the cache
+        for every chunk in the order of the chunks. See _parse_dumps.
+    """
+    if processes == 1:
+        for chunk in chunks:
+            yield _parse_dumps(variable_class, method, chunk, kwargs, cache)
+        return
+    with ProcessPoolExecutor(processes) as executor:
+        futures = deque()
+        for chunk in chunks:
+            futures.append(executor.submit(
+                _parse_dumps, variable_class, method, chunk, kwargs, cache))
+            if len(futures) >= 4 * processes:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def ingest_parallel(variable_class, dumps, mapping, method="from_html", processes=None,
+                    batch_size=10000, chunk_size=64, store=None, cache=None, **kwargs):
+    """Constructs snapshots from dumps using a pool of processes.
+
+    The dumps are sorted by the date, and time at which they were taken, and parsed in chunks by
+    the processes, which send back records of the snapshots rather than the snapshots. The
+    records are inserted into the random samples in batches using
+    .sample.RandomVariable.add_many, so that every batch is sorted, and every random sample is
+    mostly extended rather than merged. Dumps that cannot be parsed are skipped, and logged.
+
+    Parameters
+    ----------
+    variable_class : type
+        The class of the random variables, such as YouTubeTrack.
+    dumps : str, Path, or iterable of (str or Path)
+        A directory that is searched recursively, a glob pattern, or the paths to the dumps.
+    mapping : callable
+        A function that maps the Path of a dump to the ID of its random variable, and to the
+        date, and time at which the dump was taken, or to None if the dump is skipped.
+    method : str, optional
+        The name of the static method of the Snapshot class that constructs a snapshot from a
+        dump, such as from_html, or from_apiv3.
+    processes : int or None, optional
+        The number of processes. None if the number of processors.
+    batch_size : int, optional
+        The minimal number of records inserted into the random samples at once.
+    chunk_size : int, optional
+        The number of dumps parsed by a process at once.
+    store : .store.SnapshotStore or None, optional
+        The store that owns the random samples. None if the active store.
+    cache : .cache.ParseCache or None, optional
+        The cache of the fields extracted from the dumps, which is shared by the processes.
+        None if the active cache, if any. Only this process evicts entries from the cache. See
+        .cache.cached.
+    kwargs : dict
+        The keyword arguments of the method, such as the name of the HTML parser.
+
+    Returns
+    -------
+    int
+        The number of snapshots that were inserted into the random samples.
+
+    Examples
+    --------
+    >>> def mapping(path):  # dumps/dQw4w9WgXcQ/2018-05-29T16:18:21.html
+    ...     return (path.parent.name, datetime.strptime(path.stem, "%Y-%m-%dT%H:%M:%S"))
+    >>> ingest_parallel(YouTubeTrack, "dumps/*/*.html", mapping, processes=32)
+    """
+    processes = processes or cpu_count() or 1
+    assert isinstance(processes, int) and processes > 0
+    assert isinstance(batch_size, int) and batch_size > 0
+    assert isinstance(chunk_size, int) and chunk_size > 0
+    if cache is None:
+        cache = get_cache()
+    if cache is not None:
+        cache.account(0)  # measures the cache before the processes write to it
+
+    tasks = []
+    for path in _find_dumps(dumps):
+        key = mapping(Path(path))
+        if key is not None:
+            id, date = key
+            tasks.append((path, id, date))
+    tasks.sort(key=itemgetter(2))
+    chunks = [tasks[index:index + chunk_size] for index in range(0, len(tasks), chunk_size)]
+    LOGGER.debug("Ingesting %d dumps in %d chunks", len(tasks), len(chunks))
+
+    inserted, batch = 0, []
+    for records, failures, written in _parse_chunks(
+            variable_class, method, chunks, kwargs, cache, processes):
+        for path, error in failures:
+            LOGGER.warning("Failed to parse %s: %s", path, error)
+        if written:
+            cache.account(written)
+        batch.extend(records)
+        if len(batch) >= batch_size:
+            inserted += variable_class.add_many(batch, store=store)
+            batch = []
+    if batch:
+        inserted += variable_class.add_many(batch, store=store)
+    return inserted
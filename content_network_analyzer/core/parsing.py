@@ -0,0 +1,223 @@
+"""
+Defines a parser-independent interface to HTML documents.
+"""
+
+from abc import abstractmethod
+from logging import getLogger
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml.cssselect import CSSSelector
+    import lxml.html
+except ImportError:
+    CSSSelector = None
+
+
+LOGGER = getLogger(__name__)
+PARSERS = ("html.parser", "lxml", "lxml.html")
+_DEFAULT_PARSER = ["html.parser"]
+_SELECTORS = {}
+
+
+def set_default_parser(parser):
+    """Sets the parser that is used when no parser is specified.
+
+    Parameters
+    ----------
+    parser : str
+        The name of the parser. "html.parser", and "lxml" construct a BeautifulSoup tree using
+        the parser of the Python standard library, and the lxml parser, respectively.
+        "lxml.html" queries the lxml tree directly using cssselect, and skips the construction
+        of BeautifulSoup objects.
+    """
+    assert parser in PARSERS, "Unknown parser %r" % parser
+    _DEFAULT_PARSER[0] = parser
+
+
+def get_parser(parser=None):
+    """Returns a parser, or the default parser.
+
+    Parameters
+    ----------
+    parser : str or None, optional
+        The name of a parser. None if the default parser.
+
+    Returns
+    -------
+    str
+        The name of the parser, or the name of the default parser if parser is None.
+    """
+    parser = _DEFAULT_PARSER[0] if parser is None else parser
+    assert parser in PARSERS, "Unknown parser %r" % parser
+    return parser
+
+
+def parse_html(f, parser=None):
+    """Parses an HTML document.
+
+    Parameters
+    ----------
+    f : file-like readable object
+        The HTML document.
+    parser : str or None, optional
+        The name of the parser. None if the default parser. See set_default_parser.
+
+    Returns
+    -------
+    HTMLElement
+        The root of the HTML document.
+    """
+    parser = get_parser(parser)
+    if parser == "lxml.html":
+        assert CSSSelector is not None, "The lxml.html parser requires lxml, and cssselect"
+        return _LxmlElement(lxml.html.document_fromstring(f.read()))
+    return _SoupElement(BeautifulSoup(f, parser))
+
+
+class HTMLElement(object):
+    """This class represents an element of an HTML document independently of the parser.
+
+    Selectors are CSS selectors, which are evaluated by soupsieve for BeautifulSoup trees, and
+    by cssselect for lxml trees.
+    """
+    def select(self, selector, text=None):
+        """Returns the descendants that match a selector.
+
+        Parameters
+        ----------
+        selector : str
+            A CSS selector.
+        text : re.Pattern or None, optional
+            A regular expression that the text of the descendants must contain. None if the text
+            is unrestricted.
+
+        Returns
+        -------
+        list of HTMLElement
+            The matching descendants in the document order.
+        """
+        elements = self._select(selector, None)
+        if text is not None:
+            elements = [element for element in elements if text.search(element.text)]
+        return elements
+
+    def select_one(self, selector, text=None):
+        """Returns the first descendant that matches a selector.
+
+        Parameters
+        ----------
+        selector : str
+            A CSS selector.
+        text : re.Pattern or None, optional
+            A regular expression that the text of the descendant must contain. None if the text
+            is unrestricted.
+
+        Returns
+        -------
+        HTMLElement or None
+            The first matching descendant in the document order, or None if there is none.
+        """
+        if text is None:
+            elements = self._select(selector, 1)
+        else:
+            elements = self.select(selector, text)
+        return elements[0] if elements else None
+
+    def __getitem__(self, attr):
+        value = self.get(attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+    @abstractmethod
+    def _select(self, selector, limit):
+        """Returns the descendants that match a selector.
+
+        Parameters
+        ----------
+        selector : str
+            A CSS selector.
+        limit : int or None
+            The maximal number of returned descendants, which the parser may exceed. None if
+            unlimited.
+
+        Returns
+        -------
+        list of HTMLElement
+            The matching descendants in the document order.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, attr, default=None):
+        """Returns the value of an attribute.
+
+        Parameters
+        ----------
+        attr : str
+            The name of the attribute.
+        default : object, optional
+            The value returned if the element lacks the attribute.
+
+        Returns
+        -------
+        str or object
+            The value of the attribute, or default if the element lacks the attribute.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def text(self):
+        """The concatenated text of the element, and its descendants.
+        """
+        pass
+
+
+class _SoupElement(HTMLElement):
+    """This class represents an element of a BeautifulSoup tree.
+
+    Parameters
+    ----------
+    tag : bs4.Tag
+        The element.
+    """
+    def __init__(self, tag):
+        self._tag = tag
+
+    def _select(self, selector, limit):
+        return [_SoupElement(tag) for tag in self._tag.select(selector, limit=limit or 0)]
+
+    def get(self, attr, default=None):
+        value = self._tag.get(attr, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def text(self):
+        return self._tag.get_text()
+
+
+class _LxmlElement(HTMLElement):
+    """This class represents an element of an lxml tree.
+
+    Parameters
+    ----------
+    element : lxml.html.HtmlElement
+        The element.
+    """
+    def __init__(self, element):
+        self._element = element
+
+    def _select(self, selector, limit):
+        if selector not in _SELECTORS:
+            _SELECTORS[selector] = CSSSelector(selector)
+        return [_LxmlElement(element) for element in _SELECTORS[selector](self._element)]
+
+    def get(self, attr, default=None):
+        value = self._element.get(attr)
+        return default if value is None else str(value)
+
+    @property
+    def text(self):
+        return str(self._element.text_content())
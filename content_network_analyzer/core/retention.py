@@ -0,0 +1,189 @@
+"""
+Defines the age-based retention, and compaction of random samples.
+"""
+
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from threading import Event, Thread
+from weakref import ref
+
+import numpy as np
+
+from .store import get_store
+from .util import to_timestamp
+
+
+LOGGER = getLogger(__name__)
+
+
+def _microseconds(delta):
+    """Converts a timedelta into a number of microseconds.
+
+    Parameters
+    ----------
+    delta : timedelta
+        A timedelta.
+
+    Returns
+    -------
+    int
+        The number of microseconds.
+    """
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+
+class RetentionPolicy(object):
+    """This class represents an age-based retention policy for random samples.
+
+    The policy consists of tiers of increasing age. In a tier with a resolution, only the latest
+    individual in every interval of the resolution is retained, and in a tier without a
+    resolution, all individuals are retained. Individuals older than the last tier are not
+    retained. The first, and the last individual in a random sample are always retained, so that
+    the aggregate random samples of clusters, and the names of random variables stay correct.
+
+    Parameters
+    ----------
+    tiers : iterable of (timedelta or None, timedelta or None)
+        The maximal ages of the individuals in the tiers in the ascending order, and the
+        resolutions of the tiers. A maximal age of None may only appear in the last tier, and
+        means that the tier is unbounded. A resolution of None means full resolution.
+
+    Examples
+    --------
+    Full resolution for 7 days, hourly for 90 days, and daily after that:
+
+    >>> policy = RetentionPolicy([
+    ...     (timedelta(days=7), None),
+    ...     (timedelta(days=90), timedelta(hours=1)),
+    ...     (None, timedelta(days=1))])
+    """
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        assert self.tiers
+        for index, (age, resolution) in enumerate(self.tiers):
+            assert isinstance(age, timedelta) or (age is None and index == len(self.tiers) - 1)
+            assert isinstance(resolution, timedelta) or resolution is None
+            assert resolution is None or resolution > timedelta(0)
+        ages = [age for age, _ in self.tiers if age is not None]
+        assert ages == sorted(ages)
+
+    def compact(self, sample, now=None):
+        """Deletes the individuals that are not retained from a random sample.
+
+        The individuals are selected, and deleted under the lock of the random sample, so that
+        individuals added concurrently never shift the indices of the deleted individuals.
+
+        Parameters
+        ----------
+        sample : .sample.BaseSample
+            A random sample.
+        now : datetime or None, optional
+            The datetime from which the ages of the individuals are measured. None if the current
+            time in the time zone of the latest individual, or in UTC if the latest individual
+            was sampled at a naive datetime. See .util.to_timestamp.
+
+        Returns
+        -------
+        int
+            The number of deleted individuals.
+        """
+        with sample._lock:
+            if len(sample) < 3:
+                return 0
+            if now is None:
+                tzinfo = sample[-1].getDatetime().tzinfo
+                if tzinfo is None:
+                    now = datetime.now(timezone.utc).replace(tzinfo=None)
+                else:
+                    now = datetime.now(tzinfo)
+            assert isinstance(now, datetime)
+
+            age, resolution = self.tiers[0]
+            end = len(sample) - 1
+            if resolution is None and age is not None:
+                end = min(end, sample.bisect_key_right(now - age))
+            if end < 2:
+                return 0
+            timestamps, _ = sample.getColumns([], 0, end + 1)
+
+            ages = to_timestamp(now) - timestamps
+            max_ages = [_microseconds(age) for age, _ in self.tiers if age is not None]
+            tiers = np.searchsorted(max_ages, ages, side="right")
+            buckets = np.arange(len(timestamps), dtype=np.int64)
+            for tier, (_, resolution) in enumerate(self.tiers):
+                if resolution is not None:
+                    in_tier = tiers == tier
+                    buckets[in_tier] = timestamps[in_tier] // _microseconds(resolution)
+            retained = np.ones(len(timestamps), dtype=bool)
+            retained[:-1] = (tiers[:-1] != tiers[1:]) | (buckets[:-1] != buckets[1:])
+            retained[tiers == len(self.tiers)] = False
+            retained[0] = retained[-1] = True
+
+            indices = np.flatnonzero(~retained).tolist()
+            sample.delete(indices)
+            return len(indices)
+
+
+class Compactor(Thread):
+    """This class represents a background thread that compacts random samples incrementally.
+
+    At every step, the compactor applies the retention policies of the classes of random
+    variables to a batch of the random samples in a store. When all random samples have been
+    compacted, the next step starts over with the random samples that are in the store at that
+    time.
+
+    Parameters
+    ----------
+    store : .store.SnapshotStore or None, optional
+        A store. None if the active store at the time of construction.
+    interval : float, optional
+        The number of seconds between the steps.
+    batch_size : int, optional
+        The number of random samples compacted in a step.
+    """
+    def __init__(self, store=None, interval=60.0, batch_size=1000):
+        super(Compactor, self).__init__(name="Compactor", daemon=True)
+        assert isinstance(interval, (int, float)) and interval >= 0
+        assert isinstance(batch_size, int) and batch_size > 0
+        self._store = get_store(store)
+        self._interval = interval
+        self._batch_size = batch_size
+        self._pending = []
+        self._stopped = Event()
+
+    def step(self, now=None):
+        """Compacts a batch of random samples.
+
+        Parameters
+        ----------
+        now : datetime or None, optional
+            The datetime from which the ages of the individuals are measured. See
+            RetentionPolicy.compact.
+
+        Returns
+        -------
+        int
+            The number of deleted individuals.
+        """
+        if not self._pending:
+            self._pending = [
+                (cls.retention, ref(sample)) for cls, sample in self._store.getSamples()
+                if cls.retention is not None]
+        batch = self._pending[:self._batch_size]
+        del self._pending[:self._batch_size]
+        deleted = 0
+        for policy, sample_ref in batch:
+            sample = sample_ref()
+            if sample is not None:
+                deleted += policy.compact(sample, now)
+        LOGGER.debug("Compacted %d random samples, deleted %d individuals", len(batch), deleted)
+        return deleted
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            self.step()
+
+    def stop(self):
+        """Stops the compactor after the current step.
+        """
+        self._stopped.set()
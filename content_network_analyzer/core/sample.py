@@ -3,22 +3,677 @@ Defines random variable, and sample datatypes.
 """
 
 from abc import abstractmethod
+from bisect import bisect_left, bisect_right
+from copyreg import __newobj__
 from datetime import datetime
+from functools import wraps
+from heapq import merge
+from inspect import signature
+from itertools import chain, islice
+from logging import getLogger
+from operator import methodcaller
+from threading import RLock
+from weakref import WeakSet
 
-from .cluster import Cluster
+import numpy as np
+
+from .cluster import BATCH_SIZE, Cluster, make_batch
+from .packing import _intern, slot_fields
+from .store import get_store
+from .util import fraction, to_timestamp
+
+
+LOGGER = getLogger(__name__)
+
+
+def synchronized(method):
+    """Decorates a method of a random sample, so that it runs under the lock of the random sample.
+
+    Parameters
+    ----------
+    method : callable
+        A method of a random sample.
+
+    Returns
+    -------
+    callable
+        The decorated method.
+    """
+    @wraps(method)
+    def synchronized_method(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return synchronized_method
+
+
+class BaseSample(object):
+    """This class represents a random sample of a random variable.
+
+    The random sample is a set of individuals sorted in the ascending order of sample time with a
+    modification counter that is incremented whenever the random sample changes. Subscribers are
+    notified about the earliest sample time affected by every change.
+
+    Random samples are thread-safe. Every random sample has a reentrant lock, under which all
+    changes, and lookups are made, and iterators produce the individuals that were in the random
+    sample when the iterator was created. Therefore, individuals can be added from several
+    threads, while clusters are being read from other threads.
+
+    Note
+    ----
+    Subclasses provide the sequence protocol, and the bisect_key_left, bisect_key_right, and
+    irange_key methods keyed by the sample time with the semantics of
+    sortedcontainers.SortedKeyList, a _merge method that inserts sorted individuals, and a
+    _delete method that deletes individuals at sorted indices, both without notifying the
+    subscribers. Their public methods are synchronized.
+
+    Attributes
+    ----------
+    version : int
+        The modification counter of the random sample.
+    """
+    version = 0
+
+    def __init__(self):
+        self._subscribers = WeakSet()
+        self._lock = RLock()
+
+    def subscribe(self, subscriber):
+        """Subscribes to the changes of the random sample.
+
+        Note
+        ----
+        The random sample only keeps a weak reference to the subscriber.
+
+        Parameters
+        ----------
+        subscriber : object
+            An object with an invalidate method that will receive the earliest sample time
+            affected by every change, or None if the entire random sample may have changed.
+        """
+        self._subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Unsubscribes from the changes of the random sample.
+
+        Parameters
+        ----------
+        subscriber : object
+            A subscriber.
+        """
+        self._subscribers.discard(subscriber)
+
+    def _modified(self, date):
+        """Increments the modification counter, and notifies the subscribers about a change.
+
+        Parameters
+        ----------
+        date : datetime or None
+            The earliest sample time affected by the change, or None if the entire random sample
+            may have changed.
+        """
+        self.version += 1
+        for subscriber in list(self._subscribers):
+            subscriber.invalidate(date)
+
+    @synchronized
+    def delete(self, indices):
+        """Deletes the individuals at indices, and notifies the subscribers about a single change.
+
+        Parameters
+        ----------
+        indices : iterable of int
+            Non-negative indices of the individuals.
+        """
+        indices = sorted(set(indices))
+        if not indices:
+            return
+        date = self[indices[0]].getDatetime()
+        self._delete(indices)
+        self._modified(date)
+
+    @synchronized
+    def update(self, *iterables):
+        """Adds individuals with a single sorted merge, and notifies the subscribers once.
+
+        Parameters
+        ----------
+        iterables : iterable of iterable of SampledIndividual
+            The individuals.
+
+        Returns
+        -------
+        BaseSample
+            The random sample.
+        """
+        date = self._merge(sorted(chain(*iterables), key=methodcaller("getDatetime")))
+        if date is not None:
+            self._modified(date)
+        return self
+
+    def getColumns(self, attrs, start=0, end=None):
+        """Returns the sample times, and the attribute values of a slice of individuals.
+
+        Parameters
+        ----------
+        attrs : sequence of str
+            The names of the attributes.
+        start : int, optional
+            The index of the first individual in the slice.
+        end : int or None, optional
+            The index after the last individual in the slice. None if the slice extends to the
+            end of the random sample.
+
+        Returns
+        -------
+        (np.ndarray, tuple of np.ndarray)
+            The sample times of the individuals in microseconds since the epoch, and the values
+            of the attributes of the individuals. See .cluster.make_batch.
+        """
+        return make_batch(self[start:end], list(attrs))
+
+
+class Sample(BaseSample):
+    """This class represents a random sample of a random variable stored as a time series.
+
+    The individuals, and their sample times are stored in two parallel lists. Individuals sampled
+    after the latest individual in the random sample are appended in constant time, whereas
+    individuals that arrive late are inserted at their position found by bisection. The lists
+    are only copied on a late arrival if an iterator over the random sample is in use. An
+    individual is not added if an equal individual with the same sample time is already in the
+    random sample, so no individual is ever hashed.
+
+    Parameters
+    ----------
+    iterable : iterable of SampledIndividual, optional
+        The initial individuals in the random sample.
+    """
+    def __init__(self, iterable=None):
+        super(Sample, self).__init__()
+        self._dates = []
+        self._individuals = []
+        self._readers = WeakSet()
+        if iterable is not None:
+            self.update(iterable)
+
+    def _find(self, value):
+        """Returns the index of an individual in the random sample.
+
+        Parameters
+        ----------
+        value : SampledIndividual
+            An individual.
+
+        Returns
+        -------
+        int or None
+            The index of an equal individual with the same sample time, or None if there is no
+            such individual.
+        """
+        date = value.getDatetime()
+        index = bisect_left(self._dates, date)
+        while index < len(self._dates) and self._dates[index] == date:
+            if self._individuals[index] == value:
+                return index
+            index += 1
+        return None
+
+    def _insert(self, value):
+        """Inserts an individual without notifying the subscribers.
+
+        Parameters
+        ----------
+        value : SampledIndividual
+            An individual.
+
+        Returns
+        -------
+        bool
+            Whether the individual was inserted.
+        """
+        date = value.getDatetime()
+        if not self._dates or date > self._dates[-1]:
+            self._dates.append(date)
+            self._individuals.append(value)
+            return True
+        if self._find(value) is not None:
+            return False
+        index = bisect_right(self._dates, date)
+        if self._readers:
+            self._dates = self._dates[:index] + [date] + self._dates[index:]
+            self._individuals = self._individuals[:index] + [value] + self._individuals[index:]
+            self._readers = WeakSet()
+        else:
+            self._dates.insert(index, date)
+            self._individuals.insert(index, value)
+        return True
+
+    def _read(self, start, end):
+        """Returns an iterator over a slice of the individuals that does not see later changes.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first individual in the slice.
+        end : int
+            The index after the last individual in the slice.
+
+        Returns
+        -------
+        iterator of SampledIndividual
+            The individuals in the slice.
+        """
+        reader = _read(self._individuals, start, end)
+        self._readers.add(reader)
+        return reader
+
+    def _merge(self, values):
+        """Inserts individuals with a single sorted merge without notifying the subscribers.
+
+        Parameters
+        ----------
+        values : list of SampledIndividual
+            The individuals sorted in the ascending order of sample time.
+
+        Returns
+        -------
+        datetime or None
+            The sample time of the earliest inserted individual, or None if no individual was
+            inserted.
+        """
+        last = self._dates[-1] if self._dates else None
+        inserted = []
+        for value in values:
+            date = value.getDatetime()
+            if last is not None and date <= last and self._find(value) is not None:
+                continue
+            index = len(inserted) - 1
+            while index >= 0 and inserted[index].getDatetime() == date \
+                    and inserted[index] != value:
+                index -= 1
+            if index < 0 or inserted[index].getDatetime() != date:
+                inserted.append(value)
+        if not inserted:
+            return None
+        if last is None or inserted[0].getDatetime() > last:
+            self._dates.extend(value.getDatetime() for value in inserted)
+            self._individuals.extend(inserted)
+        else:
+            self._replace(merge(self._individuals, inserted, key=methodcaller("getDatetime")))
+        return inserted[0].getDatetime()
+
+    def _replace(self, values):
+        """Replaces the individuals without notifying the subscribers.
+
+        Note
+        ----
+        The lists of individuals are replaced, rather than changed, except when individuals are
+        appended, or inserted while no iterator is in use, so that iterators over the random
+        sample remain consistent.
+
+        Parameters
+        ----------
+        values : iterable of SampledIndividual
+            The new individuals sorted in the ascending order of sample time.
+        """
+        self._individuals = list(values)
+        self._dates = [value.getDatetime() for value in self._individuals]
+        self._readers = WeakSet()
+
+    def _delete(self, indices):
+        """Deletes individuals without notifying the subscribers.
+
+        Parameters
+        ----------
+        indices : sequence of int
+            Non-negative indices of the individuals.
+        """
+        indices = set(indices)
+        self._replace(
+            value for index, value in enumerate(self._individuals) if index not in indices)
+
+    def __len__(self):
+        return len(self._individuals)
+
+    @synchronized
+    def __iter__(self):
+        return self._read(0, len(self._individuals))
+
+    @synchronized
+    def __reversed__(self):
+        return reversed(self._individuals[:])
+
+    @synchronized
+    def __getitem__(self, index):
+        return self._individuals[index]
+
+    @synchronized
+    def __contains__(self, value):
+        return isinstance(value, SampledIndividual) and self._find(value) is not None
+
+    def __reduce__(self):
+        return (type(self), (list(self), ))
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self._individuals)
+
+    @synchronized
+    def bisect_key_left(self, date):
+        return bisect_left(self._dates, date)
+
+    @synchronized
+    def bisect_key_right(self, date):
+        return bisect_right(self._dates, date)
+
+    @synchronized
+    def irange_key(self, min_key=None, max_key=None):
+        start = bisect_left(self._dates, min_key) if min_key is not None else 0
+        end = bisect_right(self._dates, max_key) if max_key is not None else len(self._dates)
+        return self._read(start, end)
+
+    @synchronized
+    def add(self, value):
+        if self._insert(value):
+            self._modified(value.getDatetime())
+
+    @synchronized
+    def discard(self, value):
+        index = self._find(value)
+        if index is not None:
+            del self[index]
+
+    @synchronized
+    def remove(self, value):
+        index = self._find(value)
+        if index is None:
+            raise KeyError(value)
+        del self[index]
+
+    @synchronized
+    def pop(self, index=-1):
+        value = self._individuals[index]
+        del self[index]
+        return value
+
+    @synchronized
+    def clear(self):
+        self._replace([])
+        self._modified(None)
+
+    @synchronized
+    def __delitem__(self, index):
+        values = self[index] if isinstance(index, slice) else [self[index]]
+        individuals = self._individuals[:]
+        del individuals[index]
+        self._replace(individuals)
+        if values:
+            self._modified(min(value.getDatetime() for value in values))
+
+    @synchronized
+    def difference_update(self, *iterables):
+        values = set(chain(*iterables))
+        self._replace(value for value in self._individuals if value not in values)
+        self._modified(None)
+        return self
+
+    @synchronized
+    def intersection_update(self, *iterables):
+        for iterable in iterables:
+            values = set(iterable)
+            self._replace(value for value in self._individuals if value in values)
+        self._modified(None)
+        return self
+
+    @synchronized
+    def symmetric_difference_update(self, other):
+        values = set(other)
+        added = [value for value in values if self._find(value) is None]
+        self._replace(value for value in self._individuals if value not in values)
+        for value in sorted(added, key=methodcaller("getDatetime")):
+            self._insert(value)
+        self._modified(None)
+        return self
+
+    __ior__ = BaseSample.update
+    __isub__ = difference_update
+    __iand__ = intersection_update
+    __ixor__ = symmetric_difference_update
+
+
+def _read(individuals, start, end):
+    """Produces a slice of a list of individuals.
+
+    Parameters
+    ----------
+    individuals : list of SampledIndividual
+        The individuals.
+    start : int
+        The index of the first individual in the slice.
+    end : int
+        The index after the last individual in the slice.
+
+    Yields
+    ------
+    SampledIndividual
+        The individuals in the slice.
+    """
+    yield from islice(individuals, start, end)
 
 
 class RandomVariable(Cluster):
     """This class represents a random variable.
+
+    A random variable is pickled as its class, and its ID only, and it is unpickled into the
+    active store, so that individuals refer to their random variable without carrying its
+    random sample. Random samples are saved, and loaded explicitly by
+    .store.SnapshotStore.checkpoint, and .store.SnapshotStore.restore.
+
+    Attributes
+    ----------
+    sample : BaseSample
+        The random sample of the random variable.
+    sample_class : type
+        The class of the random samples of new random variables, which is either Sample,
+        .columnar.ColumnarSample, or .columnar.CompressedSample.
+    retention : .retention.RetentionPolicy or None
+        The retention policy of the random samples of the random variables. None if all
+        individuals are retained.
     """
+    sample_class = Sample
+    retention = None
+
+    @abstractmethod
+    def getId(self):
+        """Returns the ID that uniquely identifies the random variable within its class.
+
+        Returns
+        -------
+        str
+            The ID that uniquely identifies the random variable within its class.
+        """
+        pass
+
+    @classmethod
+    def _variableField(cls):
+        """Returns the name of the attribute in which the snapshots store the random variable.
+
+        Returns
+        -------
+        str
+            The name of the first parameter of the Snapshot constructor.
+        """
+        return list(signature(cls.Snapshot.__init__).parameters)[1]
+
+    @classmethod
+    def _recordFields(cls):
+        """Returns the names of the fields in the records of the snapshots.
+
+        Returns
+        -------
+        list of str
+            The names of the parameters of the Snapshot constructor, where the ID of a random
+            variable takes the place of the random variable. See add_many.
+        """
+        return list(signature(cls.Snapshot.__init__).parameters)[1:]
+
+    @classmethod
+    def add_many(cls, records=None, store=None, **columns):
+        """Associates snapshots with random variables of the class in bulk.
+
+        All snapshots are constructed, and validated before any of them is associated with a
+        random variable, so that an invalid record leaves the random samples unchanged. The
+        snapshots of every random variable are then inserted into its random sample with a
+        single sorted merge, and the subscribers are notified once per random variable.
+
+        Note
+        ----
+        Subclasses define a Snapshot class, whose constructor takes the random variable as its
+        first parameter, and stores it in the attribute of the same name.
+
+        Parameters
+        ----------
+        records : iterable of tuple or dict, optional
+            The records, which are the arguments of the Snapshot constructor either in their
+            order, or keyed by their names, with the ID of a random variable in place of the
+            random variable. None if the records are given as columns.
+        store : .store.SnapshotStore or None, optional
+            The store that owns the random samples. None if the active store.
+        columns : dict of (str, sequence)
+            The columns of the records keyed by the names of the arguments. NumPy arrays are
+            converted to lists of Python objects.
+
+        Returns
+        -------
+        int
+            The number of snapshots that were inserted into the random samples.
+
+        Examples
+        --------
+        >>> YouTubeTrack.add_many(
+        ...     track=["dQw4w9WgXcQ", "dQw4w9WgXcQ"], title=["title", "title"],
+        ...     date=[datetime(2018, 5, 29), datetime(2018, 5, 30)], views=[10, 20],
+        ...     likes=[1, 2], dislikes=[0, 0])
+        2
+        """
+        names = cls._recordFields()
+        if columns:
+            assert records is None
+            assert set(columns) == set(names), "Expected columns %s" % ", ".join(names)
+            column_list = [
+                columns[name].tolist() if isinstance(columns[name], np.ndarray)
+                else columns[name] for name in names]
+            assert len(set(len(column) for column in column_list)) == 1
+            records = zip(*column_list)
+        assert records is not None
+
+        snapshots = {}
+        for record in records:
+            if isinstance(record, dict):
+                arguments = dict(record)
+                id = arguments.pop(names[0])
+                snapshot = cls.Snapshot(None, **arguments)
+            else:
+                id = record[0]
+                snapshot = cls.Snapshot(None, *record[1:])
+            assert isinstance(id, str)
+            snapshots.setdefault(id, []).append(snapshot)
+
+        store = get_store(store)
+        inserted = 0
+        for id, variable_snapshots in snapshots.items():
+            variable = cls(id, store=store)
+            for snapshot in variable_snapshots:
+                setattr(snapshot, names[0], variable)
+            with variable.sample._lock:
+                size = len(variable.sample)
+                variable.sample.update(variable_snapshots)
+                inserted += len(variable.sample) - size
+        LOGGER.debug(
+            "Inserted %d snapshots of %d %s random variables", inserted, len(snapshots),
+            cls.__name__)
+        return inserted
+
+    def __reduce__(self):
+        return (type(self), (self.getId(), ))
+
     def __iter__(self):
         for individual in self.sample:
             yield individual
 
+    def _before(self, date):
+        with self.sample._lock:
+            index = self.sample.bisect_key_left(date) if date is not None else 0
+            return self.sample[index - 1] if index else None
+
+    def between(self, mindate=None, maxdate=None):
+        return self.sample.irange_key(mindate, maxdate)
+
+    def iter_batches(self, attrs, batch_size=BATCH_SIZE, mindate=None, maxdate=None):
+        attrs = list(attrs)
+        # The window is located, and read under a single lock, so that concurrent insertions,
+        # and compactions never shift the indices between the bisection, and the read.
+        with self.sample._lock:
+            start = self.sample.bisect_key_left(mindate) if mindate is not None else 0
+            end = self.sample.bisect_key_right(maxdate) if maxdate is not None \
+                else len(self.sample)
+            timestamps, columns = self.sample.getColumns(attrs, start, end)
+        for offset in range(0, len(timestamps), batch_size):
+            yield (
+                timestamps[offset:offset + batch_size],
+                tuple(column[offset:offset + batch_size] for column in columns))
+
+    def _key(self):
+        return id(self.sample)
+
+    def _describe(self):
+        return "%r with %d individuals" % (self, len(self.sample))
+
+    def getVariables(self):
+        yield self
+
+    def subscribe(self, subscriber):
+        """Subscribes to the changes of the random sample of the random variable.
+
+        Parameters
+        ----------
+        subscriber : object
+            An object with an invalidate method. See Sample.subscribe.
+        """
+        self.sample.subscribe(subscriber)
+
+    def compact(self, now=None):
+        """Deletes the individuals that are not retained by the retention policy.
+
+        Parameters
+        ----------
+        now : datetime or None, optional
+            The datetime from which the ages of the individuals are measured. See
+            .retention.RetentionPolicy.compact.
+
+        Returns
+        -------
+        int
+            The number of deleted individuals.
+        """
+        if self.retention is None:
+            return 0
+        return self.retention.compact(self.sample, now)
+
+    def getVersion(self):
+        """Returns the modification counter of the random sample of the random variable.
+
+        Returns
+        -------
+        int
+            The modification counter of the random sample of the random variable.
+        """
+        return self.sample.version
+
 
 class Individual(object):
     """This class represents an individual in a population.
     """
+    __slots__ = ()
+
     @abstractmethod
     def __add__(self, other):
         """Returns the aggregate of two individuals.
@@ -57,7 +712,28 @@ class SampledIndividual(Individual):
         An individual in a population.
     datetime : datetime
         The datetime at which the individual was sampled.
+
+    Note
+    ----
+    Subclasses should declare __slots__, so that the individuals carry no __dict__. The class
+    declares no slots of its own, so subclasses that keep the default constructor, and
+    getDatetime must either declare the _individual, and _date slots, or omit __slots__. The
+    ratio attributes are not stored, but computed from the counters on access. Individuals with
+    __slots__ are pickled as tuples of the values of their slots, and they are unpickled
+    without invoking the constructor.
+
+    Attributes
+    ----------
+    counters : tuple of str
+        The names of the integer attributes that are summed when individuals are aggregated.
+    ratios : dict of (str, (tuple of str, tuple of str))
+        The names of the ratio attributes, and the names of the counters that are summed in the
+        numerators, and in the denominators of the ratios.
     """
+    __slots__ = ()
+    counters = ()
+    ratios = {}
+
     def __init__(self, individual, date):
         assert isinstance(individual, Individual)
         assert isinstance(datetime, date)
@@ -72,8 +748,141 @@ class SampledIndividual(Individual):
         """
         return self._date
 
+    def __getattr__(self, attr):
+        ratios = type(self).ratios
+        if attr in ratios:
+            numerators, denominators = ratios[attr]
+            return fraction(
+                sum(getattr(self, numerator) for numerator in numerators),
+                sum(getattr(self, denominator) for denominator in denominators))
+        raise AttributeError("%r object has no attribute %r" % (type(self).__name__, attr))
+
+    def getAttribute(self, attr):
+        """Returns the value of an attribute of the individual.
+
+        Parameters
+        ----------
+        attr : object
+            The name of a stored, or a ratio attribute, or any other key in __dict__.
+
+        Returns
+        -------
+        object
+            The value of the attribute.
+
+        Raises
+        ------
+        KeyError
+            If the individual lacks the attribute.
+        """
+        if isinstance(attr, str):
+            try:
+                return getattr(self, attr)
+            except AttributeError:
+                pass
+        try:
+            return vars(self)[attr]
+        except TypeError:
+            raise KeyError(attr)
+
+    def __reduce__(self):
+        if "__dict__" in dir(type(self)):
+            return (__newobj__, (type(self), ), self.__getstate__())
+        return (
+            __newobj__, (type(self), ),
+            tuple(getattr(self, field) for field in slot_fields(type(self))))
+
+    def __getstate__(self):
+        state = dict(getattr(self, "__dict__", ()))
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                if hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = dict(zip(slot_fields(type(self)), state))
+        for attr, value in state.items():
+            value = _intern(value)
+            if isinstance(attr, str):
+                setattr(self, attr, value)
+            else:
+                self.__dict__[attr] = value
+
     def __lt__(self, other):
         return isinstance(other, SampledIndividual) and self.getDatetime() < other.getDatetime()
 
     def __le__(self, other):
         return isinstance(other, SampledIndividual) and self.getDatetime() <= other.getDatetime()
+
+
+def asof(variables, attr, dates, fill_value=np.nan, dtype=np.float64):
+    """Looks up the values of an attribute of random variables as of datetimes.
+
+    The value of a random variable as of a datetime is the value of the latest individual in its
+    random sample sampled at, or before the datetime, so that no random sample is iterated. The
+    individuals of a Sample are located by bisecting its sample times once per datetime, which
+    takes O(log n) time per random variable, and datetime. For the columnar random samples,
+    whose columns are stored as arrays, the columns of the individuals between the earliest, and
+    the latest datetime are read at once, and the individuals are located by a single vectorized
+    search per random variable.
+
+    Parameters
+    ----------
+    variables : iterable of RandomVariable
+        Random variables.
+    attr : str
+        The name of the attribute.
+    dates : iterable of datetime
+        Datetimes.
+    fill_value : object, optional
+        The value used for random variables with no individual sampled at, or before a datetime.
+        Individuals that lack the attribute are skipped. See .cluster.make_batch.
+    dtype : np.dtype, optional
+        The type of the values.
+
+    Returns
+    -------
+    np.ndarray
+        A matrix of values with a row for every random variable, and a column for every datetime.
+    """
+    variable_list = list(variables)
+    date_list = list(dates)
+    for variable in variable_list:
+        assert isinstance(variable, RandomVariable)
+    for date in date_list:
+        assert isinstance(date, datetime)
+
+    values = np.full((len(variable_list), len(date_list)), fill_value, dtype=dtype)
+    if not date_list:
+        return values
+    date_timestamps = np.array([to_timestamp(date) for date in date_list], dtype=np.int64)
+    earliest = date_list[int(np.argmin(date_timestamps))]
+    latest = date_list[int(np.argmax(date_timestamps))]
+    for row, variable in enumerate(variable_list):
+        sample = variable.sample
+        if isinstance(sample, Sample):
+            with sample._lock:
+                for column, date in enumerate(date_list):
+                    index = bisect_right(sample._dates, date)
+                    while index:
+                        index -= 1
+                        try:
+                            values[row, column] = sample._individuals[index].getAttribute(attr)
+                        except KeyError:
+                            continue
+                        break
+            continue
+        with sample._lock:
+            start = max(sample.bisect_key_right(earliest) - 1, 0)
+            end = sample.bisect_key_right(latest)
+            if not end:
+                continue
+            timestamps, (column, ) = sample.getColumns([attr], start, end)
+        if not len(timestamps):
+            continue
+        indices = np.searchsorted(timestamps, date_timestamps, "right")
+        found = indices > 0
+        values[row, found] = column[indices[found] - 1]
+    return values
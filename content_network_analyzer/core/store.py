@@ -0,0 +1,255 @@
+"""
+Defines a store of the random samples of random variables.
+"""
+
+from logging import getLogger
+from threading import Lock, local
+
+from .packing import pack, unpack
+
+
+LOGGER = getLogger(__name__)
+
+
+class SnapshotStore(object):
+    """This class represents a store that owns the random samples of random variables.
+
+    The random samples are keyed by the class, and by the ID of their random variables, and they
+    are kept until they are removed from the store, or until the store is cleared. Random
+    variables constructed without a store use the active store. A store is active within a with
+    statement in the thread that entered it, and the default store DEFAULT_STORE is active
+    otherwise.
+
+    The store is thread-safe. Random samples are created, and removed under a lock, so that
+    random variables with the same ID constructed concurrently share a single random sample.
+
+    Examples
+    --------
+    >>> with SnapshotStore() as store:
+    ...     track = YouTubeTrack("dQw4w9WgXcQ")
+    >>> track in store
+    True
+    """
+    def __init__(self):
+        self._samples = {}
+        self._lock = Lock()
+
+    def getSample(self, variable_class, id):
+        """Returns the random sample of a random variable, creating it if it does not exist.
+
+        Parameters
+        ----------
+        variable_class : type
+            The class of the random variable.
+        id : str
+            The ID that uniquely identifies the random variable within its class.
+
+        Returns
+        -------
+        .sample.BaseSample
+            The random sample of the random variable.
+        """
+        key = (variable_class, id)
+        sample = self._samples.get(key)
+        if sample is None:
+            with self._lock:
+                sample = self._samples.get(key)
+                if sample is None:
+                    sample = variable_class.sample_class()
+                    self._samples[key] = sample
+        return sample
+
+    def getVariables(self, variable_class=None):
+        """Produces the random variables in the store.
+
+        Parameters
+        ----------
+        variable_class : type or None, optional
+            The class of the random variables. None if all classes.
+
+        Yields
+        ------
+        .sample.RandomVariable
+            The random variables.
+        """
+        with self._lock:
+            keys = list(self._samples)
+        for cls, id in keys:
+            if variable_class is None or cls is variable_class:
+                yield cls(id, store=self)
+
+    def getSamples(self, variable_class=None):
+        """Produces the random samples in the store.
+
+        Parameters
+        ----------
+        variable_class : type or None, optional
+            The class of the random variables. None if all classes.
+
+        Yields
+        ------
+        (type, .sample.BaseSample)
+            The classes of the random variables, and their random samples.
+        """
+        with self._lock:
+            items = list(self._samples.items())
+        for (cls, _), sample in items:
+            if variable_class is None or cls is variable_class:
+                yield (cls, sample)
+
+    def add_many(self, variable_class, records=None, **columns):
+        """Associates snapshots with random variables in the store in bulk.
+
+        Parameters
+        ----------
+        variable_class : type
+            The class of the random variables.
+        records : iterable of tuple or dict, optional
+            The records. See .sample.RandomVariable.add_many.
+        columns : dict of (str, sequence)
+            The columns of the records. See .sample.RandomVariable.add_many.
+
+        Returns
+        -------
+        int
+            The number of snapshots that were inserted into the random samples.
+        """
+        return variable_class.add_many(records, store=self, **columns)
+
+    def checkpoint(self, variable_class=None):
+        """Packs the random samples in the store into a picklable checkpoint.
+
+        Every random sample is packed into compact arrays by .packing.pack under its lock, so
+        that a checkpoint is several times smaller than the pickled individuals.
+
+        Parameters
+        ----------
+        variable_class : type or None, optional
+            The class of the random variables. None if all classes.
+
+        Returns
+        -------
+        list of (type, str, tuple or None)
+            The classes, and the IDs of the random variables, and their packed random samples.
+        """
+        with self._lock:
+            items = list(self._samples.items())
+        checkpoint = []
+        for (cls, id), sample in items:
+            if variable_class is None or cls is variable_class:
+                with sample._lock:
+                    packed = pack(sample, exclude=[cls._variableField()])
+                checkpoint.append((cls, id, packed))
+        return checkpoint
+
+    def restore(self, checkpoint):
+        """Merges the random samples in a checkpoint into the random samples in the store.
+
+        The individuals of every random variable are merged into its random sample in one shot.
+
+        Parameters
+        ----------
+        checkpoint : list of (type, str, tuple or None)
+            A checkpoint. See checkpoint.
+
+        Returns
+        -------
+        int
+            The number of individuals that were inserted into the random samples.
+        """
+        inserted = 0
+        for cls, id, packed in checkpoint:
+            variable = cls(id, store=self)
+            values = {cls._variableField(): variable}
+            with variable.sample._lock:
+                size = len(variable.sample)
+                variable.sample.update(unpack(packed, **values))
+                inserted += len(variable.sample) - size
+        return inserted
+
+    def discard(self, variable):
+        """Removes the random sample of a random variable from the store if it is present.
+
+        Parameters
+        ----------
+        variable : .sample.RandomVariable
+            The random variable.
+        """
+        with self._lock:
+            self._samples.pop((type(variable), variable.getId()), None)
+
+    def clear(self, variable_class=None):
+        """Removes random samples from the store.
+
+        Parameters
+        ----------
+        variable_class : type or None, optional
+            The class of the random variables whose random samples will be removed. None if all
+            classes.
+        """
+        with self._lock:
+            if variable_class is None:
+                self._samples.clear()
+            else:
+                for key in [key for key in self._samples if key[0] is variable_class]:
+                    del self._samples[key]
+
+    def __contains__(self, variable):
+        key = (type(variable), variable.getId())
+        return self._samples.get(key) is variable.sample
+
+    def __iter__(self):
+        return self.getVariables()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __enter__(self):
+        _active_stores().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        active_stores = _active_stores()
+        assert active_stores[-1] is self
+        active_stores.pop()
+
+    def __repr__(self):
+        return "%s(%d random samples)" % (self.__class__.__name__, len(self))
+
+
+DEFAULT_STORE = SnapshotStore()
+_THREAD_STATE = local()
+
+
+def _active_stores():
+    """Returns the stores entered in a with statement in the current thread.
+
+    Returns
+    -------
+    list of SnapshotStore
+        The stores in the order in which they were entered.
+    """
+    if not hasattr(_THREAD_STATE, "stores"):
+        _THREAD_STATE.stores = []
+    return _THREAD_STATE.stores
+
+
+def get_store(store=None):
+    """Returns a store, or the active store.
+
+    Parameters
+    ----------
+    store : SnapshotStore or None, optional
+        A store. None if the active store.
+
+    Returns
+    -------
+    SnapshotStore
+        The store, or the active store if store is None.
+    """
+    assert isinstance(store, SnapshotStore) or store is None
+
+    if store is not None:
+        return store
+    active_stores = _active_stores()
+    return active_stores[-1] if active_stores else DEFAULT_STORE
@@ -0,0 +1,133 @@
+"""
+This module contains unit tests for the cache module.
+"""
+
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from logging import getLogger
+from pathlib import Path
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+
+from .cache import ParseCache, cached, get_cache
+from .store import SnapshotStore
+from ..models import YouTubeTrack
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+HTML_DOCUMENT = Path(__file__).parents[1] / Path("models") / Path("resources") \
+    / Path("youtube-track.html")
+CALLS = []
+
+
+@cached(1)
+def from_text(track, date, f, suffix=""):
+    CALLS.append(date)
+    return YouTubeTrack.Snapshot(track, f.read() + suffix, date, 1, 2, 3)
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        del CALLS[:]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached(self):
+        with ParseCache(self.directory.name) as cache, SnapshotStore():
+            self.assertIs(cache, get_cache())
+            first = from_text(None, SNAPSHOT_DATE, StringIO("title"))
+            track = YouTubeTrack("dQw4w9WgXcQ")
+            date = SNAPSHOT_DATE + timedelta(days=1)
+            second = from_text(track, date, BytesIO(b"title"), suffix="")
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+            self.assertEqual([SNAPSHOT_DATE], CALLS)
+            self.assertEqual(("title", None), (first.title, first.track))
+            self.assertEqual(("title", date, 3), (second.title, second.date, second.dislikes))
+            self.assertEqual([second], list(track.sample))
+
+            from_text(None, SNAPSHOT_DATE, StringIO("title"), "!")
+            from_text(None, SNAPSHOT_DATE, StringIO("other title"))
+            self.assertEqual((1, 3), (cache.hits, cache.misses))
+            self.assertEqual(3, len(cache))
+        self.assertIs(None, get_cache())
+        from_text(None, SNAPSHOT_DATE, StringIO("title"))
+        self.assertEqual(4, len(CALLS))
+
+    def test_from_html(self):
+        for _ in range(2):
+            with ParseCache(self.directory.name) as cache, \
+                    HTML_DOCUMENT.open("rt", encoding="utf8") as f:
+                snapshot = YouTubeTrack.Snapshot.from_html(None, SNAPSHOT_DATE, f)
+                self.assertEqual(
+                    ("Rick Astley - Never Gonna Give You Up (Video)", 447925573),
+                    (snapshot.title, snapshot.views))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+    def test_keywords(self):
+        track = YouTubeTrack("dQw4w9WgXcQ")
+        snapshot = from_text(f=StringIO("title"), date=SNAPSHOT_DATE, track=track, suffix="!")
+        self.assertEqual(("title!", track), (snapshot.title, snapshot.track))
+        for _ in range(2):
+            with ParseCache(self.directory.name) as cache, \
+                    HTML_DOCUMENT.open("rt", encoding="utf8") as f:
+                snapshot = YouTubeTrack.Snapshot.from_html(track=None, date=SNAPSHOT_DATE, f=f)
+                self.assertEqual(447925573, snapshot.views)
+            snapshot = from_text(
+                None, date=SNAPSHOT_DATE, f=StringIO("title"), suffix="!")
+            self.assertEqual("title!", snapshot.title)
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+        self.assertEqual(3, len(CALLS))
+
+    def test_unreadable(self):
+        with ParseCache(self.directory.name) as cache:
+            from_text(None, SNAPSHOT_DATE, StringIO("title"))
+            path, = [path for _, _, path in cache._entries()]
+            path.write_bytes(pickle.dumps(YouTubeTrack.Snapshot).replace(
+                b"content_network_analyzer.models.youtube", b"content_network_analyzer.moved"))
+            with self.assertLogs("content_network_analyzer.core.cache", "WARNING"):
+                snapshot = from_text(None, SNAPSHOT_DATE, StringIO("title"))
+            self.assertEqual("title", snapshot.title)
+            self.assertEqual((0, 2), (cache.hits, cache.misses))
+            self.assertEqual(1, len(cache))
+
+    def test_unpicklable(self):
+        class Unpicklable(object):
+            def __reduce__(self):
+                raise pickle.PicklingError("Unpicklable")
+
+        cache = ParseCache(self.directory.name)
+        with self.assertRaises(pickle.PicklingError):
+            cache.put("00", Unpicklable())
+        self.assertEqual([], list(Path(self.directory.name).glob("*/*")))
+
+    def test_evict(self):
+        with ParseCache(self.directory.name, max_size=4096) as cache:
+            for index in range(100):
+                from_text(None, SNAPSHOT_DATE, StringIO("title %d" % index))
+            self.assertLessEqual(sum(size for _, size, _ in cache._entries()), 4096)
+            self.assertLess(len(cache), 100)
+            from_text(None, SNAPSHOT_DATE, StringIO("title 99"))
+            from_text(None, SNAPSHOT_DATE, StringIO("title 0"))
+            self.assertEqual((1, 101), (cache.hits, cache.misses))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_copy(self):
+        cache = ParseCache(self.directory.name, max_size=4096)
+        with pickle.loads(pickle.dumps(cache)) as copy:
+            for index in range(100):
+                from_text(None, SNAPSHOT_DATE, StringIO("title %d" % index))
+        self.assertEqual(100, len(cache))
+        size = sum(size for _, size, _ in cache._entries())
+        self.assertEqual(size, copy.written)
+        cache.account(copy.written)
+        self.assertLessEqual(sum(size for _, size, _ in cache._entries()), 4096)
+        self.assertLess(len(cache), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+"""
+This module contains unit tests for the cluster module.
+"""
+
+from datetime import datetime, timedelta
+from io import StringIO
+from logging import getLogger
+import unittest
+
+from .cluster import LazyUnion, MaterializedCluster, NamedCluster, optimize
+from .util import to_timestamp
+from ..models import YouTubeTrack
+
+
+Snapshot = YouTubeTrack.Snapshot
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+def make_track(id, *counts):
+    """Creates a YouTube track with one snapshot per hour for every number of views in counts.
+    """
+    track = YouTubeTrack(id)
+    for hour, views in counts:
+        Snapshot(track, id, SNAPSHOT_DATE + timedelta(hours=hour), views, 0, 0)
+    return track
+
+
+class TestLazyUnion(unittest.TestCase):
+    def setUp(self):
+        self.first_track = make_track(self.id() + "-first", (0, 10), (2, 20))
+        self.second_track = make_track(self.id() + "-second", (1, 100), (2, 200), (3, 300))
+        self.third_track = make_track(self.id() + "-third", (3, 1000))
+
+    def test_flatten(self):
+        union = sum([self.first_track, self.second_track, self.third_track])
+        self.assertTrue(isinstance(union, LazyUnion))
+        self.assertEqual(
+            [self.first_track, self.second_track, self.third_track], union.clusters)
+
+    def test_iter(self):
+        union = self.first_track + self.second_track + self.third_track
+        snapshots = list(union)
+        self.assertEqual(
+            [SNAPSHOT_DATE + timedelta(hours=hour) for hour in range(4)],
+            [snapshot.date for snapshot in snapshots])
+        self.assertEqual([10, 110, 220, 1320], [snapshot.views for snapshot in snapshots])
+
+    def test_iter_nested(self):
+        flat = list(LazyUnion(self.first_track, self.second_track, self.third_track))
+        nested = list((self.first_track + self.second_track) + self.third_track)
+        self.assertEqual(
+            [(snapshot.date, snapshot.views) for snapshot in flat],
+            [(snapshot.date, snapshot.views) for snapshot in nested])
+
+    def test_between(self):
+        union = self.first_track + self.second_track + self.third_track
+        mindate = SNAPSHOT_DATE + timedelta(hours=1)
+        maxdate = SNAPSHOT_DATE + timedelta(hours=2)
+        self.assertEqual(
+            [110, 220], [snapshot.views for snapshot in union.between(mindate, maxdate)])
+        self.assertEqual(
+            [snapshot.views for snapshot in union if snapshot.date >= mindate],
+            [snapshot.views for snapshot in union.between(mindate)])
+        self.assertEqual(
+            [snapshot.views for snapshot in MaterializedCluster(union).between(mindate, maxdate)],
+            [snapshot.views for snapshot in union.between(mindate, maxdate)])
+
+    def test_iter_batches(self):
+        union = self.first_track + self.second_track + self.third_track
+        mindate = SNAPSHOT_DATE + timedelta(hours=1)
+        attrs = ["views", "likes / views"]
+        batches = list(union.iter_batches(attrs, batch_size=2, mindate=mindate))
+        self.assertEqual([2, 1], [len(timestamps) for timestamps, _ in batches])
+        snapshots = list(union.between(mindate))
+        self.assertEqual(
+            [to_timestamp(snapshot.date) for snapshot in snapshots],
+            [timestamp for timestamps, _ in batches for timestamp in timestamps])
+        for index, attr in enumerate(attrs):
+            self.assertEqual(
+                [snapshot.getAttribute(attr) for snapshot in snapshots],
+                [value for _, columns in batches for value in columns[index]])
+
+    def test_resample(self):
+        union = self.first_track + self.second_track + self.third_track
+        timestamps, (views, ) = union.resample(timedelta(hours=1), ["views"])
+        self.assertEqual(
+            [to_timestamp(SNAPSHOT_DATE.replace(minute=0, second=0) + timedelta(hours=hour))
+             for hour in range(1, 4)],
+            list(timestamps))
+        self.assertEqual([10, 110, 220], list(views))
+        timestamps, (views, ) = union.resample(
+            timedelta(hours=2), ["views"], mindate=SNAPSHOT_DATE + timedelta(hours=1))
+        self.assertEqual(1, len(timestamps))
+        self.assertEqual([110], list(views))
+        timestamps, (views, ) = self.second_track.resample(timedelta(hours=1), ["views"])
+        self.assertEqual([100, 200], list(views))
+
+    def test_explain(self):
+        union = NamedCluster("test", self.first_track + self.second_track) + self.third_track
+        f = StringIO()
+        union.explain(file=f)
+        lines = f.getvalue().splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[0].startswith("LazyUnion(depth 2, 3 members, 2 merged clusters)"))
+        self.assertTrue(lines[1].startswith("  YouTubeTrack("))
+        self.assertTrue(lines[1].endswith("with 2 individuals"))
+
+    def test_instrument(self):
+        union = self.first_track + self.second_track + self.third_track
+        statistics = {}
+        snapshots = list(union.instrument(statistics))
+        self.assertEqual(len(list(union)), len(snapshots))
+        self.assertEqual(len(snapshots), statistics[id(union)].individuals)
+        self.assertEqual(4, statistics[id(union)].additions)
+        self.assertEqual(3, statistics[id(self.second_track)].individuals)
+
+    def test_iter_empty(self):
+        self.assertEqual([], list(LazyUnion()))
+        self.assertEqual([], list(LazyUnion(YouTubeTrack("test-cluster-empty"))))
+
+
+class TestMaterializedCluster(unittest.TestCase):
+    def setUp(self):
+        self.first_track = make_track(self.id() + "-first", (0, 10), (2, 20))
+        self.second_track = make_track(self.id() + "-second", (1, 100))
+        self.cluster = MaterializedCluster(self.first_track + self.second_track)
+
+    def test_iter(self):
+        self.assertEqual([10, 110, 120], [snapshot.views for snapshot in self.cluster])
+
+    def test_cached(self):
+        first_snapshots = list(self.cluster)
+        second_snapshots = list(self.cluster)
+        self.assertEqual(len(first_snapshots), len(second_snapshots))
+        for first_snapshot, second_snapshot in zip(first_snapshots, second_snapshots):
+            self.assertTrue(first_snapshot is second_snapshot)
+
+    def test_invalidated(self):
+        list(self.cluster)
+        version = self.second_track.getVersion()
+        Snapshot(self.second_track, "test", SNAPSHOT_DATE + timedelta(hours=3), 200, 0, 0)
+        self.assertEqual(version + 1, self.second_track.getVersion())
+        self.assertEqual([10, 110, 120, 220], [snapshot.views for snapshot in self.cluster])
+
+    def test_backfilled(self):
+        list(self.cluster)
+        Snapshot(self.first_track, "test", SNAPSHOT_DATE + timedelta(hours=1), 15, 0, 0)
+        Snapshot(self.second_track, "test", SNAPSHOT_DATE + timedelta(minutes=30), 50, 0, 0)
+        self.assertEqual([10, 60, 115, 120], [snapshot.views for snapshot in self.cluster])
+        self.assertEqual(
+            [snapshot.views for snapshot in self.first_track + self.second_track],
+            [snapshot.views for snapshot in self.cluster])
+
+    def test_concurrent_write(self):
+        list(self.cluster)
+        Snapshot(self.first_track, "test", SNAPSHOT_DATE + timedelta(hours=3), 30, 0, 0)
+        writes = [(self.first_track, "test", SNAPSHOT_DATE + timedelta(minutes=30), 15, 0, 0)]
+
+        class InvalidationLock(object):
+            """Writes a snapshot right after the first release of the invalidation lock.
+            """
+            def __init__(self, lock):
+                self._lock = lock
+
+            def __enter__(self):
+                return self._lock.__enter__()
+
+            def __exit__(self, *args):
+                self._lock.__exit__(*args)
+                if writes:
+                    Snapshot(*writes.pop())
+
+        self.cluster._invalidation_lock = InvalidationLock(self.cluster._invalidation_lock)
+        list(self.cluster)
+        self.assertFalse(writes)
+        self.assertEqual(
+            [snapshot.views for snapshot in self.first_track + self.second_track],
+            [snapshot.views for snapshot in self.cluster])
+
+    def test_variables(self):
+        self.assertEqual([self.first_track, self.second_track], list(self.cluster.getVariables()))
+
+
+class TestOptimize(unittest.TestCase):
+    def setUp(self):
+        self.first_track = make_track(self.id() + "-first", (0, 10), (2, 20))
+        self.second_track = make_track(self.id() + "-second", (1, 100))
+        self.third_track = make_track(self.id() + "-third", (3, 1000))
+        self.genre = NamedCluster("genre", self.first_track + self.second_track)
+        self.artist = NamedCluster("artist", self.second_track + self.third_track)
+
+    def test_deduplicate(self):
+        union = self.genre + self.artist + YouTubeTrack(self.id() + "-first")
+        self.assertEqual(
+            [self.first_track, self.second_track, self.third_track], union.getMembers())
+        self.assertEqual([10, 110, 120, 1120], [snapshot.views for snapshot in union])
+        optimized_union = union.optimize()
+        self.assertTrue(isinstance(optimized_union, LazyUnion))
+        self.assertEqual(3, len(optimized_union.clusters))
+        self.assertEqual(
+            [snapshot.views for snapshot in union],
+            [snapshot.views for snapshot in optimized_union])
+
+    def test_share(self):
+        clusters = [
+            NamedCluster("first", self.genre + self.third_track),
+            NamedCluster("second", self.genre),
+            NamedCluster("third", self.first_track + self.second_track)]
+        optimized_clusters = optimize(clusters)
+        self.assertEqual(
+            [cluster.getName() for cluster in clusters],
+            [cluster.getName() for cluster in optimized_clusters])
+        shared_cluster = optimized_clusters[1]._cluster
+        self.assertTrue(isinstance(shared_cluster, MaterializedCluster))
+        self.assertTrue(optimized_clusters[2]._cluster is shared_cluster)
+        self.assertTrue(shared_cluster in optimized_clusters[0]._cluster.clusters)
+        for cluster, optimized_cluster in zip(clusters, optimized_clusters):
+            self.assertEqual(
+                [snapshot.views for snapshot in cluster],
+                [snapshot.views for snapshot in optimized_cluster])
+
+
+if __name__ == '__main__':
+    unittest.main()
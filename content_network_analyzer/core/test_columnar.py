@@ -0,0 +1,141 @@
+"""
+This module contains unit tests for the columnar module.
+"""
+
+from datetime import datetime, timedelta
+from logging import getLogger
+import pickle
+import unittest
+
+from .columnar import ColumnarSample, CompressedSample
+from .sample import Sample
+from .util import to_timestamp
+from ..models import YouTubeTrack
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+class TestColumnarSample(unittest.TestCase):
+    def setUp(self):
+        self.sample_class = YouTubeTrack.sample_class
+        YouTubeTrack.sample_class = ColumnarSample
+        self.track = YouTubeTrack(self.id())
+        for hour, views in ((0, 10), (2, 30), (1, 20), (2, 40)):
+            YouTubeTrack.Snapshot(
+                self.track, "title %d" % hour, SNAPSHOT_DATE + timedelta(hours=hour), views, 5, 0)
+
+    def tearDown(self):
+        YouTubeTrack.sample_class = self.sample_class
+
+    def test_sorted(self):
+        self.assertTrue(isinstance(self.track.sample, ColumnarSample))
+        self.assertEqual(3, len(self.track.sample))
+        self.assertEqual([10, 20, 30], [snapshot.views for snapshot in self.track])
+        self.assertEqual("title 2", self.track.getName())
+        self.assertEqual(self.track, self.track.sample[-1].track)
+        self.assertEqual(0.25, self.track.sample[1].getAttribute("likes / views"))
+
+    def test_between(self):
+        mindate = SNAPSHOT_DATE + timedelta(hours=1)
+        self.assertEqual([20, 30], [snapshot.views for snapshot in self.track.between(mindate)])
+        self.assertEqual(10, self.track._before(mindate).views)
+        self.assertTrue(self.track.sample[0] in self.track.sample)
+
+    def test_columns(self):
+        timestamps, (views, ratios) = self.track.sample.getColumns(["views", "likes / views"], 1)
+        self.assertEqual(
+            [to_timestamp(SNAPSHOT_DATE + timedelta(hours=hour)) for hour in (1, 2)],
+            list(timestamps))
+        self.assertEqual([20, 30], list(views))
+        self.assertEqual([0.25, 5 / 30], list(ratios))
+        union = self.track + YouTubeTrack(self.id() + "-empty")
+        self.assertEqual(
+            [snapshot.views for snapshot in union],
+            [value for _, (views, ) in union.iter_batches(["views"]) for value in views])
+
+    def test_modified(self):
+        version = self.track.getVersion()
+        del self.track.sample[0]
+        self.assertEqual(version + 1, self.track.getVersion())
+        self.assertEqual([20, 30], [snapshot.views for snapshot in self.track])
+        self.track.sample.clear()
+        self.assertEqual([], list(self.track))
+
+    def test_update(self):
+        version = self.track.getVersion()
+        self.track.sample.update([
+            YouTubeTrack.Snapshot(
+                None, "title %d" % hour, SNAPSHOT_DATE + timedelta(hours=hour), views, 5, 0)
+            for hour, views in ((4, 50), (-1, 0), (1, 25), (3, 35), (3, 36))])
+        self.assertEqual(version + 1, self.track.getVersion())
+        self.assertEqual([0, 10, 20, 30, 35, 50], [snapshot.views for snapshot in self.track])
+        self.assertEqual(
+            ["title -1", "title 0", "title 1", "title 2", "title 3", "title 4"],
+            [snapshot.title for snapshot in self.track])
+
+    def test_pickle(self):
+        sample = pickle.loads(pickle.dumps(self.track.sample))
+        self.assertEqual(
+            [snapshot.views for snapshot in self.track],
+            [snapshot.views for snapshot in sample])
+
+
+class TestCompressedSample(unittest.TestCase):
+    def setUp(self):
+        self.track = YouTubeTrack(self.id())
+        self.sample = CompressedSample(block_size=4)
+        for hour in (5, 0, 1, 2, 3, 4, 8, 6, 7, 9, 10, 11, 2, 12):
+            snapshot = YouTubeTrack.Snapshot(
+                self.track, "title %d" % (hour // 4), SNAPSHOT_DATE + timedelta(hours=hour),
+                hour * 10, hour, 0)
+            self.sample.add(snapshot)
+
+    def test_compressed(self):
+        self.assertEqual(3, len(self.sample._blocks))
+        self.assertTrue(isinstance(self.track.sample, Sample))
+        self.assertEqual(
+            [(snapshot.date, snapshot.views, snapshot.title) for snapshot in self.track],
+            [(snapshot.date, snapshot.views, snapshot.title) for snapshot in self.sample])
+        self.assertEqual("title 3", self.sample[-1].title)
+        self.assertEqual(
+            [snapshot.views for snapshot in self.track.sample[3:11]],
+            [snapshot.views for snapshot in self.sample[3:11]])
+
+    def test_between(self):
+        mindate = SNAPSHOT_DATE + timedelta(hours=3, minutes=30)
+        maxdate = SNAPSHOT_DATE + timedelta(hours=9)
+        self.assertEqual(4, self.sample.bisect_key_left(mindate))
+        self.assertEqual(10, self.sample.bisect_key_right(maxdate))
+        self.assertEqual(
+            [40, 50, 60, 70, 80, 90],
+            [snapshot.views for snapshot in self.sample.irange_key(mindate, maxdate)])
+        timestamps, (views, ) = self.sample.getColumns(["views"], 3, 6)
+        self.assertEqual([30, 40, 50], list(views))
+
+    def test_update(self):
+        sample = CompressedSample(block_size=4)
+        for hours in (range(0, 20, 2), range(1, 20, 2)):
+            sample.update(
+                YouTubeTrack.Snapshot(
+                    None, "title", SNAPSHOT_DATE + timedelta(hours=hour), hour, 0, 0)
+                for hour in hours)
+        self.assertEqual(3, len(sample._blocks))
+        self.assertEqual(list(range(20)), [snapshot.views for snapshot in sample])
+        self.assertEqual(19, sample[-1].views)
+
+    def test_modified(self):
+        version = self.sample.version
+        del self.sample[2:9]
+        self.assertEqual(version + 1, self.sample.version)
+        self.assertEqual(
+            [0, 10, 90, 100, 110, 120], [snapshot.views for snapshot in self.sample])
+        self.sample.discard(self.sample[0])
+        self.assertEqual(5, len(self.sample))
+        self.sample.clear()
+        self.assertEqual([], list(self.sample))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+This module contains unit tests for the extraction module.
+"""
+
+from io import BytesIO, StringIO
+from logging import getLogger
+from re import compile
+import unittest
+
+from .extraction import Extractor, Field
+from .parsing import PARSERS, get_parser, set_default_parser
+
+
+LOGGER = getLogger(__name__)
+HTML_DOCUMENT = """
+<html><head><meta property="og:title" content="Title"><meta name="keywords" content=""></head>
+<body>
+<div class="main post"><span class="count">1 view</span><span>2 votes</span><br>
+<ul><li>a</li><li>b</li><li>c</li></ul></div>
+<div class="main"><span class="count">3 views</span></div>
+<p>%s</p>
+</body>
+</html>
+"""
+EXTRACTOR = Extractor({
+    "title": Field('meta[property="og:title"]', attr="content"),
+    "keywords": Field('meta[name="keywords"]', attr="content"),
+    "views": Field("div.main span.count", converter=lambda text: int(text.split()[0])),
+    "votes": Field("div span", text=compile(r"votes")),
+    "items": Field("div.post ul li", many=True),
+    "subtitle": Field("h2", default=None),
+})
+EXPECTED_VALUES = {
+    "title": "Title",
+    "keywords": "",
+    "views": 1,
+    "votes": "2 votes",
+    "items": ["a", "b", "c"],
+    "subtitle": None,
+}
+
+
+class TestExtractor(unittest.TestCase):
+    def test_extract(self):
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                f = StringIO(HTML_DOCUMENT % "")
+                values = EXTRACTOR.extract(f, parser, streaming=False)
+                self.assertEqual(EXPECTED_VALUES, values)
+        for chunk_size in (1, 7, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                f = StringIO(HTML_DOCUMENT % "")
+                values = EXTRACTOR.extract(f, chunk_size=chunk_size)
+                self.assertEqual(EXPECTED_VALUES, values)
+
+    def test_early_stop(self):
+        content = HTML_DOCUMENT % ("lorem ipsum " * 10**4)
+        f = StringIO(content)
+        extractor = Extractor(dict(
+            (name, field) for name, field in EXTRACTOR.fields.items() if name != "subtitle"))
+        values = extractor.extract(f, chunk_size=64)
+        self.assertEqual(["a", "b", "c"], values["items"])
+        self.assertLess(f.tell(), len(content) / 10)
+
+    def test_stop(self):
+        content = HTML_DOCUMENT % ("lorem ipsum " * 10**4)
+        extractor = Extractor({
+            "title": Field('meta[property="og:title"]', attr="content", stop="body"),
+            "keywords": Field('meta[name="keywords"]', attr="content", stop="body")})
+        f = StringIO(content)
+        self.assertEqual({"title": "Title", "keywords": ""}, extractor.extract(f, chunk_size=64))
+        self.assertLess(f.tell(), 1000)
+
+        content = content.replace(
+            '<meta name="keywords" content="">', "").replace(
+            "</body>", '<meta name="keywords" content="late"></body>')
+        extractor.fields["keywords"].default = None
+        values, _ = extractor._stream(StringIO(content), 64)
+        self.assertIs(None, values)
+        values = extractor.extract(StringIO(content), chunk_size=64)
+        self.assertEqual({"title": "Title", "keywords": "late"}, values)
+
+    def test_fallback(self):
+        extractor = Extractor({"votes": Field("span", text=compile(r"votes"))})
+        f = StringIO(HTML_DOCUMENT.replace("2 votes", "<b>2</b> votes") % "")
+        self.assertEqual({"votes": "2 votes"}, extractor.extract(f, chunk_size=16))
+        f = BytesIO((HTML_DOCUMENT % "").encode("utf8"))
+        self.assertEqual(EXPECTED_VALUES, EXTRACTOR.extract(f))
+        with self.assertRaises(AssertionError):
+            Extractor({"subtitle": Field("h2")}).extract(StringIO(HTML_DOCUMENT % ""))
+
+    def test_streaming_default(self):
+        content = HTML_DOCUMENT % ("lorem ipsum " * 10**4)
+        extractor = Extractor(dict(
+            (name, field) for name, field in EXTRACTOR.fields.items() if name != "subtitle"))
+        f = StringIO(content)
+        values = extractor.extract(f, "html.parser", chunk_size=64)
+        self.assertEqual(["a", "b", "c"], values["items"])
+        self.assertLess(f.tell(), len(content) / 10)
+        f = StringIO(content)
+        values = extractor.extract(f, "lxml.html", chunk_size=64)
+        self.assertEqual(["a", "b", "c"], values["items"])
+        self.assertEqual(len(content), f.tell())
+        default_parser = get_parser()
+        set_default_parser("lxml")
+        try:
+            f = StringIO(content)
+            self.assertEqual(["a", "b", "c"], extractor.extract(f, chunk_size=64)["items"])
+            self.assertEqual(len(content), f.tell())
+        finally:
+            set_default_parser(default_parser)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+This module contains unit tests for the parallel module.
+"""
+
+from datetime import datetime, timedelta
+from logging import getLogger
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from .cache import ParseCache
+from .parallel import aggregate_parallel, ingest_parallel
+from .store import SnapshotStore
+from ..models import YouTubeTrack
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+HTML_DOCUMENT = Path(__file__).parents[1] / Path("models") / Path("resources") \
+    / Path("youtube-track.html")
+
+
+class TestAggregateParallel(unittest.TestCase):
+    def setUp(self):
+        self.tracks = []
+        for index in range(5):
+            track = YouTubeTrack("%s-%d" % (self.id(), index))
+            for hour in range(index, 8, 2):
+                YouTubeTrack.Snapshot(
+                    track, "track", SNAPSHOT_DATE + timedelta(hours=hour), 10**index * hour, 0, 0)
+            self.tracks.append(track)
+        self.cluster = sum(self.tracks)
+
+    def test_aggregate(self):
+        snapshots = aggregate_parallel(self.cluster, processes=2)
+        self.assertEqual(
+            [(snapshot.date, snapshot.views) for snapshot in self.cluster],
+            [(snapshot.date, snapshot.views) for snapshot in snapshots])
+        self.assertIs(self.tracks[0].sample, snapshots[0].track.sample)
+
+    def test_aggregate_between(self):
+        mindate = SNAPSHOT_DATE + timedelta(hours=3)
+        maxdate = SNAPSHOT_DATE + timedelta(hours=6)
+        snapshots = aggregate_parallel(self.cluster, 3, mindate, maxdate)
+        expected_snapshots = self.cluster.between(mindate, maxdate)
+        self.assertEqual(
+            [(snapshot.date, snapshot.views) for snapshot in expected_snapshots],
+            [(snapshot.date, snapshot.views) for snapshot in snapshots])
+
+    def test_aggregate_combined(self):
+        tracks = []
+        for index in range(11):
+            track = YouTubeTrack("%s-%d" % (self.id(), index))
+            for hour in range(index % 3, 12, index % 4 + 1):
+                YouTubeTrack.Snapshot(
+                    track, "track", SNAPSHOT_DATE + timedelta(hours=hour), index + hour, hour, 0)
+            tracks.append(track)
+        cluster = sum(tracks)
+        snapshots = aggregate_parallel(cluster, processes=5)
+        self.assertEqual(
+            [(snapshot.date, snapshot.views, snapshot.likes) for snapshot in cluster],
+            [(snapshot.date, snapshot.views, snapshot.likes) for snapshot in snapshots])
+
+
+class TestIngestParallel(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        content = HTML_DOCUMENT.read_text(encoding="utf8")
+        for index in range(6):
+            path = Path(self.directory.name) / Path("track-%d" % (index % 2))
+            path.mkdir(exist_ok=True)
+            path = path / Path("%d.html" % (5 - index))
+            path.write_text(content.replace("447 925 573", str(index)), encoding="utf8")
+        path = Path(self.directory.name) / Path("track-0") / Path("6.html")
+        path.write_text("<html></html>", encoding="utf8")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def mapping(path):
+        return (path.parent.name, SNAPSHOT_DATE + timedelta(hours=int(path.stem)))
+
+    def test_ingest(self):
+        for processes in (1, 2):
+            with self.subTest(processes=processes), SnapshotStore() as store:
+                with self.assertLogs("content_network_analyzer.core.parallel", "WARNING"):
+                    inserted = ingest_parallel(
+                        YouTubeTrack, self.directory.name, self.mapping, processes=processes,
+                        batch_size=2, chunk_size=2, parser="lxml.html")
+                self.assertEqual(6, inserted)
+                self.assertEqual(2, len(store))
+                track = YouTubeTrack("track-0", store=store)
+                self.assertEqual(
+                    [(SNAPSHOT_DATE + timedelta(hours=hour), views) for hour, views in [
+                        (1, 4), (3, 2), (5, 0)]],
+                    [(snapshot.date, snapshot.views) for snapshot in track.sample])
+                self.assertEqual("track-0", next(iter(track.sample)).track.getId())
+
+    def test_ingest_cached(self):
+        with TemporaryDirectory() as directory:
+            cache = ParseCache(directory)
+            for _ in range(2):
+                with SnapshotStore() as store, self.assertLogs(
+                        "content_network_analyzer.core.parallel", "WARNING"):
+                    inserted = ingest_parallel(
+                        YouTubeTrack, self.directory.name, self.mapping, processes=2,
+                        chunk_size=1, cache=cache)
+                    self.assertEqual(6, inserted)
+                    self.assertEqual(2, len(store))
+                    self.assertEqual(6, len(cache))
+                    self.assertEqual(
+                        sum(size for _, size, _ in cache._entries()), cache._size)
+
+    def test_ingest_glob(self):
+        with SnapshotStore() as store:
+            inserted = ingest_parallel(
+                YouTubeTrack, str(Path(self.directory.name) / Path("track-1") / Path("[0-5].html")),
+                self.mapping, processes=1)
+            self.assertEqual(3, inserted)
+            self.assertEqual(["track-1"], [variable.getId() for variable in store])
+
+
+if __name__ == '__main__':
+    unittest.main()
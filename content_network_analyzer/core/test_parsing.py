@@ -0,0 +1,48 @@
+"""
+This module contains unit tests for the parsing module.
+"""
+
+from io import StringIO
+from logging import getLogger
+from re import compile
+import unittest
+
+from .parsing import PARSERS, get_parser, parse_html, set_default_parser
+
+
+LOGGER = getLogger(__name__)
+HTML_DOCUMENT = """
+<html><head><meta property="og:title" content="Title"></head>
+<body><div class="main post"><span class="count">1 view</span><span>2 votes</span></div></body>
+</html>
+"""
+
+
+class TestParseHTML(unittest.TestCase):
+    def test_select(self):
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                document = parse_html(StringIO(HTML_DOCUMENT), parser)
+                title_element = document.select_one('meta[property="og:title"]')
+                self.assertEqual("Title", title_element["content"])
+                self.assertEqual("main post", document.select_one("div.post").get("class"))
+                self.assertEqual("1 view2 votes", document.select_one("div.main").text)
+                self.assertEqual(
+                    "2 votes", document.select_one("div span", text=compile(r"votes")).text)
+                self.assertEqual(2, len(document.select("div.main span")))
+                self.assertEqual(None, document.select_one("h1"))
+                with self.assertRaises(KeyError):
+                    document.select_one("span")["content"]
+
+    def test_default_parser(self):
+        self.assertEqual("html.parser", get_parser())
+        set_default_parser("lxml.html")
+        try:
+            self.assertEqual("lxml.html", get_parser())
+            self.assertEqual("lxml", get_parser("lxml"))
+        finally:
+            set_default_parser("html.parser")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+This module contains unit tests for the retention module.
+"""
+
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+import os
+from threading import Thread
+import time
+from time import sleep
+import unittest
+
+from .columnar import CompressedSample
+from .cluster import MaterializedCluster
+from .retention import Compactor, RetentionPolicy
+from .store import SnapshotStore
+from ..models import YouTubeTrack
+
+
+LOGGER = getLogger(__name__)
+NOW = datetime(2018, 5, 29, 16, 0, 0)
+POLICY = RetentionPolicy([
+    (timedelta(days=1), None),
+    (timedelta(days=3), timedelta(hours=6)),
+    (None, timedelta(days=1))])
+
+
+def make_track(id, store=None):
+    """Creates a YouTube track with one snapshot per hour over the five days before NOW.
+    """
+    track = YouTubeTrack(id, store)
+    for hour in range(5 * 24):
+        YouTubeTrack.Snapshot(
+            track, id, NOW - timedelta(hours=5 * 24 - hour - 1), hour, 0, 0)
+    return track
+
+
+class TestRetentionPolicy(unittest.TestCase):
+    def setUp(self):
+        self.track = make_track(self.id())
+
+    def test_compact(self):
+        cluster = MaterializedCluster(self.track + make_track(self.id() + "-other"))
+        list(cluster)
+        deleted = POLICY.compact(self.track.sample, NOW)
+        self.assertEqual(len(self.track.sample), 5 * 24 - deleted)
+        snapshots = list(self.track)
+        self.assertEqual(0, snapshots[0].views)
+        self.assertEqual(5 * 24 - 1, snapshots[-1].views)
+        recent = [snapshot for snapshot in snapshots if snapshot.date > NOW - timedelta(days=1)]
+        self.assertEqual(24, len(recent))
+        coarse = [
+            snapshot for snapshot in snapshots
+            if NOW - timedelta(days=3) < snapshot.date <= NOW - timedelta(days=1)]
+        self.assertEqual(9, len(coarse))
+        self.assertEqual(
+            [snapshot.views for snapshot in self.track + YouTubeTrack(self.id() + "-other")],
+            [snapshot.views for snapshot in cluster])
+        self.assertEqual(0, POLICY.compact(self.track.sample, NOW))
+
+    @unittest.skipUnless(hasattr(time, "tzset"), "Requires time.tzset")
+    def test_naive_now(self):
+        track = YouTubeTrack(self.id() + "-naive")
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for views, age in enumerate((
+                timedelta(days=10), timedelta(minutes=61), timedelta(minutes=60),
+                timedelta(minutes=1))):
+            YouTubeTrack.Snapshot(track, "track", now - age, views, 0, 0)
+        policy = RetentionPolicy([(timedelta(hours=2), None), (None, timedelta(days=1))])
+        tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Etc/GMT-5"
+        time.tzset()
+        try:
+            self.assertEqual(0, policy.compact(track.sample))
+        finally:
+            if tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = tz
+            time.tzset()
+        self.assertEqual(4, len(track.sample))
+
+    def test_compressed(self):
+        sample = CompressedSample(self.track.sample, block_size=16)
+        self.assertEqual(POLICY.compact(self.track.sample, NOW), POLICY.compact(sample, NOW))
+        self.assertEqual(
+            [snapshot.date for snapshot in self.track], [snapshot.date for snapshot in sample])
+
+    def test_concurrent(self):
+        track = YouTubeTrack(self.id() + "-concurrent")
+        hours = list(range(5 * 24))
+        for hour in hours[::2]:
+            YouTubeTrack.Snapshot(track, "track", NOW - timedelta(hours=hour), hour, 0, 0)
+
+        def backfill():
+            for hour in hours[1::2]:
+                YouTubeTrack.Snapshot(track, "track", NOW - timedelta(hours=hour), hour, 0, 0)
+                sleep(0)
+
+        thread = Thread(target=backfill)
+        thread.start()
+        while thread.is_alive():
+            POLICY.compact(track.sample, NOW)
+        thread.join()
+        POLICY.compact(track.sample, NOW)
+        POLICY.compact(self.track.sample, NOW)
+        self.assertEqual(
+            [snapshot.date for snapshot in self.track], [snapshot.date for snapshot in track])
+
+    def test_expire(self):
+        policy = RetentionPolicy([(timedelta(days=1), None)])
+        self.assertEqual(5 * 24 - 24 - 1, policy.compact(self.track.sample, NOW))
+        self.assertEqual(0, self.track.sample[0].views)
+
+
+class TestCompactor(unittest.TestCase):
+    def setUp(self):
+        self.store = SnapshotStore()
+        self.track = make_track(self.id(), self.store)
+        YouTubeTrack.retention = POLICY
+
+    def tearDown(self):
+        YouTubeTrack.retention = None
+
+    def test_step(self):
+        compactor = Compactor(self.store)
+        self.assertTrue(compactor.step(NOW) > 0)
+        self.assertEqual(0, self.track.compact(NOW))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+"""
+This module contains unit tests for the sample module.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from logging import getLogger
+import pickle
+import random
+import sys
+from threading import Thread
+import unittest
+
+import numpy as np
+
+from .cluster import MaterializedCluster
+from .columnar import ColumnarSample, CompressedSample
+from .sample import Sample, asof
+from .store import SnapshotStore
+from ..models import YouTubeTrack, WattPadBook
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+class TestSample(unittest.TestCase):
+    def setUp(self):
+        self.track = YouTubeTrack(self.id())
+        self.snapshots = [
+            YouTubeTrack.Snapshot(
+                self.track, "track", SNAPSHOT_DATE + timedelta(hours=hour), views, 0, 0)
+            for hour, views in ((0, 10), (2, 30), (1, 20))]
+
+    def test_sorted(self):
+        sample = self.track.sample
+        self.assertTrue(isinstance(sample, Sample))
+        self.assertEqual([10, 20, 30], [snapshot.views for snapshot in sample])
+        self.assertEqual(30, sample[-1].views)
+        self.assertEqual([20, 30], [snapshot.views for snapshot in sample[1:]])
+        self.assertEqual(1, sample.bisect_key_left(SNAPSHOT_DATE + timedelta(hours=1)))
+        self.assertEqual(2, sample.bisect_key_right(SNAPSHOT_DATE + timedelta(hours=1)))
+
+    def test_duplicate(self):
+        sample = self.track.sample
+        version = sample.version
+        sample.add(self.snapshots[1])
+        YouTubeTrack.Snapshot(self.track, "track", SNAPSHOT_DATE, 15, 0, 0)
+        self.assertEqual(version, sample.version)
+        self.assertEqual([10, 20, 30], [snapshot.views for snapshot in sample])
+        self.assertTrue(self.snapshots[0] in sample)
+
+    def test_modified(self):
+        sample = Sample(self.snapshots)
+        version = sample.version
+        sample.discard(self.snapshots[2])
+        self.assertEqual(version + 1, sample.version)
+        self.assertEqual([10, 30], [snapshot.views for snapshot in sample])
+        sample -= [self.snapshots[0]]
+        self.assertEqual([30], [snapshot.views for snapshot in sample])
+        self.assertEqual(30, sample.pop().views)
+        self.assertFalse(sample)
+
+    def test_late_insert(self):
+        sample = self.track.sample
+        individuals = sample._individuals
+        YouTubeTrack.Snapshot(self.track, "track", SNAPSHOT_DATE + timedelta(minutes=30), 15, 0, 0)
+        self.assertTrue(sample._individuals is individuals)
+        iterator = iter(sample)
+        self.assertEqual(10, next(iterator).views)
+        YouTubeTrack.Snapshot(self.track, "track", SNAPSHOT_DATE + timedelta(minutes=10), 12, 0, 0)
+        self.assertEqual([15, 20, 30], [snapshot.views for snapshot in iterator])
+        self.assertEqual([10, 12, 15, 20, 30], [snapshot.views for snapshot in sample])
+
+
+class TestAddMany(unittest.TestCase):
+    def setUp(self):
+        self.track = YouTubeTrack(self.id())
+        YouTubeTrack.Snapshot(self.track, "track", SNAPSHOT_DATE + timedelta(hours=2), 20, 0, 0)
+
+    def test_records(self):
+        version = self.track.getVersion()
+        inserted = YouTubeTrack.add_many([
+            (self.id(), "track", SNAPSHOT_DATE + timedelta(hours=3), 30, 0, 0),
+            {"track": self.id(), "title": "track", "date": SNAPSHOT_DATE, "views": 0,
+             "likes": 0, "dislikes": 0},
+            (self.id(), "track", SNAPSHOT_DATE + timedelta(hours=2), 20, 0, 0),
+            (self.id() + "-other", "other", SNAPSHOT_DATE, 5, 0, 0)])
+        self.assertEqual(3, inserted)
+        self.assertEqual(version + 1, self.track.getVersion())
+        self.assertEqual([0, 20, 30], [snapshot.views for snapshot in self.track])
+        self.assertEqual(self.track, self.track.sample[0].track)
+        self.assertEqual(1, len(YouTubeTrack(self.id() + "-other").sample))
+
+    def test_columns(self):
+        hours = np.array([5, 1, 4, 1, 3])
+        inserted = YouTubeTrack.add_many(
+            track=[self.id()] * len(hours), title=["track"] * len(hours),
+            date=[SNAPSHOT_DATE + timedelta(hours=int(hour)) for hour in hours],
+            views=hours * 10, likes=np.zeros_like(hours), dislikes=np.zeros_like(hours))
+        self.assertEqual(4, inserted)
+        self.assertEqual([10, 20, 30, 40, 50], [snapshot.views for snapshot in self.track])
+
+    def test_invalid(self):
+        with self.assertRaises(AssertionError):
+            YouTubeTrack.add_many([
+                (self.id(), "track", SNAPSHOT_DATE, 0, 0, 0),
+                (self.id(), "track", SNAPSHOT_DATE, 1.5, 0, 0)])
+        self.assertEqual([20], [snapshot.views for snapshot in self.track])
+
+
+class TestConcurrentIngestion(unittest.TestCase):
+    def setUp(self):
+        self.hours = list(range(2000))
+        random.Random(42).shuffle(self.hours)
+
+    def ingest(self, track, reader):
+        def add(hours):
+            for hour in hours:
+                YouTubeTrack.Snapshot(
+                    track, "track", SNAPSHOT_DATE + timedelta(hours=hour), hour, 0, 0)
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(add, self.hours[index::4]) for index in range(4)]
+            while not all(future.done() for future in futures):
+                dates = [snapshot.date for snapshot in reader]
+                self.assertEqual(sorted(dates), dates)
+            for future in futures:
+                future.result()
+
+    def test_sample(self):
+        track = YouTubeTrack(self.id())
+        self.ingest(track, MaterializedCluster(track + YouTubeTrack(self.id() + "-empty")))
+        self.assertEqual(sorted(self.hours), [snapshot.views for snapshot in track])
+
+    def test_compressed(self):
+        sample_class = YouTubeTrack.sample_class
+        YouTubeTrack.sample_class = CompressedSample
+        try:
+            track = YouTubeTrack(self.id())
+        finally:
+            YouTubeTrack.sample_class = sample_class
+        self.ingest(track, track)
+        self.assertEqual(sorted(self.hours), [snapshot.views for snapshot in track])
+
+    def test_before(self):
+        track = YouTubeTrack(self.id())
+        for hour in (0, 2):
+            YouTubeTrack.Snapshot(track, "track", SNAPSHOT_DATE + timedelta(hours=hour), hour, 0, 0)
+        sample = track.sample
+        bisect_key_left = sample.bisect_key_left
+
+        def late_bisect_key_left(date):
+            index = bisect_key_left(date)
+            late = Thread(target=YouTubeTrack.Snapshot, args=(
+                track, "track", SNAPSHOT_DATE - timedelta(hours=1), -1, 0, 0))
+            late.start()
+            late.join(0.1)
+            threads.append(late)
+            return index
+
+        threads = []
+        sample.bisect_key_left = late_bisect_key_left
+        self.assertEqual(0, track._before(SNAPSHOT_DATE + timedelta(hours=1)).views)
+        timestamps, (views, ) = next(track.iter_batches(
+            ["views"], mindate=SNAPSHOT_DATE + timedelta(hours=1)))
+        self.assertEqual([2], views.tolist())
+        for thread in threads:
+            thread.join()
+        self.assertEqual([-1, 0, 2], [snapshot.views for snapshot in track])
+
+
+class TestAsOf(unittest.TestCase):
+    def setUp(self):
+        self.first_track = YouTubeTrack(self.id() + "-first")
+        self.second_track = YouTubeTrack(self.id() + "-second")
+        for hour, views in ((0, 10), (2, 20)):
+            YouTubeTrack.Snapshot(
+                self.first_track, "first", SNAPSHOT_DATE + timedelta(hours=hour), views, 5, 0)
+        YouTubeTrack.Snapshot(
+            self.second_track, "second", SNAPSHOT_DATE + timedelta(hours=1), 100, 50, 0)
+        self.book = WattPadBook(self.id() + "-book")
+        WattPadBook.Snapshot(self.book, "book", SNAPSHOT_DATE, 40, 10)
+
+    def test_asof(self):
+        dates = [SNAPSHOT_DATE - timedelta(hours=1)] + [
+            SNAPSHOT_DATE + timedelta(hours=hour) for hour in range(3)]
+        views = asof([self.first_track, self.second_track], "views", dates, fill_value=-1)
+        self.assertEqual((2, 4), views.shape)
+        self.assertEqual([[-1, 10, 10, 20], [-1, -1, 100, 100]], views.tolist())
+
+    def test_asof_bisects_sample(self):
+        def getColumns(*args, **kwargs):
+            raise AssertionError("asof reads the columns of a Sample")
+        self.first_track.sample.getColumns = getColumns
+        dates = [SNAPSHOT_DATE + timedelta(hours=hour, minutes=30) for hour in (2, -1, 0)]
+        views = asof([self.first_track], "views", dates, fill_value=-1)
+        self.assertEqual([[20, -1, 10]], views.tolist())
+
+    def test_asof_columnar(self):
+        sample_class = YouTubeTrack.sample_class
+        YouTubeTrack.sample_class = ColumnarSample
+        try:
+            track = YouTubeTrack(self.id())
+        finally:
+            YouTubeTrack.sample_class = sample_class
+        for hour in range(10):
+            YouTubeTrack.Snapshot(track, "track", SNAPSHOT_DATE + timedelta(hours=hour), hour, 0, 0)
+        dates = [SNAPSHOT_DATE + timedelta(hours=hour, minutes=30) for hour in (7, -1, 2, 20)]
+        views = asof([track, self.first_track], "views", dates, fill_value=-1)
+        self.assertEqual([[7, -1, 2, 9], [20, -1, 20, 20]], views.tolist())
+
+    def test_asof_ratio(self):
+        ratios = asof([self.first_track, self.book], "likes / views", [SNAPSHOT_DATE])
+        self.assertEqual(0.5, ratios[0, 0])
+        self.assertTrue(np.isnan(ratios[1, 0]))
+        ratios = asof([self.book], "votes / reads", [SNAPSHOT_DATE])
+        self.assertEqual(0.25, ratios[0, 0])
+
+
+class TestSampledIndividual(unittest.TestCase):
+    def test_slots(self):
+        track = YouTubeTrack(self.id())
+        snapshot = YouTubeTrack.Snapshot(track, "track", SNAPSHOT_DATE, 20, 5, 15)
+        self.assertFalse(hasattr(snapshot, "__dict__"))
+        self.assertFalse(hasattr(snapshot + snapshot, "__dict__"))
+        slots_class = type("Slots", (), {"__slots__": YouTubeTrack.Snapshot.__slots__})
+        self.assertEqual(sys.getsizeof(object.__new__(slots_class)), sys.getsizeof(snapshot))
+
+    def test_ratios(self):
+        track = YouTubeTrack(self.id())
+        snapshot = YouTubeTrack.Snapshot(track, "track", SNAPSHOT_DATE, 20, 5, 15)
+        self.assertEqual(0.25, getattr(snapshot, "likes / views"))
+        self.assertEqual(0.25, snapshot.getAttribute("likes / (likes + dislikes)"))
+        self.assertEqual(0.25, (snapshot + snapshot).getAttribute("likes / views"))
+        self.assertEqual(20, snapshot.getAttribute("views"))
+        with self.assertRaises(KeyError):
+            snapshot.getAttribute("votes / reads")
+
+
+class TestPickle(unittest.TestCase):
+    def setUp(self):
+        self.track = YouTubeTrack(self.id())
+        YouTubeTrack.add_many(
+            (self.id(), "title %d" % (hour // 10), SNAPSHOT_DATE + timedelta(hours=hour),
+             hour * 10, hour, 0)
+            for hour in range(100))
+
+    def test_variable(self):
+        with SnapshotStore() as store:
+            track = pickle.loads(pickle.dumps(self.track))
+            self.assertTrue(track in store)
+            self.assertEqual(0, len(track.sample))
+        self.assertTrue(pickle.loads(pickle.dumps(self.track)).sample is self.track.sample)
+
+    def test_snapshot(self):
+        data = pickle.dumps(self.track.sample[5])
+        self.assertLess(len(data), 500)
+        snapshot = pickle.loads(data)
+        self.assertEqual(self.track.sample[5], snapshot)
+        self.assertEqual(50, snapshot.views)
+        self.assertEqual(0.1, snapshot.getAttribute("likes / views"))
+        with SnapshotStore():
+            snapshot = pickle.loads(data)
+            self.assertEqual(0, len(snapshot.track.sample))
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.store = SnapshotStore()
+        self.track = YouTubeTrack(self.id(), store=self.store)
+        self.store.add_many(
+            YouTubeTrack,
+            ((self.id(), "title %d" % (hour // 10), SNAPSHOT_DATE + timedelta(hours=hour),
+              hour * 10, hour, 0) for hour in range(100)))
+        WattPadBook(self.id(), store=self.store)
+
+    def test_checkpoint(self):
+        data = pickle.dumps(self.store.checkpoint(YouTubeTrack))
+        with SnapshotStore() as store:
+            self.assertEqual(len(self.track.sample), store.restore(pickle.loads(data)))
+            track = YouTubeTrack(self.id())
+            self.assertEqual(
+                [(snapshot.title, snapshot.date, snapshot.views) for snapshot in self.track],
+                [(snapshot.title, snapshot.date, snapshot.views) for snapshot in track])
+            self.assertTrue(track.sample[-1].track.sample is track.sample)
+            self.assertTrue(track.sample[-1].title is self.track.sample[-1].title)
+            self.assertEqual(0, store.restore(pickle.loads(data)))
+        self.assertLess(len(pickle.dumps(SnapshotStore().checkpoint())), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
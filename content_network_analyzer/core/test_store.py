@@ -0,0 +1,65 @@
+"""
+This module contains unit tests for the store module.
+"""
+
+from datetime import datetime
+from logging import getLogger
+import unittest
+
+from .store import DEFAULT_STORE, SnapshotStore, get_store
+from ..models import TumblrPost, YouTubeTrack
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SnapshotStore()
+
+    def test_owned(self):
+        YouTubeTrack.Snapshot(YouTubeTrack("track", self.store), "title", SNAPSHOT_DATE, 1, 0, 0)
+        self.assertEqual(1, len(YouTubeTrack("track", self.store).sample))
+        self.assertEqual(1, len(self.store))
+        self.assertTrue(YouTubeTrack("track", self.store) in self.store)
+        self.assertFalse(YouTubeTrack("track") in self.store)
+
+    def test_isolated(self):
+        other_store = SnapshotStore()
+        YouTubeTrack.Snapshot(YouTubeTrack("track", self.store), "title", SNAPSHOT_DATE, 1, 0, 0)
+        self.assertEqual(0, len(YouTubeTrack("track", other_store).sample))
+
+    def test_active(self):
+        self.assertTrue(get_store() is DEFAULT_STORE)
+        with self.store:
+            self.assertTrue(get_store() is self.store)
+            track = YouTubeTrack("track")
+            post = TumblrPost("post")
+        self.assertTrue(get_store() is DEFAULT_STORE)
+        self.assertTrue(track in self.store)
+        self.assertEqual(
+            set([("track", YouTubeTrack), ("post", TumblrPost)]),
+            set((variable.getId(), type(variable)) for variable in self.store))
+        self.assertEqual(["post"], [post.getId() for post in self.store.getVariables(TumblrPost)])
+        self.store.discard(post)
+        self.assertEqual(1, len(self.store))
+
+    def test_add_many(self):
+        inserted = self.store.add_many(
+            TumblrPost, [("post", "title", SNAPSHOT_DATE, ["tag"], 1)])
+        self.assertEqual(1, inserted)
+        self.assertEqual(frozenset(["tag"]), TumblrPost("post", self.store).getTags())
+        self.assertEqual(0, len(TumblrPost("post").sample))
+
+    def test_clear(self):
+        YouTubeTrack("first", self.store)
+        TumblrPost("second", self.store)
+        self.store.clear(TumblrPost)
+        self.assertEqual(["first"], [variable.getId() for variable in self.store])
+        self.store.clear()
+        self.assertEqual(0, len(self.store))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+This module contains unit tests for the util module.
+"""
+
+from datetime import datetime
+from logging import getLogger
+import gc
+import pickle
+import unittest
+
+from .util import TAG_SETS, intern_tags, intern_text
+from ..models import TumblrPost
+
+
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = datetime(2018, 5, 29, 16, 18, 21)
+
+
+class TestIntern(unittest.TestCase):
+    def test_intern_text(self):
+        text = "".join(["shared", " title"])
+        self.assertTrue(intern_text(text) is intern_text("shared title"))
+        self.assertEqual(None, intern_text(None))
+
+    def test_intern_tags(self):
+        tags = intern_tags(["first", "second"])
+        self.assertTrue(isinstance(tags, frozenset))
+        self.assertTrue(tags is intern_tags({"second", "first"}))
+
+    def test_intern_tags_released(self):
+        tags = intern_tags([self.id()])
+        self.assertTrue(tags in TAG_SETS)
+        del tags
+        gc.collect()
+        self.assertFalse(frozenset([self.id()]) in TAG_SETS)
+
+    def test_snapshots(self):
+        first_post = TumblrPost(self.id() + "-first")
+        second_post = TumblrPost(self.id() + "-second")
+        first_snapshot = TumblrPost.Snapshot(first_post, "title", SNAPSHOT_DATE, ["a", "b"], 1)
+        second_snapshot = TumblrPost.Snapshot(second_post, "title", SNAPSHOT_DATE, ["b", "a"], 2)
+        self.assertTrue(first_snapshot.tags is second_snapshot.tags)
+        self.assertTrue(first_snapshot.title is second_snapshot.title)
+        unpickled_snapshot = pickle.loads(pickle.dumps(first_snapshot))
+        self.assertTrue(unpickled_snapshot.tags is first_snapshot.tags)
+        self.assertTrue((first_snapshot + second_snapshot).tags is first_snapshot.tags)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,16 @@
 Defines utility functions.
 """
 
+from datetime import datetime, timedelta, timezone
 from logging import getLogger
 import re
+import sys
+from weakref import WeakKeyDictionary, ref
 
 
+EPOCH = datetime(1970, 1, 1)
 LOGGER = getLogger(__name__)
+TAG_SETS = WeakKeyDictionary()
 
 
 def fraction(numerator, denominator, bottom=0.0):
@@ -58,3 +63,90 @@ def parse_int(text):
     assert match, "Can't parse \"%s\" as an integer" % text
 
     return int(re.sub(r"\s*", "", match.group(1)))
+
+
+def intern_text(text):
+    """Returns a shared copy of a string, so that equal strings are only stored once.
+
+    Parameters
+    ----------
+    text : str or None
+        A string, or None.
+
+    Returns
+    -------
+    str or None
+        The shared copy of the string, or None if text is None.
+    """
+    assert isinstance(text, str) or text is None
+
+    return sys.intern(text) if text is not None else None
+
+
+def intern_tags(tags):
+    """Returns a shared frozen set of tags, so that equal sets of tags are only stored once.
+
+    Note
+    ----
+    The shared sets of tags are only weakly referenced from TAG_SETS, so that a set of tags is
+    dropped from TAG_SETS when no snapshot uses it.
+
+    Parameters
+    ----------
+    tags : iterable of str
+        Tags.
+
+    Returns
+    -------
+    frozenset of str
+        The shared frozen set of the tags.
+    """
+    tags = frozenset(intern_text(tag) for tag in tags)
+    shared = TAG_SETS.get(tags)
+    shared = shared() if shared is not None else None
+    if shared is None:
+        TAG_SETS[tags] = ref(tags)
+        shared = tags
+    return shared
+
+
+def to_timestamp(date):
+    """Converts a datetime into the number of microseconds since the epoch.
+
+    Parameters
+    ----------
+    date : datetime
+        A datetime. A naive datetime is interpreted as UTC.
+
+    Returns
+    -------
+    int
+        The number of microseconds since the epoch.
+    """
+    assert isinstance(date, datetime)
+
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = date - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+
+def from_timestamp(timestamp, tzinfo=None):
+    """Converts a number of microseconds since the epoch into a datetime.
+
+    Parameters
+    ----------
+    timestamp : int
+        The number of microseconds since the epoch.
+    tzinfo : tzinfo or None, optional
+        The time zone of the datetime. None if the datetime is naive, and in UTC.
+
+    Returns
+    -------
+    datetime
+        The datetime.
+    """
+    date = EPOCH + timedelta(microseconds=int(timestamp))
+    if tzinfo is not None:
+        date = date.replace(tzinfo=timezone.utc).astimezone(tzinfo)
+    return date
@@ -6,13 +6,12 @@ from datetime import datetime
 from heapq import merge
 from logging import getLogger
 import re
-from weakref import WeakValueDictionary
 
 from bs4 import BeautifulSoup
 from bs4.element import Tag
-from sortedcontainers import SortedSet
 
-from ..core import SampledIndividual, RandomVariable, Cluster, NamedEntity
+from ..core import SampledIndividual, RandomVariable, Cluster, NamedEntity, intern_text
+from ..core import cached, get_store
 
 
 LICENSE_FILENAMES = ["COPYING", "LICENSE", "LICENSE.md", "LICENSE.txt"]
@@ -202,6 +201,14 @@ class Language(Cluster, NamedEntity):
         if future_yield:
             yield future_yield
 
+    def _children(self):
+        return self.clusters
+
+    def getVariables(self):
+        for cluster in self.clusters:
+            for variable in cluster.getVariables():
+                yield variable
+
     def getName(self):
         return self.language
 
@@ -361,28 +368,27 @@ class GitHubRepository(RandomVariable, NamedEntity):
     ----------
     url : str
         The URL that uniquely identifies the GitHub repository.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of GitHubRepository.Snapshot
+    sample : BaseSample of GitHubRepository.Snapshot
         The associated snapshots.
     owner : str
         The nickname of the owner of the repository.
     title : str
         The title of the repository.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, url):
+    def __init__(self, url, store=None):
         assert isinstance(url, str)
 
         self.url = url
         self.owner, self.title = url.split('/')[-2:]
-        if url in GitHubRepository._samples:
-            self.sample = GitHubRepository._samples[url]
-        else:
-            self.sample = SortedSet()
-            GitHubRepository._samples[url] = self.sample
+        self.sample = get_store(store).getSample(GitHubRepository, url)
+
+    def getId(self):
+        return self.url
 
     def _add(self, snapshot):
         """Associate a snapshot with the repository.
@@ -458,15 +464,6 @@ class GitHubRepository(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.url)
 
-    def __getstate__(self):
-        return self.url
-
-    def __setstate__(self, url):
-        self.__init__(url)
-
-    def __getnewargs__(self):
-        return (self.url, )
-
     class Snapshot(SampledIndividual):
         """This class represents a GitHub repository snapshot.
 
@@ -503,8 +500,11 @@ class GitHubRepository(RandomVariable, NamedEntity):
             The number of releases.
         license : str or None
             The license of the repository.
-        languages : Language.AverageRatios
-            The programming languages used in this repository or cluster.
+        languages : Language.AverageRatios or Language.Ratios
+            The programming languages used in this repository or cluster. Ratios that were
+            taken at a different date, and time than the snapshot are rebased to the date, and
+            time of the snapshot, so that a snapshot constructed from cached fields never keeps
+            the date, and time of the parse that filled the cache. See ..core.cached.
 
         Attributes
         ----------
@@ -542,6 +542,10 @@ class GitHubRepository(RandomVariable, NamedEntity):
         languages : Language.AverageRatios
             The programming languages used in this repository or cluster.
         """
+        counters = (
+            "watching", "stars", "forks", "issues", "pull_requests", "projects", "commits",
+            "branches", "releases")
+
         def __init__(
                 self, repository, owner, title, date, watching, stars, forks, issues, pull_requests,
                 projects, commits, branches, releases, licenses, languages):
@@ -561,11 +565,15 @@ class GitHubRepository(RandomVariable, NamedEntity):
             assert isinstance(commits, int)
             assert isinstance(branches, int)
             assert isinstance(releases, int)
+            if isinstance(languages, Language.Ratios):
+                languages = Language.AverageRatios(date, (languages, ))
             assert isinstance(languages, Language.AverageRatios)
+            if languages.date != date:
+                languages = Language.AverageRatios(date, languages.sample)
 
             self.repository = repository
-            self.owner = owner
-            self.title = title
+            self.owner = intern_text(owner)
+            self.title = intern_text(title)
             self.date = date
             self.watching = watching
             self.stars = stars
@@ -627,15 +635,11 @@ class GitHubRepository(RandomVariable, NamedEntity):
             }
 
         def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (
-                self.repository, self.owner, self.title, self.date, self.watching, self.stars,
-                self.forks, self.issues, self.pull_requests, self.projects, self.commits,
-                self.branches, self.releases, self.licenses, self.languages)
+            super(GitHubRepository.Snapshot, self).__setstate__(state)
+            self.licenses = set(self.licenses)
 
         @staticmethod
+        @cached(1)
         def from_html(repository, date, f):
             """Constructs a GitHub repository snapshot from an HTML dump.
 
@@ -708,5 +712,4 @@ class GitHubRepository(RandomVariable, NamedEntity):
 
             return GitHubRepository.Snapshot(
                     repository, owner, title, date, watching, stars, forks, issues, pull_requests,
-                    projects, commits, branches, releases, licenses,
-                    Language.AverageRatios(date, (Language.Ratios(languages),)))
+                    projects, commits, branches, releases, licenses, Language.Ratios(languages))
@@ -4,15 +4,25 @@ Defines datatypes for SoundCloud tracks.
 
 from datetime import datetime
 from logging import getLogger
-from weakref import WeakValueDictionary
 
-from bs4 import BeautifulSoup
-from sortedcontainers import SortedSet
-
-from ..core import SampledIndividual, RandomVariable, NamedEntity, fraction
+from ..core import SampledIndividual, RandomVariable, NamedEntity, intern_text
+from ..core import cached, get_store, Extractor, Field
 
 
 LOGGER = getLogger(__name__)
+EXTRACTOR = Extractor({
+    "title": Field('meta[property="og:title"]', attr="content", stop="body"),
+    "plays": Field(
+        'meta[property="soundcloud:play_count"]', attr="content", converter=int, stop="body"),
+    "downloads": Field(
+        'meta[property="soundcloud:download_count"]', attr="content", converter=int,
+        stop="body"),
+    "comments": Field(
+        'meta[property="soundcloud:comments_count"]', attr="content", converter=int,
+        stop="body"),
+    "likes": Field(
+        'meta[property="soundcloud:like_count"]', attr="content", converter=int, stop="body"),
+})
 
 
 class SoundCloudTrack(RandomVariable, NamedEntity):
@@ -22,21 +32,20 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
     ----------
     url : str
         The URL that uniquely identifies the SoundCloud track.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of SoundCloudTrack.Snapshot
+    sample : BaseSample of SoundCloudTrack.Snapshot
         The associated snapshots.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, url):
+    def __init__(self, url, store=None):
         self.url = url
-        if url in SoundCloudTrack._samples:
-            self.sample = SoundCloudTrack._samples[url]
-        else:
-            self.sample = SortedSet()
-            SoundCloudTrack._samples[url] = self.sample
+        self.sample = get_store(store).getSample(SoundCloudTrack, url)
+
+    def getId(self):
+        return self.url
 
     def _add(self, snapshot):
         """Associate a snapshot with the track.
@@ -63,15 +72,6 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.url)
 
-    def __getstate__(self):
-        return self.url
-
-    def __setstate__(self, url):
-        self.__init__(url)
-
-    def __getnewargs__(self):
-        return (self.url, )
-
     class Snapshot(SampledIndividual):
         """This class represents a SoundCloud track snapshot.
 
@@ -116,6 +116,12 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
             The ratio between the number of likes, and the number of plays in percent if the number
             of plays is non-zero and zero otherwise.
         """
+        __slots__ = ("track", "title", "date", "plays", "downloads", "comments", "likes")
+        counters = ("plays", "downloads", "comments", "likes")
+        ratios = {
+            "likes / plays": (("likes", ), ("plays", )),
+        }
+
         def __init__(self, track, title, date, plays, downloads, comments, likes):
             assert isinstance(track, SoundCloudTrack) or track is None
             if title is None:
@@ -129,13 +135,12 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
             assert isinstance(likes, int)
 
             self.track = track
-            self.title = title
+            self.title = intern_text(title)
             self.date = date
             self.plays = plays
             self.downloads = downloads
             self.comments = comments
             self.likes = likes
-            self.__dict__["likes / plays"] = fraction(likes, plays)
 
             if self.track:
                 self.track._add(self)
@@ -151,7 +156,7 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
                 and self.date == other.date
 
         def __repr__(self):
-            return "%s(%s)" % (self.__class__.__name__, self.__dict__)
+            return "%s(%s)" % (self.__class__.__name__, self.__getstate__())
 
         def __add__(self, other):
             assert isinstance(other, SoundCloudTrack.Snapshot) or other == 0
@@ -160,27 +165,9 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
                 plays=self.plays + other.plays, downloads=self.downloads + other.downloads,
                 comments=self.comments + other.comments, likes=self.likes + other.likes)
 
-        def __getstate__(self):
-            return {
-                "track": self.track,
-                "title": self.title,
-                "date": self.date,
-                "plays": self.plays,
-                "downloads": self.downloads,
-                "comments": self.comments,
-                "likes": self.likes,
-            }
-
-        def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (
-                self.track, self.title, self.date, self.plays, self.downloads, self.comments,
-                self.likes)
-
         @staticmethod
-        def from_html(track, date, f):
+        @cached(1)
+        def from_html(track, date, f, parser=None, streaming=None):
             """Constructs a SoundCloud track snapshot from an HTML dump.
 
             Parameters
@@ -191,16 +178,20 @@ class SoundCloudTrack(RandomVariable, NamedEntity):
                 The date, and time at which the dump was taken.
             f : file-like readable object
                 The HTML dump.
+            parser : str or None, optional
+                The name of the HTML parser, which parses the HTML dump unless the fields are
+                extracted in a single pass. None if the default parser. See
+                ..core.set_default_parser.
+            streaming : bool or None, optional
+                Whether the meta tags are extracted in a single pass over the HTML dump, which
+                stops at the last meta tag, or at the body. See ..core.Extractor.extract.
 
             Returns
             -------
             SoundCloudTrack.Snapshot
                 The snapshot constructed from the HTML dump.
             """
-            document = BeautifulSoup(f, "html.parser")
-            title = document.find("meta", property="og:title")["content"]
-            plays = int(document.find("meta", property="soundcloud:play_count")["content"])
-            downloads = int(document.find("meta", property="soundcloud:download_count")["content"])
-            comments = int(document.find("meta", property="soundcloud:comments_count")["content"])
-            likes = int(document.find("meta", property="soundcloud:like_count")["content"])
-            return SoundCloudTrack.Snapshot(track, title, date, plays, downloads, comments, likes)
+            values = EXTRACTOR.extract(f, parser, streaming)
+            return SoundCloudTrack.Snapshot(
+                track, values["title"], date, values["plays"], values["downloads"],
+                values["comments"], values["likes"])
@@ -2,12 +2,16 @@
 This module contains unit tests for the github module.
 """
 
+from datetime import timedelta
 from dateutil.parser import parse
 from logging import getLogger
 from pathlib import Path
+import pickle
+from tempfile import TemporaryDirectory
 import unittest
 
 from .github import Language, GitHubRepository
+from ..core import DEFAULT_STORE, ParseCache, SnapshotStore
 
 
 Snapshot = GitHubRepository.Snapshot
@@ -170,6 +174,30 @@ class TestGitHubRepositorySnapshot(unittest.TestCase):
         self.assertAlmostEqual((0 + 0.138) / 2, languages["HTML"])
         self.assertAlmostEqual((0.013 + 0.006) / 2, languages["Other"])
 
+    def test_from_html_cached(self):
+        dates = [SNAPSHOT_DATE, SNAPSHOT_DATE + timedelta(days=1)]
+        with TemporaryDirectory() as directory, ParseCache(directory) as cache, SnapshotStore():
+            repository = GitHubRepository(REPOSITORY_URL_GIT)
+            snapshots = []
+            for date in dates:
+                with HTML_DOCUMENT_GIT.open("rt", encoding="utf8") as f:
+                    snapshots.append(Snapshot.from_html(repository, date, f))
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual(dates, [snapshot.languages.getDatetime() for snapshot in snapshots])
+        self.assertEqual(dict(snapshots[0].languages), dict(snapshots[1].languages))
+
+    def test_pickle(self):
+        repository = GitHubRepository(REPOSITORY_URL_GIT)
+        with HTML_DOCUMENT_GIT.open("rt", encoding="utf8") as f:
+            snapshot = Snapshot.from_html(repository, SNAPSHOT_DATE, f)
+        with SnapshotStore() as store:
+            store.restore(pickle.loads(pickle.dumps(DEFAULT_STORE.checkpoint(GitHubRepository))))
+            unpickled_snapshot = GitHubRepository(REPOSITORY_URL_GIT).sample[-1]
+        self.assertEqual(snapshot, unpickled_snapshot)
+        self.assertEqual(51934, unpickled_snapshot.commits)
+        self.assertEqual(set(), unpickled_snapshot.licenses)
+        self.assertEqual(dict(snapshot.languages), dict(unpickled_snapshot.languages))
+
 
 class TestLanguage(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,76 @@
+"""
+This module contains unit tests for the soundcloud module.
+"""
+
+from dateutil.parser import parse
+from logging import getLogger
+from io import StringIO
+from pathlib import Path
+import unittest
+
+from .soundcloud import SoundCloudTrack
+from ..core import PARSERS
+
+
+Snapshot = SoundCloudTrack.Snapshot
+
+
+RESOURCES = Path(__file__).parents[0] / Path("resources")
+HTML_DOCUMENT = RESOURCES / Path("soundcloud-track.html")
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = parse("2018-05-29T16:18:21+02:00")
+VARIANTS = [(parser, False) for parser in PARSERS] + [(None, True)]
+
+
+class TestSoundCloudTrackSnapshot(unittest.TestCase):
+    def test_from_html(self):
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming), \
+                    HTML_DOCUMENT.open("rt", encoding="utf8") as f:
+                snapshot = Snapshot.from_html(None, SNAPSHOT_DATE, f, parser, streaming)
+                self.assertEqual("Flickermood", snapshot.title)
+                self.assertEqual(SNAPSHOT_DATE, snapshot.date)
+                self.assertEqual(1006137, snapshot.plays)
+                self.assertEqual(4128, snapshot.downloads)
+                self.assertEqual(211, snapshot.comments)
+                self.assertEqual(2630, snapshot.likes)
+
+    def test_streaming(self):
+        content = HTML_DOCUMENT.read_text(encoding="utf8")
+        content = content.replace("</body>", "<p>%s</p></body>" % ("lorem ipsum " * 10**5))
+        f = CountingReader(content)
+        snapshot = Snapshot.from_html(None, SNAPSHOT_DATE, f)
+        self.assertEqual("Flickermood", snapshot.title)
+        self.assertEqual(2630, snapshot.likes)
+        self.assertLess(f.size, len(content) / 10)
+
+    def test_fallback(self):
+        content = HTML_DOCUMENT.read_text(encoding="utf8")
+        meta = '<meta content="2630" property="soundcloud:like_count">'
+        content = content.replace(meta, "").replace(
+            "</body>", "<p>%s</p>%s</body>" % ("lorem ipsum " * 10**5, meta))
+        for streaming in (True, False):
+            with self.subTest(streaming=streaming):
+                f = CountingReader(content)
+                snapshot = Snapshot.from_html(None, SNAPSHOT_DATE, f, streaming=streaming)
+                self.assertEqual(2630, snapshot.likes)
+                self.assertEqual(len(content), f.size)
+                self.assertLess(f.streamed_size, len(content) / 10)
+
+
+class CountingReader(StringIO):
+    def __init__(self, content):
+        super(CountingReader, self).__init__(content)
+        self.size = 0
+        self.streamed_size = 0
+
+    def read(self, size=-1):
+        content = super(CountingReader, self).read(size)
+        self.size += len(content)
+        if size is not None and size >= 0:
+            self.streamed_size += len(content)
+        return content
+
+
+if __name__ == '__main__':
+    unittest.main()
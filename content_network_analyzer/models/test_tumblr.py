@@ -0,0 +1,47 @@
+"""
+This module contains unit tests for the tumblr module.
+"""
+
+from dateutil.parser import parse
+from io import StringIO
+from logging import getLogger
+from pathlib import Path
+import unittest
+
+from .tumblr import TumblrPost
+from ..core import PARSERS
+
+
+Snapshot = TumblrPost.Snapshot
+
+
+RESOURCES = Path(__file__).parents[0] / Path("resources")
+HTML_DOCUMENT = RESOURCES / Path("tumblr-post.html")
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = parse("2018-05-29T16:18:21+02:00")
+VARIANTS = [(parser, False) for parser in PARSERS] + [(None, True)]
+
+
+class TestTumblrPostSnapshot(unittest.TestCase):
+    def test_from_html(self):
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming), \
+                    HTML_DOCUMENT.open("rt", encoding="utf8") as f:
+                snapshot = Snapshot.from_html(None, SNAPSHOT_DATE, f, parser, streaming)
+                self.assertEqual("Tumblr is turning eleven", snapshot.title)
+                self.assertEqual(SNAPSHOT_DATE, snapshot.date)
+                self.assertEqual(frozenset(["birthday", "tumblr"]), snapshot.tags)
+                self.assertEqual(12345, snapshot.notes)
+
+    def test_not_a_post(self):
+        content = (
+            '<html><head><meta name="description" content="Log in"></head>'
+            '<body><div class="main"><form></form></div></body></html>')
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming):
+                with self.assertRaises(AssertionError):
+                    Snapshot.from_html(None, SNAPSHOT_DATE, StringIO(content), parser, streaming)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+This module contains unit tests for the wattpad module.
+"""
+
+from dateutil.parser import parse
+from logging import getLogger
+from pathlib import Path
+import unittest
+
+from .wattpad import WattPadBook, WattPadPage, parse_human_readable_int
+from ..core import PARSERS
+
+
+RESOURCES = Path(__file__).parents[0] / Path("resources")
+HTML_DOCUMENT_BOOK = RESOURCES / Path("wattpad-book.html")
+HTML_DOCUMENT_PAGE = RESOURCES / Path("wattpad-page.html")
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = parse("2018-05-29T16:18:21+02:00")
+VARIANTS = [(parser, False) for parser in PARSERS] + [(None, True)]
+
+
+class TestParseHumanReadableInt(unittest.TestCase):
+    def test_suffixes(self):
+        self.assertEqual(4100, parse_human_readable_int("4.1K Reads"))
+        self.assertEqual(4100000, parse_human_readable_int(" 4.1M "))
+        self.assertEqual(912, parse_human_readable_int("912"))
+        with self.assertRaises(ValueError):
+            parse_human_readable_int("many")
+
+
+class TestWattPadBookSnapshot(unittest.TestCase):
+    def test_from_html(self):
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming), \
+                    HTML_DOCUMENT_BOOK.open("rt", encoding="utf8") as f:
+                snapshot = WattPadBook.Snapshot.from_html(
+                    None, SNAPSHOT_DATE, f, parser, streaming)
+                self.assertEqual("The Cellar", snapshot.title)
+                self.assertEqual(SNAPSHOT_DATE, snapshot.date)
+                self.assertEqual(4100000, snapshot.reads)
+                self.assertEqual(126000, snapshot.votes)
+
+
+class TestWattPadPageSnapshot(unittest.TestCase):
+    def test_from_html(self):
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming), \
+                    HTML_DOCUMENT_PAGE.open("rt", encoding="utf8") as f:
+                snapshot = WattPadPage.Snapshot.from_html(
+                    None, SNAPSHOT_DATE, f, parser, streaming)
+                self.assertEqual("The Cellar", snapshot.title)
+                self.assertEqual("Chapter 1", snapshot.subtitle)
+                self.assertEqual(SNAPSHOT_DATE, snapshot.date)
+                self.assertEqual(289000, snapshot.reads)
+                self.assertEqual(7800, snapshot.votes)
+                self.assertEqual(912, snapshot.comments)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+This module contains unit tests for the youtube module.
+"""
+
+from dateutil.parser import parse
+from logging import getLogger
+from pathlib import Path
+import unittest
+
+from .youtube import YouTubeTrack
+from ..core import PARSERS
+
+
+Snapshot = YouTubeTrack.Snapshot
+
+
+RESOURCES = Path(__file__).parents[0] / Path("resources")
+HTML_DOCUMENT = RESOURCES / Path("youtube-track.html")
+LOGGER = getLogger(__name__)
+SNAPSHOT_DATE = parse("2018-05-29T16:18:21+02:00")
+VARIANTS = [(parser, False) for parser in PARSERS] + [(None, True)]
+
+
+class TestYouTubeTrackSnapshot(unittest.TestCase):
+    def test_from_html(self):
+        for parser, streaming in VARIANTS:
+            with self.subTest(parser=parser, streaming=streaming), \
+                    HTML_DOCUMENT.open("rt", encoding="utf8") as f:
+                snapshot = Snapshot.from_html(None, SNAPSHOT_DATE, f, parser, streaming)
+                self.assertEqual("Rick Astley - Never Gonna Give You Up (Video)", snapshot.title)
+                self.assertEqual(SNAPSHOT_DATE, snapshot.date)
+                self.assertEqual(447925573, snapshot.views)
+                self.assertEqual(3596021, snapshot.likes)
+                self.assertEqual(140264, snapshot.dislikes)
+
+
+if __name__ == '__main__':
+    unittest.main()
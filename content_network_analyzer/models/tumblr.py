@@ -4,15 +4,21 @@ Defines datatypes for Tumblr posts.
 
 from datetime import datetime
 from logging import getLogger
-from weakref import WeakValueDictionary
-
-from bs4 import BeautifulSoup
-from sortedcontainers import SortedSet
 
 from ..core import SampledIndividual, RandomVariable, NamedEntity, parse_int
+from ..core import cached, get_store, intern_tags, intern_text, Extractor, Field
 
 
 LOGGER = getLogger(__name__)
+EXTRACTOR = Extractor({
+    "description": Field(
+        'meta[name="description"]', attr="content", default=None, stop="body"),
+    "og_description": Field(
+        'meta[property="og:description"]', attr="content", default=None, stop="body"),
+    "post": Field("div.main article", default=None),
+    "tags": Field("div.main article a.tag-link", many=True),
+    "notes": Field("div.main article a.post-notes", converter=parse_int, default=0),
+})
 
 
 class TumblrPost(RandomVariable, NamedEntity):
@@ -22,21 +28,20 @@ class TumblrPost(RandomVariable, NamedEntity):
     ----------
     url : str
         The URL that uniquely identifies the Tumblr post.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of TumblrPost.Snapshot
+    sample : BaseSample of TumblrPost.Snapshot
         The associated snapshots.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, url):
+    def __init__(self, url, store=None):
         self.url = url
-        if url in TumblrPost._samples:
-            self.sample = TumblrPost._samples[url]
-        else:
-            self.sample = SortedSet()
-            TumblrPost._samples[url] = self.sample
+        self.sample = get_store(store).getSample(TumblrPost, url)
+
+    def getId(self):
+        return self.url
 
     def _add(self, snapshot):
         """Associate a snapshot with the post.
@@ -60,13 +65,13 @@ class TumblrPost(RandomVariable, NamedEntity):
 
         Returns
         -------
-        set of str
+        frozenset of str
             The tags of the latest snapshot, or an empty set if no snapshot exists.
         """
         if self.sample:
             return self.sample[-1].tags
         else:
-            return set()
+            return frozenset()
 
     def __repr__(self):
         return "%s(%s)" % (
@@ -76,15 +81,6 @@ class TumblrPost(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.url)
 
-    def __getstate__(self):
-        return self.url
-
-    def __setstate__(self, url):
-        self.__init__(url)
-
-    def __getnewargs__(self):
-        return (self.url, )
-
     class Snapshot(SampledIndividual):
         """This class represents a Tumblr post snapshot.
 
@@ -112,11 +108,15 @@ class TumblrPost(RandomVariable, NamedEntity):
             cluster.
         date : datetime
             The date, and time at which the snapshot was taken.
-        tags : set of str
-            The tags the post has at the time of the snapshot.
+        tags : frozenset of str
+            The tags the post has at the time of the snapshot. Equal sets of tags are shared
+            across snapshots.
         notes : int
             The number of notes the post had at the time of the snapshot.
         """
+        __slots__ = ("post", "title", "date", "tags", "notes")
+        counters = ("notes", )
+
         def __init__(self, post, title, date, tags, notes):
             assert isinstance(post, TumblrPost) or post is None
             if title is None:
@@ -127,9 +127,9 @@ class TumblrPost(RandomVariable, NamedEntity):
             assert isinstance(notes, int)
 
             self.post = post
-            self.title = title
+            self.title = intern_text(title)
             self.date = date
-            self.tags = set(tags)
+            self.tags = intern_tags(tags)
             self.notes = notes
 
             if self.post:
@@ -146,7 +146,7 @@ class TumblrPost(RandomVariable, NamedEntity):
                 and self.date == other.date
 
         def __repr__(self):
-            return "%s(%s)" % (self.__class__.__name__, self.__dict__)
+            return "%s(%s)" % (self.__class__.__name__, self.__getstate__())
 
         def __add__(self, other):
             assert isinstance(other, TumblrPost.Snapshot) or other == 0
@@ -154,23 +154,9 @@ class TumblrPost(RandomVariable, NamedEntity):
                 post=None, title=None, date=max(self.date, other.date), tags=self.tags & other.tags,
                 notes=self.notes + other.notes)
 
-        def __getstate__(self):
-            return {
-                "post": self.post,
-                "title": self.title,
-                "date": self.date,
-                "tags": tuple(self.tags),
-                "notes": self.notes,
-            }
-
-        def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (self.post, self.title, self.date, tuple(self.tags), self.notes)
-
         @staticmethod
-        def from_html(post, date, f):
+        @cached(1)
+        def from_html(post, date, f, parser=None, streaming=None):
             """Constructs a Tumblr post snapshot from an HTML dump.
 
             Parameters
@@ -181,30 +167,29 @@ class TumblrPost(RandomVariable, NamedEntity):
                 The date, and time at which the dump was taken.
             f : file-like readable object
                 The HTML dump.
+            parser : str or None, optional
+                The name of the HTML parser, which parses the HTML dump unless the fields are
+                extracted in a single pass. None if the default parser. See
+                ..core.set_default_parser.
+            streaming : bool or None, optional
+                Whether the fields are extracted in a single pass over the HTML dump, which
+                stops at the end of the post. See ..core.Extractor.extract.
 
             Returns
             -------
             TumblrPost.Snapshot
                 The snapshot constructed from the HTML dump.
             """
-            document = BeautifulSoup(f, "html.parser")
-            assert document, "Not an HTML document"
-
-            description_element = document.find("meta", {"name": "description"}) \
-                or document.find("meta", {"property": "og:description"})
-            assert description_element, "Description not found"
+            values = EXTRACTOR.extract(f, parser, streaming)
 
-            description = description_element["content"]
+            description = values["description"]
+            if description is None:
+                description = values["og_description"]
+            assert description is not None, "Description not found"
 
-            post_element = document.find("div", {"class": "main"}).find("article")
-            assert post_element, "Post element not found"
-
-            tag_elements = post_element.find_all("a", {"class": "tag-link"})
-            tags = [tag_element.text for tag_element in tag_elements]
+            assert values["post"] is not None, "Post element not found"
 
+            tags = values["tags"]
             title = description if description else ' '.join(tags)
 
-            notes_element = post_element.find("a", {"class": "post-notes"})
-            notes = parse_int(notes_element.text) if notes_element else 0
-
-            return TumblrPost.Snapshot(post, title, date, tags, notes)
+            return TumblrPost.Snapshot(post, title, date, tags, values["notes"])
@@ -5,12 +5,9 @@ Defines datatypes for WattPad books.
 from datetime import datetime
 from logging import getLogger
 from re import compile
-from weakref import WeakValueDictionary
 
-from bs4 import BeautifulSoup
-from sortedcontainers import SortedSet
-
-from ..core import SampledIndividual, RandomVariable, NamedEntity, fraction
+from ..core import SampledIndividual, RandomVariable, NamedEntity, intern_text
+from ..core import cached, get_store, Extractor, Field
 
 
 LOGGER = getLogger(__name__)
@@ -41,6 +38,24 @@ def parse_human_readable_int(text):
             raise ValueError('"%s" is not in human-readable format' % stripped_text)
 
 
+BOOK_EXTRACTOR = Extractor({
+    "title": Field("h1", converter=str.strip),
+    "reads": Field(
+        'span[data-toggle="tooltip"]', text=compile(r".* Reads"),
+        converter=parse_human_readable_int),
+    "votes": Field(
+        'span[data-toggle="tooltip"]', text=compile(r".* Votes"),
+        converter=parse_human_readable_int),
+})
+PAGE_EXTRACTOR = Extractor({
+    "title": Field("h1", converter=str.strip),
+    "subtitle": Field("h2", converter=str.strip),
+    "reads": Field("span.reads", converter=parse_human_readable_int),
+    "votes": Field("span.votes", converter=parse_human_readable_int),
+    "comments": Field("span.comments", converter=parse_human_readable_int),
+})
+
+
 class WattPadBook(RandomVariable, NamedEntity):
     """This class represents a WattPad book along with its associated snapshots.
 
@@ -48,21 +63,20 @@ class WattPadBook(RandomVariable, NamedEntity):
     ----------
     url : str
         The URL that uniquely identifies the WattPad book.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of WattPadBook.Snapshot
+    sample : BaseSample of WattPadBook.Snapshot
         The associated snapshots.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, url):
+    def __init__(self, url, store=None):
         self.url = url
-        if url in WattPadBook._samples:
-            self.sample = WattPadBook._samples[url]
-        else:
-            self.sample = SortedSet()
-            WattPadBook._samples[url] = self.sample
+        self.sample = get_store(store).getSample(WattPadBook, url)
+
+    def getId(self):
+        return self.url
 
     def _add(self, snapshot):
         """Associate a snapshot with the book.
@@ -89,15 +103,6 @@ class WattPadBook(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.url)
 
-    def __getstate__(self):
-        return self.url
-
-    def __setstate__(self, url):
-        self.__init__(url)
-
-    def __getnewargs__(self):
-        return (self.url, )
-
     class Snapshot(SampledIndividual):
         """This class represents a WattPad book snapshot.
 
@@ -132,6 +137,12 @@ class WattPadBook(RandomVariable, NamedEntity):
             The ratio between the number of votes, and the number of reads in percent if the number
             of reads is non-zero and zero otherwise.
         """
+        __slots__ = ("book", "title", "date", "reads", "votes")
+        counters = ("reads", "votes")
+        ratios = {
+            "votes / reads": (("votes", ), ("reads", )),
+        }
+
         def __init__(self, book, title, date, reads, votes):
             assert isinstance(book, WattPadBook) or book is None
             assert isinstance(title, str) or (title is None and book is None)
@@ -140,11 +151,10 @@ class WattPadBook(RandomVariable, NamedEntity):
             assert isinstance(votes, int)
 
             self.book = book
-            self.title = title
+            self.title = intern_text(title)
             self.date = date
             self.reads = reads
             self.votes = votes
-            self.__dict__["votes / reads"] = fraction(votes, reads)
 
             if self.book:
                 self.book._add(self)
@@ -166,7 +176,7 @@ class WattPadBook(RandomVariable, NamedEntity):
                 and self.date == other.date
 
         def __repr__(self):
-            return "%s(%s)" % (self.__class__.__name__, self.__dict__)
+            return "%s(%s)" % (self.__class__.__name__, self.__getstate__())
 
         def __add__(self, other):
             assert isinstance(other, WattPadBook.Snapshot) or other == 0
@@ -174,23 +184,9 @@ class WattPadBook(RandomVariable, NamedEntity):
                 book=None, title=None, date=max(self.date, other.date),
                 reads=self.reads + other.reads, votes=self.votes + other.votes)
 
-        def __getstate__(self):
-            return {
-                "book": self.book,
-                "title": self.title,
-                "date": self.date,
-                "reads": self.reads,
-                "votes": self.votes,
-            }
-
-        def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (self.book, self.title, self.date, self.reads, self.votes)
-
         @staticmethod
-        def from_html(book, date, f):
+        @cached(1)
+        def from_html(book, date, f, parser=None, streaming=None):
             """Constructs a WattPad book snapshot from an HTML dump.
 
             Parameters
@@ -201,19 +197,22 @@ class WattPadBook(RandomVariable, NamedEntity):
                 The date, and time at which the dump was taken.
             f : file-like readable object
                 The HTML dump.
+            parser : str or None, optional
+                The name of the HTML parser, which parses the HTML dump unless the fields are
+                extracted in a single pass. None if the default parser. See
+                ..core.set_default_parser.
+            streaming : bool or None, optional
+                Whether the fields are extracted in a single pass over the HTML dump, which
+                stops at the vote count. See ..core.Extractor.extract.
 
             Returns
             -------
             WattPadBook.Snapshot
                 The snapshot constructed from the HTML dump.
             """
-            document = BeautifulSoup(f, "html.parser")
-            title = document.find("h1").text.strip()
-            reads = parse_human_readable_int(document.find(
-                "span", {"data-toggle": "tooltip"}, text=compile(r".* Reads")).text)
-            votes = parse_human_readable_int(document.find(
-                "span", {"data-toggle": "tooltip"}, text=compile(r".* Votes")).text)
-            return WattPadBook.Snapshot(book, title, date, reads, votes)
+            values = BOOK_EXTRACTOR.extract(f, parser, streaming)
+            return WattPadBook.Snapshot(
+                book, values["title"], date, values["reads"], values["votes"])
 
 
 class WattPadPage(RandomVariable, NamedEntity):
@@ -223,21 +222,20 @@ class WattPadPage(RandomVariable, NamedEntity):
     ----------
     url : str
         The URL that uniquely identifies the page in a WattPad book.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of WattPadPage.Snapshot
+    sample : BaseSample of WattPadPage.Snapshot
         The associated snapshots.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, url):
+    def __init__(self, url, store=None):
         self.url = url
-        if url in WattPadPage._samples:
-            self.sample = WattPadPage._samples[url]
-        else:
-            self.sample = SortedSet()
-            WattPadPage._samples[url] = self.sample
+        self.sample = get_store(store).getSample(WattPadPage, url)
+
+    def getId(self):
+        return self.url
 
     def _add(self, snapshot):
         """Associate a snapshot with the page.
@@ -252,7 +250,7 @@ class WattPadPage(RandomVariable, NamedEntity):
 
     def getName(self):
         if self.sample:
-            return "%(title)s - %(subtitle)s" % self.sample[-1].__dict__
+            return "%s - %s" % (self.sample[-1].title, self.sample[-1].subtitle)
         else:
             return "(unknown title)"
 
@@ -264,15 +262,6 @@ class WattPadPage(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.url)
 
-    def __getstate__(self):
-        return self.url
-
-    def __setstate__(self, url):
-        self.__init__(url)
-
-    def __getnewargs__(self):
-        return (self.url, )
-
     class Snapshot(SampledIndividual):
         """This class represents a WattPad book page snapshot.
 
@@ -316,6 +305,12 @@ class WattPadPage(RandomVariable, NamedEntity):
             The ratio between the number of votes, and the number of reads in percent if the number
             of reads is non-zero and zero otherwise.
         """
+        __slots__ = ("page", "title", "subtitle", "date", "reads", "votes", "comments")
+        counters = ("reads", "votes", "comments")
+        ratios = {
+            "votes / reads": (("votes", ), ("reads", )),
+        }
+
         def __init__(self, page, title, subtitle, date, reads, votes, comments):
             assert isinstance(page, WattPadPage) or page is None
             assert isinstance(title, str) or (title is None and page is None)
@@ -326,13 +321,12 @@ class WattPadPage(RandomVariable, NamedEntity):
             assert isinstance(comments, int)
 
             self.page = page
-            self.title = title
-            self.subtitle = subtitle
+            self.title = intern_text(title)
+            self.subtitle = intern_text(subtitle)
             self.date = date
             self.reads = reads
             self.votes = votes
             self.comments = comments
-            self.__dict__["votes / reads"] = fraction(votes, reads)
 
             if self.page:
                 self.page._add(self)
@@ -348,36 +342,18 @@ class WattPadPage(RandomVariable, NamedEntity):
                 and self.date == other.date
 
         def __repr__(self):
-            return "%s(%s)" % (self.__class__.__name__, self.__dict__)
+            return "%s(%s)" % (self.__class__.__name__, self.__getstate__())
 
         def __add__(self, other):
-            assert isinstance(other, WattPadPage.Snapshot)
-            return WattPadPage.Snapshot(
-                page=None, title=None, subtitle=None, date=self.date,
+            assert isinstance(other, WattPadPage.Snapshot) or other == 0
+            return self if other == 0 else WattPadPage.Snapshot(
+                page=None, title=None, subtitle=None, date=max(self.date, other.date),
                 reads=self.reads + other.reads, votes=self.votes + other.votes,
                 comments=self.comments + other.comments)
 
-        def __getstate__(self):
-            return {
-                "page": self.page,
-                "title": self.title,
-                "subtitle": self.subtitle,
-                "date": self.date,
-                "reads": self.reads,
-                "votes": self.votes,
-                "comments": self.comments,
-            }
-
-        def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (
-                self.page, self.title, self.subtitle, self.date, self.reads, self.votes,
-                self.comments)
-
         @staticmethod
-        def from_html(page, date, f):
+        @cached(1)
+        def from_html(page, date, f, parser=None, streaming=None):
             """Constructs a WattPad book page snapshot from an HTML dump.
 
             Parameters
@@ -388,16 +364,20 @@ class WattPadPage(RandomVariable, NamedEntity):
                 The date, and time at which the dump was taken.
             f : file-like readable object
                 The HTML dump.
+            parser : str or None, optional
+                The name of the HTML parser, which parses the HTML dump unless the fields are
+                extracted in a single pass. None if the default parser. See
+                ..core.set_default_parser.
+            streaming : bool or None, optional
+                Whether the fields are extracted in a single pass over the HTML dump, which
+                stops at the comment count. See ..core.Extractor.extract.
 
             Returns
             -------
             WattPadPage.Snapshot
                 The snapshot constructed from the HTML dump.
             """
-            document = BeautifulSoup(f, "html.parser")
-            title = document.find("h1").text.strip()
-            subtitle = document.find("h2").text.strip()
-            reads = parse_human_readable_int(document.find("span", {"class": "reads"}).text)
-            votes = parse_human_readable_int(document.find("span", {"class": "votes"}).text)
-            comments = parse_human_readable_int(document.find("span", {"class": "comments"}).text)
-            return WattPadPage.Snapshot(page, title, subtitle, date, reads, votes, comments)
+            values = PAGE_EXTRACTOR.extract(f, parser, streaming)
+            return WattPadPage.Snapshot(
+                page, values["title"], values["subtitle"], date, values["reads"], values["votes"],
+                values["comments"])
@@ -5,15 +5,18 @@ Defines datatypes for YouTube tracks.
 from datetime import datetime
 import json
 from logging import getLogger
-from weakref import WeakValueDictionary
 
-from bs4 import BeautifulSoup
-from sortedcontainers import SortedSet
-
-from ..core import SampledIndividual, RandomVariable, NamedEntity, fraction, parse_int
+from ..core import SampledIndividual, RandomVariable, NamedEntity, parse_int, intern_text
+from ..core import cached, get_store, Extractor, Field
 
 
 LOGGER = getLogger(__name__)
+EXTRACTOR = Extractor({
+    "title": Field('meta[property="og:title"]', attr="content", stop="body"),
+    "views": Field("div.watch-view-count", converter=parse_int),
+    "likes": Field("button.like-button-renderer-like-button", converter=parse_int),
+    "dislikes": Field("button.like-button-renderer-dislike-button", converter=parse_int),
+})
 
 
 class YouTubeTrack(RandomVariable, NamedEntity):
@@ -23,21 +26,20 @@ class YouTubeTrack(RandomVariable, NamedEntity):
     ----------
     id : str
         The ID that uniquely identifies the YouTube track.
+    store : SnapshotStore or None, optional
+        The store that owns the associated snapshots. None if the active store.
 
     Attributes
     ----------
-    sample : sortedcontainers.SortedSet of YouTubeTrack.Snapshot
+    sample : BaseSample of YouTubeTrack.Snapshot
         The associated snapshots.
     """
-    _samples = WeakValueDictionary()
-
-    def __init__(self, id):
+    def __init__(self, id, store=None):
         self.id = id
-        if id in YouTubeTrack._samples:
-            self.sample = YouTubeTrack._samples[id]
-        else:
-            self.sample = SortedSet()
-            YouTubeTrack._samples[id] = self.sample
+        self.sample = get_store(store).getSample(YouTubeTrack, id)
+
+    def getId(self):
+        return self.id
 
     def _add(self, snapshot):
         """Associate a snapshot with the track.
@@ -64,15 +66,6 @@ class YouTubeTrack(RandomVariable, NamedEntity):
     def __hash__(self):
         return hash(self.id)
 
-    def __getstate__(self):
-        return self.id
-
-    def __setstate__(self, id):
-        self.__init__(id)
-
-    def __getnewargs__(self):
-        return (self.id, )
-
     class Snapshot(SampledIndividual):
         """This class represents a YouTube track snapshot.
 
@@ -116,6 +109,13 @@ class YouTubeTrack(RandomVariable, NamedEntity):
             The ratio between the number of likes, and the number of likes and dislikes in percent
             if the number of likes and dislikes is non-zero and zero otherwise.
         """
+        __slots__ = ("track", "title", "date", "views", "likes", "dislikes")
+        counters = ("views", "likes", "dislikes")
+        ratios = {
+            "likes / views": (("likes", ), ("views", )),
+            "likes / (likes + dislikes)": (("likes", ), ("likes", "dislikes")),
+        }
+
         def __init__(self, track, title, date, views, likes, dislikes):
             assert isinstance(track, YouTubeTrack) or track is None
             if title is None:
@@ -128,13 +128,11 @@ class YouTubeTrack(RandomVariable, NamedEntity):
             assert isinstance(dislikes, int)
 
             self.track = track
-            self.title = title
+            self.title = intern_text(title)
             self.date = date
             self.views = views
             self.likes = likes
-            self.__dict__["likes / views"] = fraction(likes, views)
             self.dislikes = dislikes
-            self.__dict__["likes / (likes + dislikes)"] = fraction(likes, likes + dislikes)
 
             if self.track:
                 self.track._add(self)
@@ -150,7 +148,7 @@ class YouTubeTrack(RandomVariable, NamedEntity):
                 and self.date == other.date
 
         def __repr__(self):
-            return "%s(%s)" % (self.__class__.__name__, self.__dict__)
+            return "%s(%s)" % (self.__class__.__name__, self.__getstate__())
 
         def __add__(self, other):
             assert isinstance(other, YouTubeTrack.Snapshot) or other == 0
@@ -159,24 +157,9 @@ class YouTubeTrack(RandomVariable, NamedEntity):
                 views=self.views + other.views, likes=self.likes + other.likes,
                 dislikes=self.dislikes + other.dislikes)
 
-        def __getstate__(self):
-            return {
-                "track": self.track,
-                "title": self.title,
-                "date": self.date,
-                "views": self.views,
-                "likes": self.likes,
-                "dislikes": self.dislikes,
-            }
-
-        def __setstate__(self, state):
-            self.__init__(**state)
-
-        def __getnewargs__(self):
-            return (self.track, self.title, self.date, self.views, self.likes, self.dislikes)
-
         @staticmethod
-        def from_html(track, date, f):
+        @cached(1)
+        def from_html(track, date, f, parser=None, streaming=None):
             """Constructs a YouTube track snapshot from an HTML dump.
 
             Parameters
@@ -187,22 +170,25 @@ class YouTubeTrack(RandomVariable, NamedEntity):
                 The date, and time at which the dump was taken.
             f : file-like readable object
                 The HTML dump.
+            parser : str or None, optional
+                The name of the HTML parser, which parses the HTML dump unless the fields are
+                extracted in a single pass. None if the default parser. See
+                ..core.set_default_parser.
+            streaming : bool or None, optional
+                Whether the fields are extracted in a single pass over the HTML dump, which
+                stops at the dislike button. See ..core.Extractor.extract.
 
             Returns
             -------
             YouTubeTrack.Snapshot
                 The snapshot constructed from the HTML dump.
             """
-            document = BeautifulSoup(f, "html.parser")
-            title = document.find("meta", property="og:title")["content"]
-            views = parse_int(document.find("div", {"class": "watch-view-count"}).text)
-            likes = parse_int(
-                document.find("button", {"class": "like-button-renderer-like-button"}).text)
-            dislikes = parse_int(
-                document.find("button", {"class": "like-button-renderer-dislike-button"}).text)
-            return YouTubeTrack.Snapshot(track, title, date, views, likes, dislikes)
+            values = EXTRACTOR.extract(f, parser, streaming)
+            return YouTubeTrack.Snapshot(
+                track, values["title"], date, values["views"], values["likes"], values["dislikes"])
 
         @staticmethod
+        @cached(1)
         def from_apiv3(track, date, f):
             """Constructs a YouTube track snapshot from a JSON API v3 dump.
 
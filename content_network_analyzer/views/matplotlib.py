@@ -10,8 +10,9 @@ import matplotlib  # noqa:F401
 from matplotlib.dates import MonthLocator, DateFormatter
 from matplotlib.figure import Figure  # noqa:F401
 from matplotlib.axes._axes import Axes  # noqa:F401
+import numpy as np
 
-from ..core import Cluster, NamedEntity, View
+from ..core import Cluster, NamedEntity, View, optimize
 
 
 DATETIME_MIN = UTC.localize(datetime.min)
@@ -48,7 +49,7 @@ class MatPlotLibView(View):
 
         self.clusters = cluster_list
 
-    def display(self, fig, ax, attr, mindate=DATETIME_MIN, maxdate=DATETIME_MAX):
+    def display(self, fig, ax, attr, mindate=DATETIME_MIN, maxdate=DATETIME_MAX, freq=None):
         """Displays an iterable of clusters in a given datetime range.
 
         Parameters
@@ -63,6 +64,9 @@ class MatPlotLibView(View):
             The minimal datetime that will be displayed.
         maxdate : datetime, optional
             The maximal datetime that will be displayed.
+        freq : timedelta or None, optional
+            The distance between two neighbouring points of a fixed time grid onto which the
+            clusters will be resampled. None if the clusters will not be resampled.
         """
         ax.xaxis.set_major_locator(MonthLocator())
         ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
@@ -71,15 +75,19 @@ class MatPlotLibView(View):
 
         lineformats = cycle(product(LINES, [(r/255., g/255., b/255.) for (r, g, b) in COLORS]))
         latest_values = {}
-        for cluster in self.clusters:
-            individuals = [
-                individual for individual in cluster
-                if individual.getDatetime() >= mindate and individual.getDatetime() <= maxdate]
-            dates, values = list(zip(*(
-                (individual.getDatetime(), individual.__dict__[attr])
-                for individual in individuals if attr in individual.__dict__))) or ([], [])
-            if not values:
+        for cluster in optimize(self.clusters):
+            if freq is not None:
+                timestamps, (values, ) = cluster.resample(
+                    freq, [attr], mindate=mindate, maxdate=maxdate)
+            else:
+                batches = list(cluster.iter_batches([attr], mindate=mindate, maxdate=maxdate))
+                if not batches:
+                    continue
+                timestamps = np.concatenate([timestamps for timestamps, _ in batches])
+                values = np.concatenate([values for _, (values, ) in batches])
+            if not len(values):
                 continue
+            dates = timestamps.astype("datetime64[us]")
             cluster_name = cluster.getName()
             if len(cluster_name) <= LABEL_MAX_LENGTH:
                 label = cluster_name